@@ -0,0 +1,42 @@
+import pytest
+from pytweet import pytweet
+from tests.fake_twitter import FakeAPI, make_timeline
+
+
+def bench_get_tweets(measure, n_rows):
+    """Pages through a timeline of n_rows tweets served by a local fake API."""
+    api = FakeAPI({'@bench': make_timeline(n_rows)})
+    result = measure(lambda: pytweet.get_tweets('@bench', verbose=False, api=api), n_rows)
+    assert len(result) == n_rows
+
+
+def bench_tweet_sentiment_analysis(measure, corpus, n_rows):
+    tweets = corpus[['time', 'tweet']]
+    result = measure(lambda: pytweet.tweet_sentiment_analysis(tweets), n_rows)
+    assert len(result) == n_rows
+
+
+@pytest.mark.parametrize('scorer', ['vader', 'compiled_vader'])
+def bench_vader_scorers(measure, corpus, n_rows, scorer):
+    # NLTK's analyzer against the compiled one, on the same tweets
+    tweets = corpus[['time', 'tweet']]
+    result = measure(lambda: pytweet.tweet_sentiment_analysis(tweets, scorers=[scorer]), n_rows)
+    assert len(result) == n_rows
+
+
+def bench_text_cleaning(measure, corpus, n_rows):
+    tweets = corpus['tweet'].tolist()
+    measure(lambda: [pytweet.text_cleaning(tweet) for tweet in tweets], n_rows)
+
+
+def bench_plot_hashtags(measure, corpus, n_rows):
+    measure(lambda: pytweet.plot_hashtags(corpus, 'tweet').to_dict(), n_rows)
+
+
+def bench_plot_timeline(measure, corpus, n_rows):
+    measure(lambda: pytweet.plot_timeline(corpus, 'time').to_dict(), n_rows)
+
+
+def bench_visualize_sentiment(measure, corpus, n_rows):
+    # the corpus carries random sentiment labels, so no scoring is included
+    measure(lambda: pytweet.visualize_sentiment(corpus).to_dict(), n_rows)
@@ -0,0 +1,77 @@
+# Fixtures of the benchmark suite. Run it from the repository root with
+#
+#     python -m pytest benchmarks --corpus-sizes=1000,100000,1000000 --benchmark-json=results.json
+#     python -m benchmarks.report results.json
+#
+# Each benchmark runs once per corpus size, on synthetic tweets, and records
+# its throughput and peak memory next to pytest-benchmark's timings.
+
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+WORDS = ('love happy great amazing thanks best congrats beautiful fun win '
+         'hate sad terrible awful worst angry sorry kill stop bad '
+         'the a to and of in is it you that for on with this new show song tour video tonight '
+         'music album night time back see go get know let like want make come today').split()
+EXTRAS = ['#SilkSonic', '#24kmagicworldtour', '#Hooligans', '#PleaseMe', '#LeaveTheDoorOpen',
+          '@BrunoMars', '@AndersonPaak', 'https://t.co/ElGgeZ7B9c', 'LOVE', '!!!', '2021', '✨']
+
+
+def make_corpus(n_rows, seed=2021):
+    """
+    Creates n_rows synthetic tweets of 5 to 20 tokens, with hashtags, mentions,
+    links and emoji, sent over one year, each with a random sentiment label.
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(WORDS * 4 + EXTRAS, dtype=object)
+    tokens = vocabulary[rng.integers(len(vocabulary), size=(n_rows, 20))]
+    lengths = rng.integers(5, 21, size=n_rows)
+    tweets = [' '.join(row[:length]) for row, length in zip(tokens, lengths)]
+    times = pd.Timestamp('2021-01-01') + pd.to_timedelta(rng.integers(0, 365 * 24 * 3600, size=n_rows), unit='s')
+    sentiments = rng.choice(np.array(['positive', 'neutral', 'negative'], dtype=object), size=n_rows)
+    return pd.DataFrame({'time': times, 'tweet': tweets, 'sentiment': sentiments})
+
+
+def pytest_addoption(parser):
+    parser.addoption('--corpus-sizes', default='1000',
+                     help='Comma-separated numbers of tweets to benchmark on, 1000 by default.')
+
+
+def pytest_generate_tests(metafunc):
+    if 'n_rows' in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption('corpus_sizes').split(',')]
+        metafunc.parametrize('n_rows', sizes, ids=[f'{size}rows' for size in sizes], scope='session')
+
+
+@pytest.fixture(scope='session')
+def corpus(n_rows):
+    """A synthetic corpus of n_rows tweets, shared by all benchmarks of that size."""
+    return make_corpus(n_rows)
+
+
+@pytest.fixture
+def measure(benchmark):
+    """
+    Benchmarks a function on a corpus and records the corpus size, the
+    throughput in rows per second and the peak memory the function allocated.
+    """
+    def run(func, n_rows):
+        # large corpora take long enough that one round is already a stable measurement
+        small = n_rows <= 10000
+        result = benchmark.pedantic(func, rounds=5 if small else 1, iterations=1, warmup_rounds=1 if small else 0)
+
+        # memory is traced in a separate run, after imports and caches have warmed up
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        benchmark.extra_info['n_rows'] = n_rows
+        benchmark.extra_info['rows_per_second'] = n_rows / benchmark.stats.stats.mean
+        benchmark.extra_info['peak_memory_mb'] = peak / 2 ** 20
+        return result
+
+    return run
@@ -0,0 +1,30 @@
+# Measures how long `import pytweet.pytweet` takes in a fresh interpreter,
+# and how long the first sentiment analysis takes once the heavy
+# dependencies and NLTK data are loaded on demand.
+#
+# Run from the repository root:
+#     python -m benchmarks.import_time
+
+import statistics
+import subprocess
+import sys
+
+IMPORT = "import time; start = time.perf_counter(); import pytweet.pytweet; print(time.perf_counter() - start)"
+FIRST_USE = ("import time, pandas as pd; import pytweet.pytweet as pt; start = time.perf_counter(); "
+             "pt.tweet_sentiment_analysis(pd.DataFrame({'tweet': ['hello']})); print(time.perf_counter() - start)")
+
+
+def measure(code, repeat=5):
+    """Returns the median of the seconds printed by code, each run in a new interpreter."""
+    runs = [float(subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                 check=True).stdout.split()[-1]) for i in range(repeat)]
+    return statistics.median(runs)
+
+
+def main():
+    print(f"import pytweet.pytweet      {measure(IMPORT):6.3f} s")
+    print(f"first sentiment analysis    {measure(FIRST_USE):6.3f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+# Summarizes a benchmark run saved with --benchmark-json: the throughput and
+# peak memory of every function at each corpus size, and how its run time
+# scales between sizes (1.0 is linear, 2.0 quadratic).
+#
+#     python -m benchmarks.report results.json
+
+import json
+import math
+import sys
+from collections import defaultdict
+
+
+def without_size(name, n_rows):
+    """The test id of a benchmark without its corpus size, so other parameters stay apart."""
+    function, _, ids = name.partition('[')
+    ids = [part for part in ids.rstrip(']').split('-') if part and part != f'{n_rows}rows']
+    return f"{function}[{'-'.join(ids)}]" if ids else function
+
+
+def main(path):
+    with open(path) as f:
+        results = json.load(f)['benchmarks']
+
+    runs = defaultdict(list)
+    for result in results:
+        info = result['extra_info']
+        runs[without_size(result['name'], info['n_rows'])].append(
+            (info['n_rows'], result['stats']['mean'], info['rows_per_second'], info['peak_memory_mb']))
+
+    print(f"{'benchmark':40s} {'rows':>9s} {'mean s':>9s} {'rows/s':>11s} {'peak MB':>9s} {'scaling':>8s}")
+    for name, points in sorted(runs.items()):
+        previous = None
+        for n_rows, mean, rows_per_second, peak in sorted(points):
+            scaling = ''
+            if previous is not None and n_rows != previous[0]:
+                scaling = f"{math.log(mean / previous[1]) / math.log(n_rows / previous[0]):.2f}"
+            print(f"{name:40s} {n_rows:9d} {mean:9.3f} {rows_per_second:11.0f} {peak:9.1f} {scaling:>8s}")
+            previous = (n_rows, mean)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1])
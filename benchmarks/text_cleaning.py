@@ -0,0 +1,46 @@
+# Compares the per-tweet cost of text_cleaning against the original implementation,
+# which rebuilt the stopword list and the stemmer on every call.
+#
+# Run from the repository root:
+#     python -m benchmarks.text_cleaning
+
+import re
+import string
+import timeit
+
+import nltk
+import pandas as pd
+from nltk.stem import SnowballStemmer
+
+from pytweet.pytweet import TextCleaner, text_cleaning
+
+
+def original_text_cleaning(text):
+    """text_cleaning as it was before TextCleaner, kept as the baseline."""
+    stopword = nltk.corpus.stopwords.words('english')
+    stopword.append('')
+    stopword.append('cont')
+    ps = SnowballStemmer('english')
+    text_lc = "".join([word.lower() for word in text if word not in string.punctuation])
+    text_rc = re.sub('[0-9]+', '', text_lc)
+    tokens = re.split(r'\W+', text_rc)
+    return [ps.stem(word) for word in tokens if word not in stopword]
+
+
+def main():
+    tweets = pd.read_csv("tests/brunomars_data.csv")['tweet'].tolist()
+    assert [text_cleaning(tweet) for tweet in tweets] == [original_text_cleaning(tweet) for tweet in tweets]
+
+    candidates = {'original': original_text_cleaning,
+                  'text_cleaning': text_cleaning,
+                  'TextCleaner(stem_cache_size=0)': TextCleaner(stem_cache_size=0)}
+    baseline = None
+    for name, clean in candidates.items():
+        runs = timeit.repeat(lambda: [clean(tweet) for tweet in tweets], number=5, repeat=3)
+        per_tweet = min(runs) / (5 * len(tweets)) * 1e6
+        baseline = baseline or per_tweet
+        print(f"{name:32s} {per_tweet:8.1f} us/tweet  {baseline / per_tweet:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+
+class TweetCache:
+    """
+    An on-disk cache of downloaded timelines, one columnar file per entry.
+
+    Timelines are stored as uncompressed Feather (Arrow IPC) files with a
+    typed datetime64 'time' column and a string 'tweet' column. Reads are
+    memory-mapped, so even large timelines load without parsing any text.
+    Entries expire after `ttl` seconds, and once the files take more than
+    `max_bytes` the least recently used entries are evicted.
+
+    Parameters:
+    -----------
+    directory : string
+        The directory holding the cache, created if it does not exist.
+    ttl : number
+        Optional: The number of seconds an entry stays fresh, 3600 by default.
+        ttl=None keeps entries until they are evicted.
+    max_bytes : int
+        Optional: The most disk space the cached files may take.
+        By default the cache is unbounded.
+    memory_map : boolean
+        Optional: Whether to memory-map the files when reading, True by default.
+    clock : callable
+        Optional: Returns the current time in seconds, time.time by default.
+    """
+
+    def __init__(self, directory, ttl=3600, max_bytes=None, memory_map=True, clock=time.time):
+        if not isinstance(directory, (str, os.PathLike)):
+            raise TypeError('Invalid argument type: directory must be a path.')
+        if not (ttl is None or (isinstance(ttl, (int, float)) and ttl >= 0)):
+            raise TypeError('Invalid argument: ttl must be a non-negative number or None.')
+        if not (max_bytes is None or (isinstance(max_bytes, int) and max_bytes > 0)):
+            raise TypeError('Invalid argument: max_bytes must be a positive integer or None.')
+
+        self.directory = os.fspath(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory_map = memory_map
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(self.directory, 'index.json')
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.feather')
+
+    def _read_index(self):
+        """Reads the index, a mapping of key to the entry's size, write and access times and metadata."""
+        if not os.path.exists(self._index_path):
+            return {}
+        with open(self._index_path) as f:
+            return json.load(f)
+
+    def _write_index(self, index):
+        tmp_path = self._index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path)
+
+    def _remove(self, index, key):
+        index.pop(key, None)
+        if os.path.exists(self._path(key)):
+            os.remove(self._path(key))
+
+    def get(self, key):
+        """
+        Reads a cached entry.
+
+        Parameters:
+        -----------
+        key : string
+            The key of the entry.
+
+        Returns:
+        --------
+        entry : tuple
+            The cached dataframe and the metadata stored with it,
+            or None if the entry is missing or has expired.
+        """
+        with self._lock:
+            index = self._read_index()
+            entry = index.get(key)
+            if entry is None:
+                return None
+            now = self._clock()
+            if self.ttl is not None and now - entry['written'] > self.ttl:
+                self._remove(index, key)
+                self._write_index(index)
+                return None
+
+            from pyarrow import feather
+            table = feather.read_table(self._path(key), memory_map=self.memory_map)
+            entry['accessed'] = now
+            self._write_index(index)
+
+        return table.to_pandas(), entry['metadata']
+
+    def put(self, key, tweets, metadata=None):
+        """
+        Writes an entry, replacing any previous one with the same key,
+        then evicts the least recently used entries if the cache is too big.
+
+        Parameters:
+        -----------
+        key : string
+            The key of the entry.
+        tweets : dataframe
+            The tweets to cache, with columns 'time' and 'tweet'.
+        metadata : dict
+            Optional: JSON-serializable information stored with the entry.
+        """
+        import pyarrow as pa
+        from pyarrow import feather
+        table = pa.Table.from_pandas(tweets.assign(time=pd.to_datetime(tweets['time'])),
+                                     preserve_index=False)
+        with self._lock:
+            # uncompressed files can be memory-mapped without decoding
+            feather.write_feather(table, self._path(key), compression='uncompressed')
+            now = self._clock()
+            index = self._read_index()
+            index[key] = {'written': now, 'accessed': now,
+                          'bytes': os.path.getsize(self._path(key)), 'metadata': metadata or {}}
+
+            if self.max_bytes is not None:
+                by_last_use = sorted(index, key=lambda k: index[k]['accessed'])
+                total = sum(entry['bytes'] for entry in index.values())
+                # the entry just written is kept even if it is bigger than max_bytes on its own
+                for old_key in by_last_use:
+                    if total <= self.max_bytes:
+                        break
+                    if old_key == key:
+                        continue
+                    total -= index[old_key]['bytes']
+                    self._remove(index, old_key)
+            self._write_index(index)
+
+    def clear(self):
+        """Removes every entry from the cache."""
+        with self._lock:
+            index = self._read_index()
+            for key in list(index):
+                self._remove(index, key)
+            self._write_index(index)
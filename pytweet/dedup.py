@@ -0,0 +1,211 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# retweet prefixes, possibly nested ('RT @a: RT @b: ...'), and links, which
+# differ between copies of a tweet, once the text is casefolded
+_RETWEET_PREFIX = re.compile(r'^(?:rt\s+@\w+:?\s*)+')
+_URL = re.compile(r'https?://\S+')
+_WHITESPACE = re.compile(r'\s+')
+
+# the characters per shingle, and the multiplier of the rolling hash of shingles
+_SHINGLE_SIZE = 5
+_HASH_MULTIPLIER = np.uint64(1099511628211)
+# the number of texts hashed at once, which bounds the memory used by minhash_signatures
+_CHUNK_SIZE = 10000
+
+
+def normalize_texts(texts):
+    """
+    Normalizes tweet texts so that copies of a tweet compare equal: the
+    text is casefolded, 'RT @user:' prefixes and links are removed and
+    runs of whitespace are collapsed. Other values are converted to strings.
+
+    Parameters:
+    -----------
+    texts : sequence
+        The tweet texts.
+
+    Returns:
+    --------
+    texts : np.array
+        An object array of the normalized texts.
+    """
+    texts = pd.Series(texts, dtype=object).astype(str).str.casefold()
+    texts = texts.str.replace(_URL, ' ', regex=True).str.replace(_WHITESPACE, ' ', regex=True).str.strip()
+    return texts.str.replace(_RETWEET_PREFIX, '', regex=True).to_numpy()
+
+
+def minhash_signatures(texts, num_perm=64, seed=0):
+    """
+    Computes the MinHash signature of each text, over its shingles of
+    5 bytes. The fraction of positions at which the signatures of two
+    texts agree estimates the Jaccard similarity of their shingle sets,
+    with a standard error of at most 0.5 / sqrt(num_perm).
+
+    Parameters:
+    -----------
+    texts : sequence
+        The texts, normalized with normalize_texts.
+    num_perm : int
+        Optional: The length of the signatures, 64 by default.
+    seed : int
+        Optional: The seed of the hash functions, 0 by default.
+
+    Returns:
+    --------
+    signatures : np.array
+        A (len(texts), num_perm) uint64 array.
+    """
+    if not (isinstance(num_perm, int) and num_perm > 0):
+        raise TypeError('Invalid argument: num_perm must be a positive integer.')
+    rng = np.random.default_rng(seed)
+    # multiply-shift hash functions, one per position of the signature
+    multipliers = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    offsets = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+
+    texts = list(texts)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for start in range(0, len(texts), _CHUNK_SIZE):
+        shingles, segments = _shingle_hashes(texts[start:start + _CHUNK_SIZE])
+        for i in range(num_perm):
+            values = (shingles * multipliers[i] + offsets[i]) >> np.uint64(32)
+            signatures[start:start + len(segments), i] = np.minimum.reduceat(values, segments)
+    return signatures
+
+
+def _shingle_hashes(texts):
+    """
+    Hashes the shingles of a chunk of texts, all at once.
+
+    Returns:
+    --------
+    hashes : np.array
+        The uint64 hashes of every shingle, text after text.
+    segments : np.array
+        The position of the first shingle of each text in hashes.
+    """
+    encoded = [text.encode('utf-8') for text in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    # a zero byte at the end pads texts shorter than a shingle
+    data = np.frombuffer(b''.join(encoded) + b'\0', dtype=np.uint8).astype(np.uint64)
+    starts = np.cumsum(lengths) - lengths
+
+    # a text shorter than a shingle is a shingle of its own
+    n_shingles = np.maximum(lengths - _SHINGLE_SIZE + 1, 1)
+    segments = np.cumsum(n_shingles) - n_shingles
+    owners = np.repeat(np.arange(len(encoded)), n_shingles)
+    positions = np.arange(n_shingles.sum()) - segments[owners] + starts[owners]
+    owner_lengths = lengths[owners]
+
+    hashes = np.zeros(len(positions), dtype=np.uint64)
+    for offset in range(_SHINGLE_SIZE):
+        # products wrap around modulo 2 ** 64
+        byte = np.where(offset < owner_lengths, data[np.minimum(positions + offset, len(data) - 1)], 0)
+        hashes = hashes * _HASH_MULTIPLIER + byte.astype(np.uint64)
+    return hashes, segments
+
+
+def _lsh_bands(num_perm, threshold):
+    """
+    Picks the number of signature rows per LSH band whose similarity cutoff,
+    (1 / bands) ** (1 / rows), is closest to the threshold.
+    """
+    rows = min(range(1, num_perm + 1), key=lambda r: abs((1 / (num_perm // r)) ** (1 / r) - threshold))
+    return rows, num_perm // rows
+
+
+def near_duplicate_labels(texts, threshold=0.8, num_perm=64, seed=0):
+    """
+    Groups texts whose shingle sets have a Jaccard similarity of about
+    threshold or more, using MinHash signatures and locality-sensitive
+    hashing: the signatures are cut into bands, texts sharing a band are
+    candidates, and candidates whose signatures agree on at least
+    threshold of their positions are grouped. Groups are closed under
+    chaining, so two texts can share a group through a third one.
+
+    The cost is linear in the number of texts. Pairs above the threshold
+    are found with high probability, and pairs well below it are rarely
+    compared; with num_perm=64 the similarity estimate of a pair has a
+    standard error of at most 0.0625.
+
+    Parameters:
+    -----------
+    texts : sequence
+        The texts, normalized with normalize_texts.
+    threshold : float
+        Optional: The similarity above which texts are grouped, 0.8 by default.
+    num_perm : int
+        Optional: The length of the MinHash signatures, 64 by default.
+    seed : int
+        Optional: The seed of the hash functions, 0 by default.
+
+    Returns:
+    --------
+    labels : np.array
+        The label of each text, the position of the first text of its group.
+    """
+    if not (isinstance(threshold, (int, float)) and 0 < threshold <= 1):
+        raise TypeError('Invalid argument: threshold must be a number in (0, 1].')
+    signatures = minhash_signatures(texts, num_perm, seed)
+    n_texts = len(signatures)
+    rows, bands = _lsh_bands(num_perm, threshold)
+
+    members, leaders = [], []
+    for band in range(bands):
+        keys = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * rows))).ravel()
+        _, first, buckets = np.unique(keys, return_index=True, return_inverse=True)
+        leader = first[buckets.ravel()]
+        candidates = np.flatnonzero(leader != np.arange(n_texts))
+        similarity = (signatures[candidates] == signatures[leader[candidates]]).mean(axis=1)
+        similar = similarity >= threshold
+        members.append(candidates[similar])
+        leaders.append(leader[candidates[similar]])
+    members = np.concatenate(members) if members else np.zeros(0, dtype=np.int64)
+    leaders = np.concatenate(leaders) if leaders else np.zeros(0, dtype=np.int64)
+
+    # connected components, each labelled by its smallest position
+    labels = np.arange(n_texts)
+    while True:
+        previous = labels
+        labels = labels.copy()
+        np.minimum.at(labels, members, labels[leaders])
+        np.minimum.at(labels, leaders, labels[members])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def duplicate_groups(texts, near_duplicates=False, threshold=0.8, num_perm=64):
+    """
+    Groups the copies of each tweet: texts equal once normalized with
+    normalize_texts and, with near_duplicates=True, texts that are nearly
+    the same, see near_duplicate_labels.
+
+    Parameters:
+    -----------
+    texts : sequence
+        The tweet texts.
+    near_duplicates : boolean
+        Optional: Whether to group near duplicates too, False by default.
+    threshold : float
+        Optional: The similarity above which near duplicates are grouped, 0.8 by default.
+    num_perm : int
+        Optional: The length of the MinHash signatures, 64 by default.
+
+    Returns:
+    --------
+    groups : np.array
+        The group of each text, groups numbered in order of first appearance.
+    first : np.array
+        The position of the first text of each group.
+    """
+    groups, uniques = pd.factorize(normalize_texts(texts))
+    if near_duplicates and len(uniques):
+        # the unique texts are in order of first appearance, so labels are too
+        _, labels = np.unique(near_duplicate_labels(uniques, threshold, num_perm), return_inverse=True)
+        groups = labels.ravel()[groups]
+    _, first = np.unique(groups, return_index=True)
+    return groups.astype(np.int64), first
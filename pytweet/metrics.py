@@ -0,0 +1,183 @@
+import cProfile
+import contextlib
+import logging
+import pstats
+import threading
+import time
+from collections import defaultdict
+
+import pandas as pd
+
+# the Metrics currently collecting. pytweet's functions check this tuple before
+# timing anything, so with nothing collecting a stage costs one global lookup.
+_ACTIVE = ()
+_ACTIVE_LOCK = threading.Lock()
+_DISABLED = contextlib.nullcontext()
+
+
+class Metrics:
+    """
+    Collects the time spent in each stage of pytweet's functions, and
+    counters such as API calls, pages, rows scored and cache hits, while
+    it is active as a context manager. Stages timed in other threads,
+    such as those of get_tweets_many, are collected too; the work done in
+    worker processes is timed as a whole from the calling process.
+
+        with Metrics() as metrics:
+            tweets = get_tweets('@elonmusk')
+        print(metrics.summary())
+
+    Parameters:
+    -----------
+    callback : callable
+        Optional: Called as callback(kind, name, value) for each event as it
+        happens, kind being 'time', with the seconds a stage took, or 'count'.
+    logger : logging.Logger or string
+        Optional: A logger, or the name of one, that each event is logged to.
+    level : int
+        Optional: The level events are logged at, logging.DEBUG by default.
+    """
+
+    def __init__(self, callback=None, logger=None, level=logging.DEBUG):
+        if not (callback is None or callable(callback)):
+            raise TypeError('Invalid argument type: callback must be callable.')
+        if isinstance(logger, str):
+            logger = logging.getLogger(logger)
+        elif not (logger is None or isinstance(logger, logging.Logger)):
+            raise TypeError('Invalid argument type: logger must be a logging.Logger or a string.')
+
+        self.callback = callback
+        self.logger = logger
+        self.level = level
+        self.timings = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        global _ACTIVE
+        with _ACTIVE_LOCK:
+            _ACTIVE = _ACTIVE + (self,)
+        return self
+
+    def __exit__(self, *exc_info):
+        global _ACTIVE
+        with _ACTIVE_LOCK:
+            _ACTIVE = tuple(metrics for metrics in _ACTIVE if metrics is not self)
+
+    def _time(self, name, seconds):
+        with self._lock:
+            self.timings[name] += seconds
+            self.calls[name] += 1
+        self._emit('time', name, seconds)
+
+    def _count(self, name, n):
+        with self._lock:
+            self.counters[name] += n
+        self._emit('count', name, n)
+
+    def _emit(self, kind, name, value):
+        if self.callback is not None:
+            self.callback(kind, name, value)
+        if self.logger is not None:
+            self.logger.log(self.level, 'pytweet %s %s: %s', kind, name, value)
+
+    def summary(self):
+        """
+        Returns the collected timings.
+
+        Returns:
+        --------
+        summary : dataframe
+            A dataframe indexed by stage with columns 'calls' and 'seconds',
+            slowest stage first. Stages can nest: 'text_cleaning' runs
+            inside 'words.vectorize', for instance.
+        """
+        with self._lock:
+            summary = pd.DataFrame({'calls': pd.Series(self.calls, dtype='int64'),
+                                    'seconds': pd.Series(self.timings, dtype='float64')})
+        return summary.sort_values('seconds', ascending=False)
+
+
+class _Stage:
+    """Times a block of code for every active Metrics."""
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        for metrics in _ACTIVE:
+            metrics._time(self.name, seconds)
+
+
+def enabled():
+    """Returns whether any Metrics is collecting."""
+    return bool(_ACTIVE)
+
+
+def stage(name):
+    """
+    Returns a context manager timing a stage, or one doing nothing
+    when no Metrics is collecting.
+    """
+    if not _ACTIVE:
+        return _DISABLED
+    return _Stage(name)
+
+
+def count(name, n=1):
+    """Adds n to a counter of every active Metrics."""
+    for metrics in _ACTIVE:
+        metrics._count(name, n)
+
+
+def timed(func, name):
+    """Wraps a function so that each of its calls is timed as a stage."""
+    def wrapper(*args, **kwargs):
+        with stage(name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+@contextlib.contextmanager
+def profile(path=None, sort='cumulative', limit=30, stream=None):
+    """
+    Runs the enclosed code under cProfile, then prints the most expensive
+    functions or saves the full profile.
+
+        with profile():
+            tweet_sentiment_analysis(tweets)
+
+    Parameters:
+    -----------
+    path : string
+        Optional: A file to save the profile to, for pstats or snakeviz,
+        instead of printing it.
+    sort : string
+        Optional: The pstats sort key, 'cumulative' by default.
+    limit : int
+        Optional: The number of functions printed, 30 by default.
+    stream : file
+        Optional: Where the profile is printed, standard output by default.
+
+    Returns:
+    --------
+    profiler : cProfile.Profile
+        The profiler, yielded to the with block.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path is not None:
+            profiler.dump_stats(path)
+        else:
+            pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
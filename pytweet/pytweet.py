@@ -1,23 +1,254 @@
 # authors: Huanhuan Li, Yuanzhe(Marco) Ma, Jared Splinter, Yuan Xiong
 # date: Feb-Mar 2021
 
-import tweepy
 import os
+import bisect
+import functools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import pandas as pd
-import altair as alt
 import re
-from textblob import TextBlob
 import numpy as np
-import nltk
 import string
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-from nltk.stem import SnowballStemmer
-from sklearn.feature_extraction.text import CountVectorizer
-nltk.download('stopwords')
-nltk.downloader.download('vader_lexicon')
+import json
+from collections import Counter
+from itertools import chain
+from pytweet.scheduler import RateLimiter, RetryPolicy
+from pytweet.store import TweetStore, FetchCheckpoint
+from pytweet.cache import TweetCache
+from pytweet.sentiment_cache import SentimentCache
+from pytweet.dedup import duplicate_groups
+from pytweet.rollup import TimelineRollup
+from pytweet.sketch import HeavyHitters
+from pytweet import metrics
 
+# tweepy, altair, textblob, nltk and scikit-learn take seconds to import, so
+# they are only imported inside the functions that need them. The NLTK data
+# they rely on is checked, and downloaded if missing, on first use as well,
+# see ensure_nltk_resources.
+_NLTK_RESOURCES = {'stopwords': 'corpora/stopwords', 'vader_lexicon': 'sentiment/vader_lexicon.zip'}
+_NLTK_READY = False
 
-def get_tweets(handle, n_tweets=-1, include_replies=False, verbose=True):
+# columns added by tweet_sentiment_analysis, in output order
+_SENTIMENT_COLUMNS = ['polarity', 'subjectivity', 'sentiment', 'neg', 'neu', 'pos', 'compound']
+_SCORE_COLUMNS = ['polarity', 'subjectivity', 'neg', 'neu', 'pos', 'compound']
+# the sentiment labels, in the order of their categorical codes
+_SENTIMENTS = ['negative', 'neutral', 'positive']
+_TEXTBLOB = None
+_VADER = None
+_COMPILED_VADER = None
+_CLEANER = None
+
+# Starting a process pool and loading the lexicons in every worker takes up
+# to half a second, about what scoring a thousand tweets costs on one core.
+# Below this many tweets n_jobs is ignored and the tweets are scored serially.
+_PARALLEL_MIN_ROWS = 5000
+
+
+def ensure_nltk_resources(data_dir=None, download=True):
+    """
+    Makes sure the NLTK data used by pytweet, the English stopwords and
+    the VADER lexicon, is available, downloading whatever is missing.
+    Only the first successful call does any work, and nothing is
+    downloaded when the data is already installed.
+
+    pytweet calls this itself before its first sentiment analysis or text
+    cleaning, so it only needs to be called to use another data directory,
+    or to fail early. NLTK also searches the directories in the NLTK_DATA
+    environment variable.
+
+    Parameters:
+    -----------
+    data_dir : string
+        Optional: A directory to search for the data first, and to
+        download it to. By default NLTK's standard locations are used.
+    download : boolean
+        Optional: Whether to download missing data, True by default.
+        With download=False missing data raises a LookupError instead.
+    """
+    global _NLTK_READY
+    if _NLTK_READY and data_dir is None:
+        return
+
+    import nltk
+    if data_dir is not None:
+        data_dir = os.fspath(data_dir)
+        if data_dir not in nltk.data.path:
+            nltk.data.path.insert(0, data_dir)
+
+    for name, path in _NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            if not (download and nltk.download(name, download_dir=data_dir, quiet=True)):
+                raise LookupError(f"The NLTK resource '{name}' is missing. Install it with "
+                                  f"nltk.download('{name}') or point data_dir at a directory holding it.")
+    _NLTK_READY = True
+
+
+def _twitter_api():
+    """Builds an authenticated tweepy API client from the credentials stored as environment variables."""
+    import tweepy
+
+    # Twitter API credentials
+    try:
+        consumer_key = os.environ.get('TWITTER_CONS_KEY')
+        consumer_secret = os.environ.get('TWITTER_CONS_SEC')
+        access_key = os.environ.get('TWITTER_ACCS_KEY')
+        access_secret = os.environ.get('TWITTER_ACCS_SEC')
+    except KeyError:
+        raise Exception('Need authentication tokens! Please make sure you have those as environment variables.')
+
+    auth = tweepy.OAuthHandler(consumer_key, consumer_secret)
+    auth.set_access_token(access_key, access_secret)
+    return tweepy.API(auth)
+
+
+def _check_fetch_args(handle, n_tweets, include_replies, verbose):
+    """Checks the arguments shared by the tweet fetching functions."""
+    if not(isinstance(handle, str)):
+        raise TypeError('Invalid argument type: handle must be a string.')
+    elif not(isinstance(n_tweets, int) and n_tweets >= -1):
+        raise TypeError('Invalid argument: input n_tweets must be >= 0.')
+    elif not(isinstance(include_replies, bool)):
+        raise TypeError('Invalid argument type: include_replies must be boolean.')
+    elif not(isinstance(verbose, bool)):
+        raise TypeError('Invalid argument type: verbose must be boolean.')
+
+
+def _check_retry(retry):
+    """Checks the retry argument of the fetching functions and returns the policy to use."""
+    if retry is None:
+        return RetryPolicy()
+    elif not isinstance(retry, RetryPolicy):
+        raise TypeError('Invalid argument type: retry must be a RetryPolicy.')
+    return retry
+
+
+def _check_checkpoint(checkpoint):
+    """Checks the checkpoint argument of the fetching functions and opens it if it is a path."""
+    if checkpoint is None or isinstance(checkpoint, FetchCheckpoint):
+        return checkpoint
+    elif not isinstance(checkpoint, (str, os.PathLike)):
+        raise TypeError('Invalid argument type: checkpoint must be a FetchCheckpoint or a path.')
+    return FetchCheckpoint(checkpoint)
+
+
+def iter_tweets(handle, n_tweets=-1, include_replies=False, verbose=True, api=None, retry=None, checkpoint=None):
+    """
+    Retreives the tweets of a user page by page, yielding each page
+    of up to 200 tweets as soon as it is downloaded. Only the tweet
+    id, sent time and text are kept, so memory stays flat no matter
+    how long the timeline is.
+
+    Parameters:
+    -----------
+    handle : string
+        The Twitter handle of the user, aka the username.
+    n_tweets : number
+        The total number of tweets to retreive. Must be positive.
+        By default, n_tweets=-1 retrieves all tweets.
+    include_replies : boolean
+        Whether or not to downloaded the users replies
+        in addition to original tweets/retweets.
+    verbose : boolean
+        Whether or not to print out the progress during the fetch.
+    api : tweepy.API
+        Optional: The client used to call user_timeline. By default
+        one is authenticated from the environment variables.
+    retry : RetryPolicy
+        Optional: Which failed user_timeline calls are retried and after how
+        long. By default rate-limit errors wait for the window to reset, and
+        server and connection errors are retried 5 times with backoff.
+    checkpoint : FetchCheckpoint or string
+        Optional: Where the progress of the fetch is saved, or the directory
+        of it. A fetch interrupted by an error yields the pages it already
+        downloaded when started again with the same checkpoint, and only
+        downloads the rest.
+
+    Returns:
+    --------
+    pages : generator
+        A generator of dataframes with columns 'id', 'time' and 'tweet',
+        one per page, newest tweets first.
+    """
+    _check_fetch_args(handle, n_tweets, include_replies, verbose)
+    retry = _check_retry(retry)
+    checkpoint = _check_checkpoint(checkpoint)
+    if api is None:
+        api = _twitter_api()
+
+    return _iter_pages(api, handle, n_tweets, include_replies, verbose, retry=retry, checkpoint=checkpoint)
+
+
+def _iter_pages(api, handle, n_tweets, include_replies, verbose, rate_limiter=None, since_id=None,
+                retry=None, checkpoint=None):
+    """
+    Pages backward through a user's timeline, see iter_tweets.
+    With since_id, only the tweets newer than that id are downloaded.
+    """
+    if retry is None:
+        retry = RetryPolicy()
+
+    def user_timeline(**params):
+        # every attempt, retries included, counts against the rate limit
+        if rate_limiter is not None:
+            with metrics.stage('fetch.rate_limit'):
+                rate_limiter.acquire()
+        with metrics.stage('fetch.user_timeline'):
+            page = api.user_timeline(**params)
+        metrics.count('api_calls')
+        return page
+
+    n_downloaded = 0
+    max_id = None
+    if checkpoint is not None:
+        fetch = {'handle': TweetStore.key(handle), 'n_tweets': n_tweets,
+                 'include_replies': include_replies, 'since_id': since_id}
+        max_id, n_downloaded, pages = checkpoint.resume(fetch)
+        if pages and verbose:
+            print(f"Resuming from {n_downloaded} tweets downloaded")
+        yield from pages
+
+    while n_tweets == -1 or n_downloaded < n_tweets:
+        params = {'screen_name': handle,
+                  'exclude_replies': not(include_replies),
+                  'count': 200}  # max count per request is 200
+        if max_id is not None:
+            params['max_id'] = max_id
+        if since_id is not None:
+            params['since_id'] = since_id
+        latest = retry.call(user_timeline, **params)
+
+        # an empty page means the whole timeline has been downloaded
+        if len(latest) == 0:
+            break
+        if n_tweets != -1:
+            latest = latest[:n_tweets - n_downloaded]
+        metrics.count('pages')
+        metrics.count('tweets_downloaded', len(latest))
+
+        n_downloaded += len(latest)
+        # max_id is inclusive, so continue just below the oldest tweet
+        max_id = latest[-1].id - 1
+
+        if verbose:
+            print(f"{n_downloaded} tweets downloaded")
+
+        with metrics.stage('fetch.parse'):
+            page = pd.DataFrame({'id': [tweet.id for tweet in latest],
+                                 'time': [tweet.created_at for tweet in latest],
+                                 'tweet': [tweet.text for tweet in latest]})
+        if checkpoint is not None:
+            checkpoint.save(fetch, page, max_id, n_downloaded)
+        yield page
+
+    # the fetch is complete, there is nothing left to resume
+    if checkpoint is not None:
+        checkpoint.clear()
+
+
+def get_tweets(handle, n_tweets=-1, include_replies=False, verbose=True, stream=False, api=None, cache=None,
+               retry=None, checkpoint=None, compact=False):
     """
     Retreives all tweets of a user given their Twitter handle
     (i.e. @elonmusk) through Twitter API. User must have API
@@ -38,6 +269,28 @@ def get_tweets(handle, n_tweets=-1, include_replies=False, verbose=True):
         in addition to original tweets/retweets.
     verbose : boolean
         Whether or not to print out the progress during the fetch.
+    stream : boolean
+        Optional: Whether to return a generator of pages instead of
+        a single dataframe, see iter_tweets. False by default.
+    api : tweepy.API
+        Optional: The client used to call user_timeline. By default
+        one is authenticated from the environment variables.
+    cache : TweetCache
+        Optional: A cache of downloaded timelines. Fresh cached tweets are
+        returned without calling the API, and downloads are added to it.
+        The cache is not used when stream=True.
+    retry : RetryPolicy
+        Optional: Which failed user_timeline calls are retried and after how
+        long. By default rate-limit errors wait for the window to reset, and
+        server and connection errors are retried 5 times with backoff.
+    checkpoint : FetchCheckpoint or string
+        Optional: Where the progress of the fetch is saved, or the directory
+        of it, so that a fetch interrupted by an error resumes from the last
+        page downloaded when called again with the same checkpoint.
+    compact : boolean or string
+        Optional: Whether to return the tweets indexed by their int64 id,
+        see compact_tweets. compact='arrow' also stores the text as
+        Arrow-backed strings, with pandas 1.3 or newer. False by default.
 
     Returns:
     --------
@@ -46,66 +299,340 @@ def get_tweets(handle, n_tweets=-1, include_replies=False, verbose=True):
     """
 
     # check argument validity
-    if not(isinstance(handle, str)):
-        raise TypeError('Invalid argument type: handle must be a string.')
-    elif not(isinstance(n_tweets, int) and n_tweets >= -1):
-        raise TypeError('Invalid argument: input n_tweets must be >= 0.')
-    elif not(isinstance(include_replies, bool)):
-        raise TypeError('Invalid argument type: include_replies must be boolean.')
-    elif not(isinstance(verbose, bool)):
-        raise TypeError('Invalid argument type: verbose must be boolean.')
+    if not(isinstance(stream, bool)):
+        raise TypeError('Invalid argument type: stream must be boolean.')
+    elif not(cache is None or isinstance(cache, TweetCache)):
+        raise TypeError('Invalid argument type: cache must be a TweetCache.')
+    _check_compact(compact)
+    _check_fetch_args(handle, n_tweets, include_replies, verbose)
+    retry = _check_retry(retry)
+    checkpoint = _check_checkpoint(checkpoint)
 
-    # Twitter API credentials
-    try:
-        consumer_key = os.environ.get('TWITTER_CONS_KEY')
-        consumer_secret = os.environ.get('TWITTER_CONS_SEC')
-        access_key = os.environ.get('TWITTER_ACCS_KEY')
-        access_secret = os.environ.get('TWITTER_ACCS_SEC')
-    except KeyError:
-        raise Exception('Need authentication tokens! Please make sure you have those as environment variables.')
+    if stream:
+        return iter_tweets(handle, n_tweets=n_tweets, include_replies=include_replies,
+                           verbose=verbose, api=api, retry=retry, checkpoint=checkpoint)
 
-    auth = tweepy.OAuthHandler(consumer_key, consumer_secret)
-    auth.set_access_token(access_key, access_secret)
-    api = tweepy.API(auth)
+    cache_key = TweetStore.key(handle, include_replies)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            output, metadata = cached
+            # a complete timeline answers any request, a partial one only smaller requests,
+            # and timelines cached without their ids cannot be indexed by id
+            if (metadata.get('complete') or (n_tweets != -1 and len(output) >= n_tweets)) \
+                    and (not compact or 'id' in output):
+                metrics.count('tweet_cache.hits')
+                return _format_tweets(output if n_tweets == -1 else output[:n_tweets], compact)
+        metrics.count('tweet_cache.misses')
 
-    # get first batch of tweets
-    tweets = []
-    latest = api.user_timeline(screen_name=handle,
-                               exclude_replies=not(include_replies),
-                               count=200)  # max count per request is 200
+    pages = iter_tweets(handle, n_tweets=n_tweets, include_replies=include_replies,
+                        verbose=verbose, api=api, retry=retry, checkpoint=checkpoint)
 
-    tweets.extend(latest)
+    # format output dataframe
+    output = pd.DataFrame(columns=['id', 'time', 'tweet'])
+    pages = list(pages)
+    if pages:
+        output = pd.concat(pages, ignore_index=True)
 
-    # request recursively to get all tweets/n_tweets
-    oldest = latest[-1].id
-    while(len(latest) > 0 and len(tweets) < n_tweets):
-        latest = api.user_timeline(screen_name=handle,
-                                   exclude_replies=not(include_replies),
-                                   count=200, max_id=oldest)
-        tweets.extend(latest)
-        oldest = latest[-1].id
+    if cache is not None:
+        cache.put(cache_key, output, {'complete': n_tweets == -1 or len(output) < n_tweets})
 
-        if verbose:
-            print(f"{len(tweets)} tweets downloaded")
+    return _format_tweets(output, compact)
+
+
+def _format_tweets(tweets, compact):
+    """Shapes downloaded tweets, with columns 'id', 'time' and 'tweet', as get_tweets returns them."""
+    if compact:
+        return compact_tweets(tweets, arrow_strings=compact == 'arrow')
+    return tweets[['time', 'tweet']]
+
+
+def update_tweets(handle, store, include_replies=False, verbose=True, api=None, retry=None):
+    """
+    Brings a locally stored timeline up to date. Only the tweets newer
+    than the newest one already in the store are downloaded (through
+    user_timeline's since_id), so a refresh costs a single API call when
+    nothing new was posted. The first call for a handle downloads the
+    whole timeline. Timelines with and without replies are stored and
+    refreshed separately.
+
+    Parameters:
+    -----------
+    handle : string
+        The Twitter handle of the user, aka the username.
+    store : TweetStore or string
+        The store holding the timelines, or the directory of one.
+    include_replies : boolean
+        Whether or not to downloaded the users replies
+        in addition to original tweets/retweets.
+    verbose : boolean
+        Whether or not to print out the progress during the fetch.
+    api : tweepy.API
+        Optional: The client used to call user_timeline. By default
+        one is authenticated from the environment variables.
+    retry : RetryPolicy
+        Optional: Which failed user_timeline calls are retried and after how
+        long. By default rate-limit errors wait for the window to reset, and
+        server and connection errors are retried 5 times with backoff.
+
+    Returns:
+    --------
+    tweets : dataframe
+        A dataframe of all the stored tweets of the user, and the sent times.
+    """
+
+    # check argument validity
+    _check_fetch_args(handle, -1, include_replies, verbose)
+    retry = _check_retry(retry)
+    if not isinstance(store, TweetStore):
+        store = TweetStore(store)
+    if api is None:
+        api = _twitter_api()
+
+    pages = list(_iter_pages(api, handle, -1, include_replies, verbose,
+                             since_id=store.since_id(handle, include_replies), retry=retry))
+    if pages:
+        store.append(handle, pd.concat(pages, ignore_index=True), include_replies)
+
+    return store.load(handle, include_replies)[['time', 'tweet']]
 
-    # format output dataframe
-    output = pd.DataFrame([[tweet.created_at, tweet.text] for tweet in tweets],
-                          columns=['time', 'tweet'])
-    if n_tweets != -1:
-        output = output[:n_tweets]
+
+def get_tweets_many(handles, n_tweets=-1, include_replies=False, verbose=False,
+                    max_workers=8, rate_limiter=None, api=None, retry=None):
+    """
+    Retreives the tweets of several users concurrently. All handles share
+    one authenticated client, and a rate limiter spreads their
+    user_timeline calls over Twitter's 15-minute rate-limit windows.
+
+    Parameters:
+    -----------
+    handles : list
+        The Twitter handles of the users.
+    n_tweets : number
+        The number of tweets to retreive per user. Must be positive.
+        By default, n_tweets=-1 retrieves all tweets.
+    include_replies : boolean
+        Whether or not to downloaded the users replies
+        in addition to original tweets/retweets.
+    verbose : boolean
+        Whether or not to print out the progress during the fetch.
+    max_workers : int
+        Optional: The number of handles fetched at the same time, 8 by default.
+    rate_limiter : RateLimiter
+        Optional: The scheduler for the user_timeline calls. By default
+        900 calls per 15 minutes, the limit for a user-authenticated client.
+    api : tweepy.API
+        Optional: The client used to call user_timeline. By default
+        one is authenticated from the environment variables.
+    retry : RetryPolicy
+        Optional: Which failed user_timeline calls are retried and after how
+        long. By default rate-limit errors wait for the window to reset, and
+        server and connection errors are retried 5 times with backoff.
+
+    Returns:
+    --------
+    tweets : dataframe
+        A dataframe of the users' tweets with columns 'handle', 'time'
+        and 'tweet', grouped by handle in the order they were given.
+    """
+
+    # check argument validity
+    if not (isinstance(handles, (list, tuple)) and all(isinstance(handle, str) for handle in handles)):
+        raise TypeError('Invalid argument type: handles must be a list of strings.')
+    elif not (isinstance(max_workers, int) and max_workers > 0):
+        raise TypeError('Invalid argument: max_workers must be a positive integer.')
+    for handle in handles:
+        _check_fetch_args(handle, n_tweets, include_replies, verbose)
+    retry = _check_retry(retry)
+
+    if api is None:
+        api = _twitter_api()
+    if rate_limiter is None:
+        rate_limiter = RateLimiter()
+
+    def fetch(handle):
+        pages = _iter_pages(api, handle, n_tweets, include_replies, verbose, rate_limiter, retry=retry)
+        return [page[['time', 'tweet']] for page in pages]
+
+    output = pd.DataFrame(columns=['handle', 'time', 'tweet'])
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # map returns the results in the order of handles
+        results = list(executor.map(fetch, handles))
+
+    pages = [page.assign(handle=handle) for handle, handle_pages in zip(handles, results)
+             for page in handle_pages]
+    if pages:
+        output = pd.concat(pages, ignore_index=True)[['handle', 'time', 'tweet']]
 
     return output
 
 
+def _check_compact(compact):
+    """Checks the compact argument of the functions returning tweets."""
+    if not (isinstance(compact, bool) or compact == 'arrow'):
+        raise TypeError("Invalid argument: compact must be True, False or 'arrow'.")
+    elif compact == 'arrow':
+        _check_arrow_strings()
+
+
+def _check_arrow_strings():
+    """Checks that this pandas has the 'string[pyarrow]' dtype, added in pandas 1.3."""
+    version = tuple(int(part) for part in re.findall(r'\d+', pd.__version__)[:2])
+    if version < (1, 3):
+        raise ValueError(f"Invalid argument: Arrow-backed strings need pandas 1.3 or newer, "
+                         f"not {pd.__version__}. Use compact=True instead.")
+
+
+def compact_tweets(tweets, arrow_strings=False):
+    """
+    Converts a dataframe of tweets, from get_tweets or
+    tweet_sentiment_analysis, to compact column types:
+
+    - an 'id' column becomes the int64 index,
+    - 'time' is stored as datetime64,
+    - 'sentiment' is a categorical of 'negative', 'neutral' and 'positive',
+    - the score columns are float32, which is more precision than
+      TextBlob and VADER give, as VADER rounds to 3 or 4 decimals,
+    - 'tweet' is stored as Arrow-backed strings with arrow_strings=True,
+      which needs pandas 1.3 or newer.
+
+    On 1M tweets of 66 characters on average, with an id and all the
+    sentiment columns, DataFrame.memory_usage(deep=True) goes from 257 MB
+    to 169 MB, and to 111 MB with arrow_strings=True. The scores go from
+    48 MB to 24 MB, and the sentiment from 8 MB of pointers (65 MB when
+    each label string is counted) to 1 MB. Most of what remains is the text.
+
+    Parameters:
+    -----------
+    tweets : dataframe
+        A dataframe of tweets. Columns that are missing are skipped.
+    arrow_strings : boolean
+        Optional: Whether to store the tweet text as Arrow-backed strings,
+        False by default.
+
+    Returns:
+    --------
+    tweets : dataframe
+        A new dataframe with compact column types.
+    """
+    if not isinstance(tweets, pd.DataFrame):
+        raise TypeError("Invalid argument type: input must be a dataframe.")
+
+    types = {col: np.float32 for col in _SCORE_COLUMNS if col in tweets}
+    if 'sentiment' in tweets:
+        types['sentiment'] = pd.CategoricalDtype(_SENTIMENTS)
+    if arrow_strings:
+        _check_arrow_strings()
+    if arrow_strings and 'tweet' in tweets:
+        types['tweet'] = 'string[pyarrow]'
+    compact = tweets.astype(types)
+    if 'time' in compact and not pd.api.types.is_datetime64_any_dtype(compact['time']):
+        compact['time'] = pd.to_datetime(compact['time'])
+    if 'id' in compact:
+        compact = compact.set_index(compact.pop('id').astype(np.int64))
+    return compact
+
+
+def _check_dedup(dedup):
+    """Checks the dedup argument of the analysis functions."""
+    if dedup not in (False, True, 'exact', 'near'):
+        raise TypeError("Invalid argument: dedup must be a boolean, 'exact' or 'near'.")
+
+
+def collapse_duplicates(tweets, text_col='tweet', near_duplicates=False, threshold=0.8):
+    """
+    Collapses the copies of each tweet, retweets and copy-pasted texts,
+    into one row with a 'multiplicity' column counting them, see
+    pytweet.dedup.duplicate_groups. Texts are compared once casefolded,
+    without 'RT @user:' prefixes, links or extra whitespace and, with
+    near_duplicates=True, texts whose 5-character shingles are at least
+    threshold similar are collapsed too, using MinHash and LSH.
+
+    hashtag_counts, plot_hashtags, visualize_sentiment and WordFrequencyIndex
+    weight each row by its multiplicity, so they give the same counts on the
+    collapsed tweets as on all of them, and tweet_sentiment_analysis keeps
+    the column.
+
+    Parameters:
+    -----------
+    tweets : dataframe
+        A dataframe of tweets. A 'multiplicity' column, from an earlier
+        collapse, is summed.
+    text_col : string
+        Optional: The column name of tweet text in dataframe, 'tweet' by default.
+    near_duplicates : boolean
+        Optional: Whether to collapse near duplicates too, False by default.
+    threshold : float
+        Optional: The similarity above which near duplicates are collapsed, 0.8 by default.
+
+    Returns:
+    --------
+    collapsed : dataframe
+        The first row of each group of copies, in their original order,
+        with a 'multiplicity' column.
+    """
+    if not isinstance(tweets, pd.DataFrame):
+        raise TypeError("Invalid argument type: input must be a dataframe.")
+    elif not isinstance(text_col, str):
+        raise TypeError("Invalid argument type: text_col must be a string.")
+    elif not isinstance(near_duplicates, bool):
+        raise TypeError("Invalid argument type: near_duplicates must be boolean.")
+
+    with metrics.stage('dedup.group'):
+        groups, first = duplicate_groups(tweets[text_col].to_numpy(), near_duplicates, threshold)
+    weights = tweets['multiplicity'].to_numpy() if 'multiplicity' in tweets else None
+    metrics.count('duplicates', len(tweets) - len(first))
+    return tweets.iloc[first].assign(multiplicity=np.bincount(groups, weights, minlength=len(first)).astype(np.int64))
+
+
+def timeline_counts(df, time_col):
+    """
+    Counts the tweets sent in each hour of the day.
+
+    Parameters:
+    -----------
+    df : dataframe or TimelineRollup
+        A dataframe of the user's tweets, and the sent times, or a rollup
+        of them, whose hourly buckets are counted in its time zone.
+    time_col : string
+        The column name of post time in dataframe.
+
+    Returns:
+    --------
+    counts : dataframe
+        A dataframe with 24 rows, one per hour of day, and columns
+        'hour' and 'count'. Hours without tweets have a count of 0.
+    """
+
+    # Checking for valid inputs
+    if not isinstance(df, (pd.DataFrame, TimelineRollup)):
+        raise Exception("The value of the argument 'df' must be type of dataframe.")
+    if type(time_col) != str:
+        raise Exception("The value of the argument 'time_col' must be type of string")
+
+    # extract hour from time column and count the tweets per hour
+    with metrics.stage('timeline.count'):
+        if isinstance(df, TimelineRollup):
+            hours = df.buckets('hour')
+            counts = np.bincount(hours.index.hour, hours['count'], minlength=24).astype(np.int64)
+        else:
+            hours = pd.to_datetime(df[time_col]).dt.hour
+            counts = np.bincount(hours.dropna().astype(int), minlength=24)
+    return pd.DataFrame({'hour': np.arange(24), 'count': counts})
+
+
 def plot_timeline(df, time_col):
     """
     Analysis what time of day the tweets occurs and plot the
     counts of tweets versus hours.
 
+    The tweets are counted per hour before charting, so the chart
+    only holds 24 rows however many tweets there are.
+
     Parameters:
     -----------
-    tweets : dataframe
-        A dataframe of the user's tweets, and the sent times.
+    tweets : dataframe or TimelineRollup
+        A dataframe of the user's tweets, and the sent times, or a rollup of them.
     time: string
         The column name of post time in dataframe.
 
@@ -115,20 +642,63 @@ def plot_timeline(df, time_col):
         A chart plotting the counts of tweets versus hours.
     """
 
+    import altair as alt
+    hour_counts = timeline_counts(df, time_col)
+
+    # timeline plot
+    with metrics.stage('chart.timeline'):
+        timeline_plot = alt.Chart(hour_counts).mark_line().encode(
+            x=alt.X('hour', title="Hour of day"),
+            y=alt.Y('count', title="Counts of Tweets")).properties(title='Tweet Timeline Analysis')
+    return timeline_plot
+
+
+def hashtag_counts(df, text_col, top_n=15):
+    """
+    Counts how often each hashtag is used in the tweets.
+
+    Parameters:
+    -----------
+    df : dataframe or TopTermsSketch
+        A dataframe of the user's tweets. The hashtags of each row are
+        counted 'multiplicity' times when it has that column. With a
+        sketch, its approximate counts are returned.
+    text_col : string
+        The column name of tweet text in dataframe.
+    top_n : int
+        Optional: The number of most used hashtags to return, 15 by default.
+        Hashtags tied with the last one are returned too. top_n=None
+        returns every hashtag.
+
+    Returns:
+    --------
+    counts : dataframe
+        A dataframe with columns 'Keyword' and 'Count', most used hashtags first.
+    """
     # Checking for valid inputs
-    if not isinstance(df, pd.DataFrame):
+    if not isinstance(df, (pd.DataFrame, TopTermsSketch)):
         raise Exception("The value of the argument 'df' must be type of dataframe.")
-    if type(time_col) != str:
-        raise Exception("The value of the argument 'time_col' must be type of string")
+    if type(text_col) != str:
+        raise Exception("The value of the argument 'text_col' must be type of string")
+    if not (top_n is None or (isinstance(top_n, int) and top_n > 0)):
+        raise Exception("The value of the argument 'top_n' must be a positive integer or None")
+    if isinstance(df, TopTermsSketch):
+        return df.hashtag_counts(top_n)
 
-    # extract hour from time column
-    df['hour'] = df['time'].apply(lambda x: x.hour)
+    # extract and count hashtags, tweets without any explode to NaN, which is not counted
+    with metrics.stage('hashtags.count'):
+        hashtags = df[text_col].str.findall(r'[#]\w+')
+        if 'multiplicity' in df:
+            # rows collapsed by collapse_duplicates count once per copy
+            weighted = pd.DataFrame({'hashtag': hashtags.to_numpy(), 'n': df['multiplicity'].to_numpy()})
+            weighted = weighted.explode('hashtag').dropna(subset=['hashtag'])
+            counts = weighted.groupby('hashtag', sort=False)['n'].sum().sort_values(ascending=False, kind='stable')
+        else:
+            counts = hashtags.explode().value_counts()
+        if top_n is not None:
+            counts = counts.nlargest(top_n, keep='all')
 
-    # timeline plot
-    timeline_plot = alt.Chart(df).mark_line().encode(
-        x=alt.X('hour', title="Hour of day"),
-        y=alt.Y('count()', title="Counts of Tweets")).properties(title='Tweet Timeline Analysis')
-    return timeline_plot
+    return pd.DataFrame({'Keyword': counts.index.astype(object), 'Count': counts.to_numpy()})
 
 
 def plot_hashtags(df, text_col):
@@ -138,8 +708,8 @@ def plot_hashtags(df, text_col):
 
     Parameters:
     -----------
-    tweets : dataframe
-        A dataframe of the user's tweets.
+    tweets : dataframe or TopTermsSketch
+        A dataframe of the user's tweets, or a sketch of their hashtags.
 
     tweet: string
         The column name of tweet text in dataframe.
@@ -149,51 +719,347 @@ def plot_hashtags(df, text_col):
     plot: chart
         A chart plotting analysis result of most frequent used hashtag words.
     """
-    # Checking for valid inputs
-    if not isinstance(df, pd.DataFrame):
-        raise Exception("The value of the argument 'df' must be type of dataframe.")
-    if type(text_col) != str:
-        raise Exception("The value of the argument 'text_col' must be type of string")
+    import altair as alt
+    # only the top 15 hashtags, and those tied with them, are ever shown
+    hashtag_df = hashtag_counts(df, text_col, top_n=15)
 
-    # extract hashtags from text
-    df['hashtags'] = df[text_col].apply(lambda x: re.findall(r'[#]\w+', x))
+    # hashtag frequency plot
+    with metrics.stage('chart.hashtags'):
+        hashtag_plot = alt.Chart(hashtag_df).mark_bar().encode(
+            x=alt.X('Count', title="Hashtags"),
+            y=alt.Y('Keyword', title="Count of Hashtags", sort='-x')
+        ).properties(
+            title='Top 15 Hashtag Words'
+        ).transform_window(
+            rank='rank(Count)',
+            sort=[alt.SortField('Count', order='descending')]
+        ).transform_filter((alt.datum.rank <= 15))
 
-    # count hashtags
-    hashtag_dict = {}
-    for hashtags in df["hashtags"]:
-        for word in hashtags:
-            hashtag_dict[word] = hashtag_dict.get(word, 0) + 1
+    return hashtag_plot
 
-    hashtag_df = pd.DataFrame(columns=['Keyword', 'Count'])
-    for key, value in hashtag_dict.items():
-        key_value = [[key, value]]
-        hashtag_df = hashtag_df.append(pd.DataFrame(key_value, columns=['Keyword', 'Count']),
-                                       ignore_index=True)
 
-    # hashtag frequency plot
-    hashtag_plot = alt.Chart(hashtag_df).mark_bar().encode(
-        x=alt.X('Count', title="Hashtags"),
-        y=alt.Y('Keyword', title="Count of Hashtags", sort='-x')
-    ).properties(
-        title='Top 15 Hashtag Words'
-    ).transform_window(
-        rank='rank(Count)',
-        sort=[alt.SortField('Count', order='descending')]
-    ).transform_filter((alt.datum.rank <= 15))
+def _textblob_analyzer():
+    """Returns TextBlob's pattern analyzer, loading its lexicon only on first use."""
+    global _TEXTBLOB
+    if _TEXTBLOB is None:
+        from textblob.en.sentiments import PatternAnalyzer
+        _TEXTBLOB = PatternAnalyzer()
+    return _TEXTBLOB
 
-    return hashtag_plot
 
+def _vader_analyzer():
+    """Returns NLTK's VADER analyzer, loading its lexicon only on first use."""
+    global _VADER
+    if _VADER is None:
+        ensure_nltk_resources()
+        from nltk.sentiment.vader import SentimentIntensityAnalyzer
+        _VADER = SentimentIntensityAnalyzer()
+    return _VADER
 
-def tweet_sentiment_analysis(tweets):
+
+class Scorer:
+    """
+    A sentiment analyzer that tweet_sentiment_analysis can run. Scorers are
+    made available by name with register_scorer, and subclasses set:
+
+    - name: the name the scorer is selected by,
+    - columns: the names of the score columns it computes,
+    - version: a string that changes whenever its scores could change,
+      which, with the name and columns, keys its scores in a SentimentCache,
+
+    and implement score, and load if they have something to set up once
+    per process. With n_jobs > 1 scorers are sent to worker processes, so
+    they must be picklable.
+    """
+
+    name = None
+    columns = ()
+    version = '1'
+
+    def load(self):
+        """Loads what the scorer needs, once per process, before it scores anything."""
+
+    def score(self, texts):
+        """
+        Scores a chunk of tweets.
+
+        Parameters:
+        -----------
+        texts : sequence
+            The tweet texts to score.
+
+        Returns:
+        --------
+        scores : np.array
+            A (len(texts), len(columns)) float array, in the order of columns.
+        """
+        raise NotImplementedError
+
+
+class TextBlobScorer(Scorer):
+    """TextBlob's pattern analyzer: the 'polarity' and 'subjectivity' of each tweet."""
+
+    name = 'textblob'
+    columns = ('polarity', 'subjectivity')
+
+    @property
+    def version(self):
+        from importlib import metadata
+        return f"textblob-{metadata.version('textblob')}"
+
+    def load(self):
+        _textblob_analyzer()
+
+    def score(self, texts):
+        textblob = _textblob_analyzer()
+        scores = np.empty((len(texts), len(self.columns)))
+        for i, text in enumerate(texts):
+            scores[i] = textblob.analyze(text)
+        return scores
+
+
+class VaderScorer(Scorer):
+    """
+    NLTK's VADER analyzer: the 'neg', 'neu', 'pos' and 'compound' scores
+    of each tweet, from which its sentiment label is derived.
+    """
+
+    name = 'vader'
+    columns = ('neg', 'neu', 'pos', 'compound')
+
+    @property
+    def version(self):
+        from importlib import metadata
+        return f"nltk-vader-{metadata.version('nltk')}"
+
+    def load(self):
+        _vader_analyzer()
+
+    def score(self, texts):
+        vader = _vader_analyzer()
+        scores = np.empty((len(texts), len(self.columns)))
+        for i, text in enumerate(texts):
+            vader_score = vader.polarity_scores(text)
+            scores[i] = (vader_score['neg'], vader_score['neu'], vader_score['pos'], vader_score['compound'])
+        return scores
+
+
+class CompiledVaderScorer(VaderScorer):
+    """
+    VADER compiled into NumPy arrays, see pytweet.vader.CompiledVader: the
+    same 'neg', 'neu', 'pos' and 'compound' scores as NLTK's analyzer,
+    computed a batch of tweets at a time, 5 to 9 times as fast. It needs
+    NLTK 3.6 or newer, and its version names the NLTK release, so that
+    cached scores are never shared across releases.
+
+        tweet_sentiment_analysis(tweets, scorers=['textblob', 'compiled_vader'])
+    """
+
+    name = 'compiled_vader'
+
+    @property
+    def version(self):
+        return f"compiled-{super().version}"
+
+    def load(self):
+        _compiled_vader()
+
+    def score(self, texts):
+        return _compiled_vader().polarity_scores(texts)
+
+
+def _compiled_vader():
+    """Returns the compiled VADER analyzer, compiling it only on first use."""
+    global _COMPILED_VADER
+    if _COMPILED_VADER is None:
+        from pytweet.vader import CompiledVader
+        _COMPILED_VADER = CompiledVader(_vader_analyzer())
+    return _COMPILED_VADER
+
+
+# the scorers that can be selected by name, the built-in ones first
+_SCORERS = {}
+_DEFAULT_SCORERS = ('textblob', 'vader')
+
+
+def register_scorer(scorer):
+    """
+    Makes a scorer available to tweet_sentiment_analysis and
+    sentiment_stream by its name. A scorer registered under the name of
+    another one replaces it.
+
+    Parameters:
+    -----------
+    scorer : Scorer
+        The scorer.
+    """
+    if not isinstance(scorer, Scorer):
+        raise TypeError("Invalid argument type: scorer must be a Scorer.")
+    elif not (isinstance(scorer.name, str) and scorer.name):
+        raise ValueError("Invalid argument: a scorer must have a name.")
+    elif not (scorer.columns and all(isinstance(col, str) for col in scorer.columns)) \
+            or {'sentiment', 'tweet'} & set(scorer.columns):
+        raise ValueError("Invalid argument: a scorer must compute at least one column, "
+                         "and none named 'sentiment' or 'tweet'.")
+    _SCORERS[scorer.name] = scorer
+
+
+register_scorer(TextBlobScorer())
+register_scorer(VaderScorer())
+register_scorer(CompiledVaderScorer())
+
+
+def _resolve_scorers(scorers, columns):
+    """
+    Picks the scorers to run and the columns to return, see tweet_sentiment_analysis.
+
+    Returns:
+    --------
+    scorers : list
+        The Scorers to run, in order.
+    columns : list
+        The columns to return, in order.
+    """
+    if not (columns is None or (isinstance(columns, (list, tuple)) and len(columns) > 0
+                                and all(isinstance(col, str) for col in columns))):
+        raise TypeError("Invalid argument type: columns must be a list of column names.")
+
+    if scorers is None and columns is None:
+        scorers = _DEFAULT_SCORERS
+    elif scorers is None:
+        # the first registered scorer computing a column is the one run for it
+        scorers = []
+        for col in columns:
+            for needed in (['neg', 'pos'] if col == 'sentiment' else [col]):
+                name = next((name for name, scorer in _SCORERS.items() if needed in scorer.columns), None)
+                if name is None:
+                    raise ValueError(f"Invalid argument: no scorer computes the column '{needed}'.")
+                if name not in scorers:
+                    scorers.append(name)
+    elif not (isinstance(scorers, (list, tuple)) and len(scorers) > 0):
+        raise TypeError("Invalid argument type: scorers must be a list of scorer names or Scorers.")
+
+    resolved = []
+    for scorer in scorers:
+        if isinstance(scorer, str):
+            if scorer not in _SCORERS:
+                raise ValueError(f"Invalid argument: unknown scorer '{scorer}'.")
+            scorer = _SCORERS[scorer]
+        elif not isinstance(scorer, Scorer):
+            raise TypeError("Invalid argument type: scorers must be a list of scorer names or Scorers.")
+        resolved.append(scorer)
+
+    score_columns = [col for scorer in resolved for col in scorer.columns]
+    if len(set(score_columns)) < len(score_columns):
+        raise ValueError("Invalid argument: two of the scorers compute the same column.")
+    available = score_columns + (['sentiment'] if 'neg' in score_columns and 'pos' in score_columns else [])
+    if columns is None:
+        # the usual columns keep their usual order, and the others follow in scorer order
+        columns = [col for col in _SENTIMENT_COLUMNS if col in available] + \
+            [col for col in available if col not in _SENTIMENT_COLUMNS]
+    else:
+        missing = [col for col in columns if col not in available]
+        if missing:
+            raise ValueError(f"Invalid argument: the scorers do not compute the columns {missing}.")
+    return resolved, list(columns)
+
+
+def _init_worker(scorers):
+    """Process pool initializer: loads the scorers once per worker."""
+    for scorer in scorers:
+        scorer.load()
+
+
+def _score_chunk(texts, scorers):
+    """
+    Scores a chunk of tweets with each of the scorers.
+
+    Parameters:
+    -----------
+    texts : sequence
+        The tweet texts to score.
+    scorers : list
+        The Scorers to run.
+
+    Returns:
+    --------
+    scores : np.array
+        A float array with a row per tweet, and the columns of
+        each scorer in turn.
+    """
+    scores = np.empty((len(texts), sum(len(scorer.columns) for scorer in scorers)))
+    start = 0
+    # one scorer at a time, so that each can be timed as a whole
+    for scorer in scorers:
+        stop = start + len(scorer.columns)
+        with metrics.stage(f'sentiment.{scorer.name}'):
+            scores[:, start:stop] = scorer.score(texts)
+        start = stop
+    return scores
+
+
+def _sentiment_labels(neg, pos, compact=False):
+    """
+    Labels each tweet 'negative', 'positive' or 'neutral' from its VADER neg and
+    pos scores, as an object array, or as a categorical when compact is True.
+    """
+    codes = np.select([neg > pos, pos > neg], [0, 2], 1).astype(np.int8)
+    if compact:
+        return pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(_SENTIMENTS))
+    return np.array(_SENTIMENTS, dtype=object)[codes]
+
+
+def tweet_sentiment_analysis(tweets, chunk_size=10000, n_jobs=1, cache=None, compact=False,
+                             scorers=None, columns=None, dedup=False):
     """
     This function examine and categorize each tweet in the dataframe
      into either 'positive' or 'negative' or neutral' sentiments.
     The sentiment information together with the related scores are added to the original dataframe.
 
+    The analyzers are loaded once and the tweets are scored in chunks of
+    chunk_size rows; the score columns are then added all at once. With
+    n_jobs > 1 the chunks are scored in a pool of worker processes, each
+    loading its analyzers once. The pool is only used for dataframes of at
+    least 5000 tweets, below which starting it costs more than it saves.
+
+    By default TextBlob computes 'polarity' and 'subjectivity', and VADER
+    the other scores, from which the 'sentiment' label is derived. Only
+    the analyzers needed for the requested columns are run: columns=['sentiment']
+    skips TextBlob, roughly halving the time taken. Other analyzers can be
+    plugged in with register_scorer.
+
     Parameters:
     -----------
     tweets : dataframe
         A dataframe of the user's tweets, and the sent times.
+    chunk_size : int
+        Optional: The number of tweets scored per chunk, 10000 by default.
+    n_jobs : int
+        Optional: The number of worker processes, 1 by default.
+        n_jobs=-1 uses one worker per CPU.
+    cache : SentimentCache
+        Optional: A cache of scores. Texts found in it are not scored
+        again, and the scores of new texts are added to it.
+    compact : boolean or string
+        Optional: Whether to return compact column types, see compact_tweets:
+        a categorical 'sentiment' and float32 scores. compact='arrow' also
+        stores the text as Arrow-backed strings, with pandas 1.3 or newer.
+        False by default.
+    scorers : list
+        Optional: The names of the registered scorers to run, or Scorer
+        objects, 'textblob' and 'vader' by default. 'compiled_vader' gives
+        the same scores as 'vader', faster.
+    columns : list
+        Optional: The columns to add. By default all those of the scorers,
+        plus 'sentiment' when they compute 'neg' and 'pos'. Without scorers,
+        the scorers needed for these columns are run.
+    dedup : boolean or string
+        Optional: Whether to score only one copy of each tweet, see
+        collapse_duplicates, and give its scores to all the copies.
+        dedup=True or 'exact' groups the texts equal once normalized, and
+        'near' groups near duplicates too. Copies that only differ by case,
+        an 'RT @user:' prefix or a link can score slightly differently, so
+        False, the default, scores every text as it is.
 
     Returns:
     --------
@@ -203,37 +1069,425 @@ def tweet_sentiment_analysis(tweets):
 
     if not isinstance(tweets, pd.DataFrame):
         raise TypeError("Invalid argument type: input must be a dataframe.")
+    if not (isinstance(chunk_size, int) and chunk_size > 0):
+        raise TypeError("Invalid argument: chunk_size must be a positive integer.")
+    if not (isinstance(n_jobs, int) and (n_jobs > 0 or n_jobs == -1)):
+        raise TypeError("Invalid argument: n_jobs must be a positive integer or -1.")
+    if not (cache is None or isinstance(cache, SentimentCache)):
+        raise TypeError("Invalid argument type: cache must be a SentimentCache.")
+    _check_compact(compact)
+    _check_dedup(dedup)
+    scorers, columns = _resolve_scorers(scorers, columns)
 
-    tweets_senti = tweets.copy()
-    tweets_senti[['polarity', 'subjectivity']] = tweets_senti['tweet'].apply(
-        lambda Text: pd.Series(TextBlob(Text).sentiment))
-
-    for index, row in tweets_senti['tweet'].iteritems():
-        score = SentimentIntensityAnalyzer().polarity_scores(row)
-        neg = score['neg']
-        neu = score['neu']
-        pos = score['pos']
-        comp = score['compound']
-        if neg > pos:
-            tweets_senti.loc[index, 'sentiment'] = 'negative'
-        elif pos > neg:
-            tweets_senti.loc[index, 'sentiment'] = 'positive'
-        else:
-            tweets_senti.loc[index, 'sentiment'] = 'neutral'
-        tweets_senti.loc[index, 'neg'] = neg
-        tweets_senti.loc[index, 'neu'] = neu
-        tweets_senti.loc[index, 'pos'] = pos
-        tweets_senti.loc[index, 'compound'] = comp
+    texts = tweets['tweet'].to_numpy()
+    if dedup:
+        _check_texts(texts)
+        with metrics.stage('dedup.group'):
+            groups, first = duplicate_groups(texts, near_duplicates=dedup == 'near')
+        metrics.count('duplicates', len(texts) - len(first))
+        texts = texts[first]
+    columns = _sentiment_columns(texts, chunk_size, n_jobs, cache, compact=bool(compact),
+                                 scorers=scorers, columns=columns)
+    if dedup:
+        # every copy gets the scores of the first one
+        columns = {col: values[groups] for col, values in columns.items()}
+    tweets_senti = tweets.assign(**columns)
+    if compact:
+        tweets_senti = compact_tweets(tweets_senti, arrow_strings=compact == 'arrow')
 
     return tweets_senti
 
 
+def _sentiment_columns(texts, chunk_size=10000, n_jobs=1, cache=None, compact=False, scorers=None, columns=None):
+    """
+    Scores an array of tweets, see tweet_sentiment_analysis. With compact=True
+    the scores are float32 and the sentiment is a categorical.
+
+    Returns:
+    --------
+    columns : dict
+        The columns added by tweet_sentiment_analysis, in output order.
+    """
+    scorers, columns = _resolve_scorers(scorers, columns)
+    score_columns = [col for scorer in scorers for col in scorer.columns]
+    _check_texts(texts)
+    if cache is None:
+        scores = _score_texts(texts, chunk_size, n_jobs, scorers)
+    else:
+        # each distinct text is looked up once, and only the misses are scored
+        codes, uniques = pd.factorize(texts)
+        # two scorers may share a version, but not a name and columns as well
+        version = '+'.join(f"{scorer.name}:{','.join(scorer.columns)}:{scorer.version}" for scorer in scorers)
+        with metrics.stage('sentiment.cache_lookup'):
+            unique_scores, missing = cache.lookup(uniques, version, len(score_columns))
+        n_missing = int(missing.sum())
+        metrics.count('sentiment_cache.hits', len(uniques) - n_missing)
+        metrics.count('sentiment_cache.misses', n_missing)
+        if n_missing:
+            unique_scores[missing] = _score_texts(uniques[missing], chunk_size, n_jobs, scorers)
+            with metrics.stage('sentiment.cache_store'):
+                cache.store(uniques[missing], unique_scores[missing], version)
+        scores = unique_scores[codes]
+
+    all_columns = dict(zip(score_columns, scores.T))
+    if 'sentiment' in columns:
+        all_columns['sentiment'] = _sentiment_labels(all_columns['neg'], all_columns['pos'], compact)
+    if compact:
+        all_columns.update({col: all_columns[col].astype(np.float32) for col in score_columns})
+    return {col: all_columns[col] for col in columns}
+
+
+def _check_texts(texts):
+    """Checks that every tweet to score is a string, as the analyzers cannot score missing texts."""
+    if pd.api.types.infer_dtype(texts, skipna=False) not in ('string', 'empty'):
+        n_invalid = sum(not isinstance(text, str) for text in texts)
+        raise TypeError(f"Invalid argument type: tweets must be strings, found {n_invalid} "
+                        f"missing or non-string texts.")
+
+
+def _factorize_texts(texts, missing=''):
+    """
+    pd.factorize for tweet texts, with missing texts given one more code,
+    standing for the text missing, instead of the code -1.
+    """
+    codes, uniques = pd.factorize(np.asarray(texts, dtype=object))
+    uniques = np.asarray(uniques, dtype=object)
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(uniques), codes)
+        uniques = np.append(uniques, np.array([missing], dtype=object))
+    return codes, uniques
+
+
+def _score_texts(texts, chunk_size, n_jobs, scorers):
+    """Scores an array of tweets in chunks, in a process pool when n_jobs > 1, see _score_chunk."""
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
+    scores = np.empty((len(texts), sum(len(scorer.columns) for scorer in scorers)))
+    if n_jobs > 1 and len(texts) >= _PARALLEL_MIN_ROWS:
+        # give every worker at least one chunk
+        chunk_size = min(chunk_size, -(-len(texts) // n_jobs))
+        starts = range(0, len(texts), chunk_size)
+        chunks = [texts[start:start + chunk_size] for start in starts]
+        # the workers are not timed stage by stage, only the pool as a whole
+        with metrics.stage('sentiment.process_pool'), \
+                ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(scorers,)) as executor:
+            # map yields in submission order, so the rows keep their original order
+            score_chunk = functools.partial(_score_chunk, scorers=scorers)
+            for start, chunk_scores in zip(starts, executor.map(score_chunk, chunks)):
+                scores[start:start + chunk_size] = chunk_scores
+    else:
+        _init_worker(scorers)
+        for start in range(0, len(texts), chunk_size):
+            scores[start:start + chunk_size] = _score_chunk(texts[start:start + chunk_size], scorers)
+    metrics.count('rows_scored', len(texts))
+    return scores
+
+
+def sentiment_stream(batches, batch_size=1000, cache=None, scorers=None, columns=None):
+    """
+    Applies tweet_sentiment_analysis to a stream of tweets, one
+    micro-batch at a time. The incoming batches, from iter_tweets, a
+    chunked file reader or a queue, are regrouped into batches of
+    batch_size tweets, and each is yielded as soon as it is scored.
+    Nothing is read ahead: the next batch is only pulled from the
+    input once the previous one has been consumed, so a slow consumer
+    slows the reading down instead of letting tweets pile up in memory.
+
+    Parameters:
+    -----------
+    batches : iterable
+        An iterable of dataframes with a 'tweet' column.
+    batch_size : int
+        Optional: The number of tweets scored and yielded at a time,
+        1000 by default. batch_size=None keeps the incoming batches as they are.
+    cache : SentimentCache
+        Optional: A cache of scores shared by all the batches.
+    scorers : list
+        Optional: The scorers to run, see tweet_sentiment_analysis.
+    columns : list
+        Optional: The columns to add, see tweet_sentiment_analysis.
+
+    Returns:
+    --------
+    batches : generator
+        A generator of dataframes with the columns added by tweet_sentiment_analysis.
+    """
+    if not (batch_size is None or (isinstance(batch_size, int) and batch_size > 0)):
+        raise TypeError("Invalid argument: batch_size must be a positive integer or None.")
+    if not (cache is None or isinstance(cache, SentimentCache)):
+        raise TypeError("Invalid argument type: cache must be a SentimentCache.")
+    scorers, columns = _resolve_scorers(scorers, columns)
+
+    return _score_batches(iter(batches), batch_size, cache, scorers, columns)
+
+
+def _score_batches(batches, batch_size, cache, scorers, columns):
+    """Scores micro-batches, see sentiment_stream."""
+    for batch in _rebatch(batches, batch_size):
+        # the batch is a fresh concatenation, so the columns can be added to it in place
+        sentiment_columns = _sentiment_columns(batch['tweet'].to_numpy(), cache=cache, scorers=scorers, columns=columns)
+        for col, values in sentiment_columns.items():
+            batch[col] = values
+        yield batch
+
+
+def _rebatch(batches, batch_size):
+    """Regroups a stream of dataframes into new dataframes of batch_size rows."""
+    pieces = []
+    n_buffered = 0
+    for batch in batches:
+        if not isinstance(batch, pd.DataFrame):
+            raise TypeError("Invalid argument type: batches must contain dataframes.")
+        if batch_size is None:
+            if len(batch) > 0:
+                yield pd.concat([batch])
+            continue
+
+        start = 0
+        while start < len(batch):
+            n_taken = min(batch_size - n_buffered, len(batch) - start)
+            pieces.append(batch.iloc[start:start + n_taken])
+            n_buffered += n_taken
+            start += n_taken
+            if n_buffered == batch_size:
+                yield pd.concat(pieces)
+                pieces = []
+                n_buffered = 0
+
+    if pieces:
+        yield pd.concat(pieces)
+
+
+def analyze_archive(source, destination, text_col='tweet', chunksize=10000, cache=None, word_index=None):
+    """
+    Applies tweet_sentiment_analysis to a CSV or Parquet archive too big
+    to fit in memory. The archive is read chunksize rows at a time, and
+    each chunk is scored and appended to a Parquet file before the next
+    one is read. The word counts behind visualize_sentiment are kept up
+    to date along the way, so the most common words of each sentiment
+    come out of the same single pass.
+
+    Column types are inferred chunk by chunk. A column whose type changes
+    in a later chunk, such as one only null until then, is widened to a
+    type holding both, numbers to float64 and anything else to strings,
+    and the rows already written are rewritten once with it. The file is
+    written under a temporary name and only renamed to destination once
+    every chunk is written, so a failed run leaves no truncated file.
+
+    Parameters:
+    -----------
+    source : string
+        The path of the archive, a '.csv' or '.parquet' file.
+    destination : string
+        The path of the Parquet file written with the sentiment columns added.
+    text_col : string
+        Optional: The column name of tweet text in the archive, 'tweet' by default.
+    chunksize : int
+        Optional: The number of rows read, scored and written at a time, 10000 by default.
+    cache : SentimentCache
+        Optional: A cache of scores shared by all the chunks.
+    word_index : WordFrequencyIndex or TopTermsSketch
+        Optional: An index updated with the word counts of the archive,
+        or a sketch counting them in bounded memory. By default a new
+        WordFrequencyIndex is used and discarded.
+
+    Returns:
+    --------
+    top_words : dataframe
+        The most common words of each sentiment, ranked as in visualize_sentiment,
+        with columns 'frequency', 'sentiment' and 'Word'.
+    """
+    import pyarrow as pa
+    from pyarrow import parquet
+
+    # check argument validity
+    if not isinstance(source, (str, os.PathLike)):
+        raise TypeError("Invalid argument type: source must be a path.")
+    elif not isinstance(destination, (str, os.PathLike)):
+        raise TypeError("Invalid argument type: destination must be a path.")
+    elif not isinstance(text_col, str):
+        raise TypeError("Invalid argument type: text_col must be a string.")
+    elif not (isinstance(chunksize, int) and chunksize > 0):
+        raise TypeError("Invalid argument: chunksize must be a positive integer.")
+    elif not (word_index is None or isinstance(word_index, (WordFrequencyIndex, TopTermsSketch))):
+        raise TypeError("Invalid argument type: word_index must be a WordFrequencyIndex or a TopTermsSketch.")
+
+    extension = os.path.splitext(os.fspath(source))[1].lower()
+    if extension == '.csv':
+        chunks = pd.read_csv(source, chunksize=chunksize)
+    elif extension in ('.parquet', '.pq'):
+        chunks = (batch.to_pandas() for batch in parquet.ParquetFile(source).iter_batches(batch_size=chunksize))
+    else:
+        raise ValueError("The archive must be a '.csv' or '.parquet' file.")
+
+    if word_index is None:
+        word_index = WordFrequencyIndex()
+    # the file being written, renamed to destination at the end,
+    # and the one it is copied to when its schema is widened
+    path, other_path = os.fspath(destination) + '.tmp', os.fspath(destination) + '.tmp.rewrite'
+    writer = None
+    # the columns that had a value in any chunk so far
+    has_values = set()
+    try:
+        for chunk in chunks:
+            # the scoring functions read the text from a 'tweet' column
+            chunk = chunk.rename(columns={text_col: 'tweet'})
+            for col, values in _sentiment_columns(chunk['tweet'].to_numpy(), cache=cache).items():
+                chunk[col] = values
+
+            word_index.update(chunk)
+
+            chunk = chunk.rename(columns={'tweet': text_col})
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = parquet.ParquetWriter(path, table.schema)
+            elif not table.schema.equals(writer.schema, check_metadata=False):
+                schema = _promote_schema(writer.schema, table, has_values)
+                if not schema.equals(writer.schema, check_metadata=False):
+                    writer.close()
+                    writer = _rewrite_parquet(path, other_path, schema)
+                    path, other_path = other_path, path
+                table = table.cast(schema)
+            has_values.update(name for name, column in zip(table.column_names, table.columns)
+                              if column.null_count < len(column))
+            writer.write_table(table)
+        if writer is not None:
+            writer.close()
+            writer = None
+            os.replace(path, destination)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+    return word_index.top_words()
+
+
+def _promote_schema(schema, table, has_values):
+    """
+    The schema of a Parquet file being written, widened to hold a new
+    table as well, see analyze_archive.
+
+    Parameters:
+    -----------
+    schema : pa.Schema
+        The schema of the rows written so far.
+    table : pa.Table
+        The next rows, with the same columns.
+    has_values : set
+        The columns that had a value in the rows written so far.
+    """
+    import pyarrow as pa
+    if table.column_names != schema.names:
+        raise ValueError("Every chunk of the archive must have the same columns.")
+    fields = []
+    for field, column in zip(schema, table.columns):
+        old, new = field.type, column.type
+        if old == new or column.null_count == len(column):
+            # a column without values takes the type of the rows written so far
+            fields.append(field)
+        elif field.name not in has_values:
+            fields.append(field.with_type(new))
+        elif pa.types.is_integer(old) and pa.types.is_integer(new):
+            fields.append(field.with_type(pa.int64()))
+        elif all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in (old, new)):
+            fields.append(field.with_type(pa.float64()))
+        else:
+            fields.append(field.with_type(pa.string()))
+    # without the pandas metadata, which describes the old types
+    return pa.schema(fields)
+
+
+def _rewrite_parquet(path, new_path, schema):
+    """
+    Copies a Parquet file to new_path with a wider schema, removes it,
+    and returns the writer of the copy to append more rows to it.
+    """
+    import pyarrow as pa
+    from pyarrow import parquet
+    writer = parquet.ParquetWriter(new_path, schema)
+    try:
+        for batch in parquet.ParquetFile(path).iter_batches():
+            writer.write_table(pa.Table.from_batches([batch]).cast(schema))
+    except BaseException:
+        writer.close()
+        os.remove(new_path)
+        raise
+    os.remove(path)
+    return writer
+
+
+class TextCleaner:
+    """
+    A reusable tweet cleaner. It produces the same tokens as text_cleaning
+    but builds everything text_cleaning needs only once: the stopword
+    table, the translation table that drops punctuation and digits, the
+    tokenizer regex and the stemmer. Stems are memoized, since tweets
+    reuse a small vocabulary over and over.
+
+    Parameters:
+    -----------
+    stem_cache_size : int
+        Optional: The number of stems remembered, 100000 by default.
+        stem_cache_size=None remembers all of them.
+    """
+
+    def __init__(self, stem_cache_size=100000):
+        if not (stem_cache_size is None or (isinstance(stem_cache_size, int) and stem_cache_size >= 0)):
+            raise TypeError("Invalid argument: stem_cache_size must be a non-negative integer or None.")
+
+        ensure_nltk_resources()
+        import nltk
+        from nltk.stem import SnowballStemmer
+        self.stopwords = frozenset(nltk.corpus.stopwords.words('english') + ['', 'cont'])
+        # punctuation is dropped before lowercasing and digits right after, neither of which
+        # lowercasing can create, so one table removes both. Characters used to be lowercased
+        # one at a time; mapping capital sigma up front keeps str.lower from turning a word
+        # final one into the final form.
+        self._table = str.maketrans({'\u03a3': '\u03c3',
+                                     **{char: None for char in string.punctuation + string.digits}})
+        self._split = re.compile(r'\W+').split
+        self._stem = functools.lru_cache(maxsize=stem_cache_size)(SnowballStemmer('english').stem)
+
+    def __call__(self, text):
+        """
+        Cleans a tweet, see text_cleaning.
+
+        Parameters:
+        -----------
+        text : string
+            The tweet text.
+
+        Returns:
+        --------
+        text : list
+            The stemmed tokens of the tweet that are not stopwords.
+        """
+        tokens = self._split(text.translate(self._table).lower())
+        stopwords = self.stopwords
+        stem = self._stem
+        return [stem(word) for word in tokens if word not in stopwords]
+
+
+def _default_cleaner():
+    """Returns the TextCleaner used by text_cleaning, building it on first use."""
+    global _CLEANER
+    if _CLEANER is None:
+        _CLEANER = TextCleaner()
+    return _CLEANER
+
+
 def text_cleaning(text):
     """
     This helper function cleans the tweet text. The cleaning process includes:
     remove puntuation, tokenization, remove stopwords and stemming. This helper
     function will be called in the tweet_rank function to facilitate tween ranking analysis.
 
+    The stopwords, regex and stemmer are shared by every call through a
+    module-wide TextCleaner.
+
     Parameters:
     -----------
     text : np.array
@@ -244,15 +1498,424 @@ def text_cleaning(text):
     text : np.array
         A np.array that contains a list of strings (cleaned tweets)
     """
-    stopword = nltk.corpus.stopwords.words('english')
-    stopword.append('')
-    stopword.append('cont')
-    ps = SnowballStemmer('english')
-    text_lc = "".join([word.lower() for word in text if word not in string.punctuation])  # remove puntuation
-    text_rc = re.sub('[0-9]+', '', text_lc)
-    tokens = re.split(r'\W+', text_rc)    # tokenization
-    text = [ps.stem(word) for word in tokens if word not in stopword]  # remove stopwords and stemming
-    return text
+    return _default_cleaner()(text)
+
+
+def _sentiment_word_counts(tweets, sentiments, multiplicity=None):
+    """
+    Counts how often each cleaned word is used in the tweets of each sentiment.
+    The vectorizer is fitted once on the distinct tweets, each cleaned once
+    however many times it is repeated, and the counts are summed straight
+    from its sparse matrix, so memory stays proportional to the number of
+    distinct words per tweet rather than tweets times vocabulary.
+
+    Parameters:
+    -----------
+    tweets : series
+        The tweet texts.
+    sentiments : series
+        The sentiment of each tweet.
+    multiplicity : series
+        Optional: The number of times each tweet counts, once by default.
+
+    Returns:
+    --------
+    terms : np.array
+        The vocabulary, in the order of the count arrays.
+    counts : dict
+        The word counts of each sentiment, as an np.array over terms.
+    """
+    from sklearn.feature_extraction.text import CountVectorizer
+    analyzer = text_cleaning
+    if metrics.enabled():
+        analyzer = metrics.timed(text_cleaning, 'text_cleaning')
+    vectorizer = CountVectorizer(analyzer=analyzer)
+    # missing tweets have no words
+    codes, uniques = _factorize_texts(tweets)
+    with metrics.stage('words.vectorize'):
+        doc_terms = vectorizer.fit_transform(uniques).T.tocsr()
+    terms = np.empty(len(vectorizer.vocabulary_), dtype=object)
+    for term, column in vectorizer.vocabulary_.items():
+        terms[column] = term
+
+    sentiments = np.asarray(sentiments)
+    weights = np.ones(len(codes), dtype=np.int64) if multiplicity is None else np.asarray(multiplicity, dtype=np.int64)
+    counts = {}
+    for sentiment in np.unique(sentiments):
+        # the number of times each distinct tweet is used with this sentiment
+        selected = sentiments == sentiment
+        uses = np.bincount(codes[selected], weights[selected], minlength=len(uniques)).astype(np.int64)
+        counts[sentiment] = doc_terms @ uses
+    return terms, counts
+
+
+def _tweet_rank(terms, counts, start=1, stop=11):
+    """
+    Returns the most common words of one sentiment, ranked start to stop,
+    as a dataframe indexed by word with a 'frequency' column. The top word
+    is left out by default, as it always has been.
+    """
+    used = np.flatnonzero(counts)
+    if len(used) > stop:
+        # only the top stop words, and those tied with the last of them, need sorting
+        threshold = np.partition(counts[used], len(used) - stop)[len(used) - stop]
+        used = used[counts[used] >= threshold]
+    # most frequent first, ties in vocabulary order
+    ranked = used[np.lexsort((used, -counts[used]))][start:stop]
+    return pd.DataFrame({'frequency': counts[ranked]}, index=pd.Index(terms[ranked], dtype=object))
+
+
+class WordFrequencyIndex:
+    """
+    A persistent count of the words used in tweets of each sentiment,
+    the data behind visualize_sentiment.
+
+    The index is updated with new tweets only, instead of recounting
+    every tweet, and indexes built on different shards or workers can
+    be added together. The words of each sentiment are also kept in
+    buckets by count, moved from one bucket to the next as they are
+    counted, so an update costs a step per word it counts. A top-k
+    query walks the buckets from the highest count down and only sorts
+    the few it reaches, instead of sorting the whole vocabulary after
+    every update. visualize_sentiment accepts an index in place of a
+    dataframe.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        # per sentiment: the words of each count, the counts in use in
+        # ascending order, and the buckets sorted alphabetically so far
+        self._buckets = {}
+        self._levels = {}
+        self._sorted = {}
+
+    @property
+    def sentiments(self):
+        """The sentiments counted so far, sorted."""
+        return sorted(self._counts)
+
+    def update(self, sentiment_df):
+        """
+        Adds the words of more tweets to the index.
+
+        Parameters:
+        -----------
+        sentiment_df : dataframe
+            Output of tweet_sentiment_analysis, or any dataframe
+            with 'tweet' and 'sentiment' columns. The words of each
+            row are counted 'multiplicity' times when it has that column.
+
+        Returns:
+        --------
+        index : WordFrequencyIndex
+            The updated index itself.
+        """
+        if not isinstance(sentiment_df, pd.DataFrame):
+            raise TypeError("Invalid argument type: sentiment_df must be a dataframe.")
+        elif 'sentiment' not in sentiment_df or 'tweet' not in sentiment_df:
+            raise KeyError("Input does not contain columns for tweet and sentiment, "
+                           "did you use output of tweet_sentiment_analysis?")
+        if len(sentiment_df) == 0:
+            return self
+
+        terms, counts = _sentiment_word_counts(sentiment_df['tweet'], sentiment_df['sentiment'],
+                                               sentiment_df.get('multiplicity'))
+        for sentiment, sentiment_counts in counts.items():
+            used = np.flatnonzero(sentiment_counts)
+            self._add(sentiment, zip(terms[used], sentiment_counts[used].tolist()))
+        return self
+
+    def _add(self, sentiment, word_counts):
+        """Adds (word, count) pairs to a sentiment, moving each word to the bucket of its new count."""
+        counter = self._counts.setdefault(sentiment, Counter())
+        buckets = self._buckets.setdefault(sentiment, {})
+        levels = self._levels.setdefault(sentiment, [])
+        sorted_buckets = self._sorted.setdefault(sentiment, {})
+        for word, count in word_counts:
+            if count <= 0:
+                continue
+            old = counter.get(word, 0)
+            new = counter[word] = old + count
+            if old:
+                bucket = buckets[old]
+                bucket.discard(word)
+                sorted_buckets.pop(old, None)
+                if not bucket:
+                    del buckets[old]
+                    levels.pop(bisect.bisect_left(levels, old))
+            if new not in buckets:
+                buckets[new] = set()
+                bisect.insort(levels, new)
+            buckets[new].add(word)
+            sorted_buckets.pop(new, None)
+
+    def merge(self, other):
+        """
+        Adds the counts of another index to this one.
+
+        Returns:
+        --------
+        index : WordFrequencyIndex
+            The updated index itself.
+        """
+        if not isinstance(other, WordFrequencyIndex):
+            raise TypeError("Invalid argument type: other must be a WordFrequencyIndex.")
+        for sentiment, counter in other._counts.items():
+            self._add(sentiment, counter.items())
+        return self
+
+    def __iadd__(self, other):
+        return self.merge(other)
+
+    def __add__(self, other):
+        return WordFrequencyIndex().merge(self).merge(other)
+
+    def counts(self, sentiment):
+        """Returns the word counts of a sentiment as a Counter."""
+        return Counter(self._counts.get(sentiment, {}))
+
+    def top(self, sentiment, k=10, skip=0):
+        """
+        Returns the most common words of a sentiment.
+
+        Parameters:
+        -----------
+        sentiment : string
+            The sentiment, e.g. 'positive'.
+        k : int
+            Optional: The number of words, 10 by default.
+        skip : int
+            Optional: The number of most common words left out, 0 by default.
+
+        Returns:
+        --------
+        words : dataframe
+            A dataframe indexed by word with a 'frequency' column, most
+            common first, ties in alphabetical order as in visualize_sentiment.
+        """
+        buckets = self._buckets.get(sentiment, {})
+        sorted_buckets = self._sorted.get(sentiment, {})
+        terms, counts = [], []
+        # the highest counts first, each bucket sorted once until it changes
+        for count in reversed(self._levels.get(sentiment, [])):
+            if len(terms) >= skip + k:
+                break
+            if count not in sorted_buckets:
+                sorted_buckets[count] = sorted(buckets[count])
+            words = sorted_buckets[count][:skip + k - len(terms)]
+            terms.extend(words)
+            counts.extend([count] * len(words))
+        return pd.DataFrame({'frequency': np.array(counts[skip:], dtype=np.int64)},
+                            index=pd.Index(terms[skip:], dtype=object))
+
+    def top_words(self, k=10, skip=1):
+        """
+        Returns the most common words of every sentiment, as visualize_sentiment
+        ranks them: by default the 2nd to the 11th most common.
+
+        Returns:
+        --------
+        words : dataframe
+            A dataframe indexed by word with columns 'frequency', 'sentiment' and 'Word'.
+        """
+        frames = [self.top(sentiment, k, skip).assign(sentiment=sentiment) for sentiment in self.sentiments]
+        if not frames:
+            return pd.DataFrame(columns=['frequency', 'sentiment', 'Word'])
+        top_words = pd.concat(frames)
+        top_words['Word'] = top_words.index
+        return top_words
+
+    def save(self, path):
+        """Writes the index to a JSON file."""
+        data = {sentiment: dict(counter) for sentiment, counter in self._counts.items()}
+        tmp_path = os.fspath(path) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'format': 1, 'counts': data}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Reads an index written by save."""
+        with open(path) as f:
+            data = json.load(f)
+        index = cls()
+        for sentiment, counts in data['counts'].items():
+            index._add(sentiment, counts.items())
+        return index
+
+
+class TopTermsSketch:
+    """
+    The most used hashtags, and the most common words of each sentiment,
+    counted approximately in bounded memory: the approximate counterpart
+    of hashtag_counts and WordFrequencyIndex for firehose-scale streams.
+
+    Hashtags and the words of each sentiment are each counted by a
+    HeavyHitters summary, see pytweet.sketch: a Count-Min Sketch of fixed
+    size and a list of the k candidates with the highest estimated counts.
+    Memory does not grow with the number of distinct words or hashtags.
+    Counts are never underestimated, and are overestimated by at most
+    epsilon * N with probability 1 - delta, N being the number of hashtags
+    or of words of a sentiment counted and epsilon and delta those of the
+    sketch, 0.017% and 1.8% by default. Every term used more than
+    N / k + epsilon * N times is kept, so k is best set well above the
+    number of terms shown.
+
+    Both rankings come out of a single pass over the tweets, one batch
+    at a time, for instance those of sentiment_stream, and sketches
+    built on different workers can be added together. hashtag_counts,
+    plot_hashtags, visualize_sentiment and analyze_archive accept a
+    sketch in place of a dataframe or WordFrequencyIndex.
+
+        sketch = TopTermsSketch()
+        for batch in sentiment_stream(iter_tweets('@elonmusk')):
+            sketch.update(batch)
+        plot_hashtags(sketch, 'tweet')
+
+    Parameters:
+    -----------
+    k : int
+        Optional: The number of candidates kept per ranking, 100 by default.
+    width : int
+        Optional: The width of each Count-Min Sketch, 16384 by default.
+    depth : int
+        Optional: The depth of each Count-Min Sketch, 4 by default.
+        Each sketch takes width * depth * 8 bytes, 512 KB by default.
+    """
+
+    def __init__(self, k=100, width=16384, depth=4):
+        self._params = (k, width, depth)
+        self.hashtags = HeavyHitters(k, width, depth)
+        self._words = {}
+
+    @property
+    def sentiments(self):
+        """The sentiments counted so far, sorted."""
+        return sorted(self._words)
+
+    def update(self, tweets, text_col='tweet'):
+        """
+        Adds the hashtags of more tweets and, when they have a 'sentiment'
+        column, their words. The terms of each row are counted
+        'multiplicity' times when it has that column.
+
+        Parameters:
+        -----------
+        tweets : dataframe
+            A batch of tweets, the output of tweet_sentiment_analysis for instance.
+        text_col : string
+            Optional: The column name of tweet text in dataframe, 'tweet' by default.
+
+        Returns:
+        --------
+        sketch : TopTermsSketch
+            The updated sketch itself.
+        """
+        if not isinstance(tweets, pd.DataFrame):
+            raise TypeError("Invalid argument type: tweets must be a dataframe.")
+        elif text_col not in tweets:
+            raise KeyError(f"Input does not contain the text column '{text_col}'.")
+        if len(tweets) == 0:
+            return self
+        weights = np.ones(len(tweets), dtype=np.int64) if 'multiplicity' not in tweets \
+            else tweets['multiplicity'].to_numpy(dtype=np.int64)
+
+        with metrics.stage('hashtags.count'):
+            hashtags = tweets[text_col].str.findall(r'[#]\w+')
+            lengths = hashtags.str.len().fillna(0).to_numpy(dtype=np.int64)
+            self.hashtags.update(list(chain.from_iterable(hashtags.dropna())), np.repeat(weights, lengths))
+
+        if 'sentiment' in tweets:
+            # each distinct tweet is cleaned once, and missing tweets have no words
+            codes, uniques = _factorize_texts(tweets[text_col])
+            analyzer = text_cleaning
+            if metrics.enabled():
+                analyzer = metrics.timed(text_cleaning, 'text_cleaning')
+            with metrics.stage('words.vectorize'):
+                words = [analyzer(text) for text in uniques]
+            owners = np.repeat(np.arange(len(uniques)), np.fromiter(map(len, words), np.int64, len(words)))
+            words = np.array(list(chain.from_iterable(words)), dtype=object)
+
+            sentiments = np.asarray(tweets['sentiment'], dtype=object)
+            for sentiment in pd.unique(sentiments):
+                # the number of times each distinct tweet is used with this sentiment
+                selected = sentiments == sentiment
+                uses = np.bincount(codes[selected], weights[selected], minlength=len(uniques)).astype(np.int64)
+                counts = uses[owners]
+                if sentiment not in self._words:
+                    self._words[sentiment] = HeavyHitters(*self._params)
+                self._words[sentiment].update(words[counts > 0], counts[counts > 0])
+        return self
+
+    def merge(self, other):
+        """
+        Adds the counts of another sketch, built with the same parameters, to this one.
+
+        Returns:
+        --------
+        sketch : TopTermsSketch
+            The updated sketch itself.
+        """
+        if not isinstance(other, TopTermsSketch):
+            raise TypeError("Invalid argument type: other must be a TopTermsSketch.")
+        self.hashtags.merge(other.hashtags)
+        for sentiment, words in other._words.items():
+            if sentiment not in self._words:
+                self._words[sentiment] = HeavyHitters(*self._params)
+            self._words[sentiment].merge(words)
+        return self
+
+    def __iadd__(self, other):
+        return self.merge(other)
+
+    def __add__(self, other):
+        return TopTermsSketch(*self._params).merge(self).merge(other)
+
+    def hashtag_counts(self, top_n=15):
+        """
+        Returns the most used hashtags, as hashtag_counts does: those tied
+        with the last one are kept too, as far as the k candidates go.
+
+        Returns:
+        --------
+        counts : dataframe
+            A dataframe with columns 'Keyword' and 'Count', most used hashtags first.
+        """
+        counts = self.hashtags.top()
+        if top_n is not None and len(counts) > top_n:
+            counts = counts[counts >= counts.iloc[top_n - 1]]
+        return pd.DataFrame({'Keyword': counts.index, 'Count': counts.to_numpy()})
+
+    def top(self, sentiment, k=10, skip=0):
+        """
+        Returns the most common words of a sentiment, see WordFrequencyIndex.top.
+
+        Returns:
+        --------
+        words : dataframe
+            A dataframe indexed by word with a 'frequency' column, most common first.
+        """
+        if sentiment not in self._words:
+            return pd.DataFrame({'frequency': np.zeros(0, dtype=np.int64)}, index=pd.Index([], dtype=object))
+        counts = self._words[sentiment].top(skip + k)[skip:]
+        return pd.DataFrame({'frequency': counts.to_numpy()}, index=pd.Index(counts.index, dtype=object))
+
+    def top_words(self, k=10, skip=1):
+        """
+        Returns the most common words of every sentiment, as visualize_sentiment
+        ranks them, see WordFrequencyIndex.top_words.
+
+        Returns:
+        --------
+        words : dataframe
+            A dataframe indexed by word with columns 'frequency', 'sentiment' and 'Word'.
+        """
+        frames = [self.top(sentiment, k, skip).assign(sentiment=sentiment) for sentiment in self.sentiments]
+        if not frames:
+            return pd.DataFrame(columns=['frequency', 'sentiment', 'Word'])
+        top_words = pd.concat(frames)
+        top_words['Word'] = top_words.index
+        return top_words
 
 
 def visualize_sentiment(sentiment_df, plot_type="Standard"):
@@ -262,9 +1925,12 @@ def visualize_sentiment(sentiment_df, plot_type="Standard"):
 
     Parameters:
     -----------
-    sentiment_df : dataframe
+    sentiment_df : dataframe, WordFrequencyIndex or TopTermsSketch
         Output of tweet_sentiment_analysis,
-        dataframe that contains added columns from tweet_sentiment_analysis
+        dataframe that contains added columns from tweet_sentiment_analysis,
+        or an index or sketch of the word counts to plot without recounting them.
+        The words of each row are counted 'multiplicity' times when the
+        dataframe has that column, see collapse_duplicates.
 
     plot_type : string
         Optional: Type of plot to return, 3 options:'Standard', 'Stacked', and 'Separate'
@@ -283,74 +1949,74 @@ def visualize_sentiment(sentiment_df, plot_type="Standard"):
     options = ("Standard", "Stacked", "Separate")
     if plot_type not in options:
         raise TypeError("Invalid argument for plot_type: You must enter one of 'Standard', 'Stacked', 'Separate'")
+    elif isinstance(sentiment_df, (WordFrequencyIndex, TopTermsSketch)):
+        pass
     elif not isinstance(sentiment_df, pd.DataFrame):
         raise Exception("""The input of sentiment_df should be a Pandas DataFrame,
                            did you use output of tweet_sentiment_analysis?""")
     elif 'sentiment' not in sentiment_df:
         raise KeyError("Input does not contain column for sentiment, did you use output of tweet_sentiment_analysis?")
 
-    # Define tweet_rank function
-    def tweet_rank(df, sentiment):
-        """function to return most common words tweeted for a specified sentiment"""
-        df_senti = df[df['sentiment'] == sentiment]
-        countVectorizer = CountVectorizer(analyzer=text_cleaning, stop_words='english')
-        countVector = countVectorizer.fit_transform(df_senti['tweet'])
-        count_vect_df = pd.DataFrame(countVector.toarray(), columns=countVectorizer.get_feature_names())
-        count_vect_df.head()
-        count = pd.DataFrame(count_vect_df.sum())
-        countdf = count.sort_values(0, ascending=False).head(20)
-        return countdf[1:11]
-
+    import altair as alt
     dataframes = dict()            # create empty dictionary to store sentiment dataframes
-    for sentiment in np.unique(sentiment_df["sentiment"]):
-        sent_df = tweet_rank(sentiment_df, sentiment)
-        sent_df.columns = ['frequency']                # rename columns and include column for sentiment and word
-        sent_df["sentiment"] = sentiment
-        sent_df['Word'] = sent_df.index
-        dataframes[sentiment] = sent_df     # append sentiment dataframe to dictionary
+    if isinstance(sentiment_df, (WordFrequencyIndex, TopTermsSketch)):
+        with metrics.stage('words.rank'):
+            top_words = sentiment_df.top_words()
+        for sentiment in sentiment_df.sentiments:
+            dataframes[sentiment] = top_words[top_words['sentiment'] == sentiment].copy()
+    else:
+        terms, counts = _sentiment_word_counts(sentiment_df['tweet'], sentiment_df['sentiment'],
+                                               sentiment_df.get('multiplicity'))
+        for sentiment, sentiment_counts in counts.items():
+            with metrics.stage('words.rank'):
+                sent_df = _tweet_rank(terms, sentiment_counts)
+            sent_df["sentiment"] = sentiment        # include column for sentiment and word
+            sent_df['Word'] = sent_df.index
+            dataframes[sentiment] = sent_df     # append sentiment dataframe to dictionary
 
     # add all dataframes together, may need adjustment later
     top_words_df = pd.concat([dataframes['positive'], dataframes['neutral'], dataframes['negative']])
 
-    # Plot if standard is selected
-    if plot_type == "Standard":
-        top_words_df['Word'] = top_words_df['Word'] + ' (' + top_words_df["sentiment"] + ')'
-        standard_plot = alt.Chart(top_words_df, title='Most Common Words used by Twitter User').mark_bar().encode(
-            x=alt.X('frequency', title='Number of Occurences'),
-            y=alt.Y('Word', sort='-x'),
-            color=alt.Color("sentiment", scale=alt.Scale(domain=['positive', 'neutral', 'negative'],
-                            range=['blue', 'orange', 'red'])))
-        return standard_plot
-
-    # Plot if stacked is selected
-    elif plot_type == "Stacked":
-        top_words_df['Word'] = top_words_df.index
-        stacked_plot = alt.Chart(top_words_df, title='Most Common Words used by Twitter User').mark_bar().encode(
-            x=alt.X('frequency', title='Number of Occurences'),
-            y=alt.Y('Word', sort='-x'),
-            color=alt.Color("sentiment", scale=alt.Scale(domain=['positive', 'neutral', 'negative'],
-                            range=['blue', 'orange', 'red'])))
-        return stacked_plot
-
-    # Plot if Separate is selected
-    elif plot_type == "Separate":
-        negative = alt.Chart(dataframes['negative'],
-                             title='Most Common Negative Words used by Twitter User').mark_bar().encode(
-            x=alt.X('frequency', title='Number of Occurences'),
-            y=alt.Y('Word', sort='-x'),
-            color=alt.value("red"))
-
-        positive = alt.Chart(dataframes['positive'],
-                             title='Most Common Postive Words used by Twitter User').mark_bar().encode(
-            x=alt.X('frequency', title='Number of Occurences'),
-            y=alt.Y('Word', sort='-x'),
-            color=alt.value("blue"))
-
-        neutral = alt.Chart(dataframes['neutral'],
-                            title='Most Common Neutral Words used by Twitter User').mark_bar().encode(
-            x=alt.X('frequency', title='Number of Occurences'),
-            y=alt.Y('Word', sort='-x'),
-            color=alt.value("orange"))
-
-        separate_plot = positive | neutral | negative
-        return separate_plot
+    with metrics.stage('chart.sentiment'):
+        # Plot if standard is selected
+        if plot_type == "Standard":
+            top_words_df['Word'] = top_words_df['Word'] + ' (' + top_words_df["sentiment"] + ')'
+            standard_plot = alt.Chart(top_words_df, title='Most Common Words used by Twitter User').mark_bar().encode(
+                x=alt.X('frequency', title='Number of Occurences'),
+                y=alt.Y('Word', sort='-x'),
+                color=alt.Color("sentiment", scale=alt.Scale(domain=['positive', 'neutral', 'negative'],
+                                range=['blue', 'orange', 'red'])))
+            return standard_plot
+
+        # Plot if stacked is selected
+        elif plot_type == "Stacked":
+            top_words_df['Word'] = top_words_df.index
+            stacked_plot = alt.Chart(top_words_df, title='Most Common Words used by Twitter User').mark_bar().encode(
+                x=alt.X('frequency', title='Number of Occurences'),
+                y=alt.Y('Word', sort='-x'),
+                color=alt.Color("sentiment", scale=alt.Scale(domain=['positive', 'neutral', 'negative'],
+                                range=['blue', 'orange', 'red'])))
+            return stacked_plot
+
+        # Plot if Separate is selected
+        elif plot_type == "Separate":
+            negative = alt.Chart(dataframes['negative'],
+                                 title='Most Common Negative Words used by Twitter User').mark_bar().encode(
+                x=alt.X('frequency', title='Number of Occurences'),
+                y=alt.Y('Word', sort='-x'),
+                color=alt.value("red"))
+
+            positive = alt.Chart(dataframes['positive'],
+                                 title='Most Common Postive Words used by Twitter User').mark_bar().encode(
+                x=alt.X('frequency', title='Number of Occurences'),
+                y=alt.Y('Word', sort='-x'),
+                color=alt.value("blue"))
+
+            neutral = alt.Chart(dataframes['neutral'],
+                                title='Most Common Neutral Words used by Twitter User').mark_bar().encode(
+                x=alt.X('frequency', title='Number of Occurences'),
+                y=alt.Y('Word', sort='-x'),
+                color=alt.value("orange"))
+
+            separate_plot = positive | neutral | negative
+            return separate_plot
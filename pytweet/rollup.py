@@ -0,0 +1,266 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# the length of each resolution in seconds; weeks are aligned on Mondays
+RESOLUTIONS = {'minute': 60, 'hour': 3600, 'day': 86400, 'week': 604800}
+_SENTIMENTS = ['negative', 'neutral', 'positive']
+# 1970-01-01, where bucket keys start, was a Thursday
+_WEEK_OFFSET = 3 * 86400
+
+
+class TimelineRollup:
+    """
+    Tweet counts and sentiment per minute, hour, day and week, kept up
+    to date as tweets arrive.
+
+    Each update buckets the new tweets at every resolution in one
+    vectorized pass and adds them to the buckets already stored, so the
+    tweets themselves are never kept or scanned again. Buckets follow the
+    wall clock of a time zone: a day is a local calendar day. Queries over
+    a date range cost a binary search on prefix sums, however many tweets
+    were added, and listing the buckets of a range costs one slice.
+    timeline_counts and plot_timeline accept a rollup in place of a
+    dataframe.
+
+        rollup = TimelineRollup(tz='America/Vancouver')
+        rollup.update(tweet_sentiment_analysis(tweets))
+        rollup.buckets('day', start='2021-03-01')
+
+    Parameters:
+    -----------
+    tz : string
+        Optional: The time zone of the buckets, 'UTC' by default. Times
+        without a time zone are taken to be in UTC, as Twitter sends them.
+    time_col : string
+        Optional: The column name of post time in the dataframes, 'time' by default.
+    score_cols : tuple
+        Optional: The score columns averaged per bucket, 'polarity' and
+        'compound' by default.
+    """
+
+    def __init__(self, tz='UTC', time_col='time', score_cols=('polarity', 'compound')):
+        if not isinstance(tz, str):
+            raise TypeError('Invalid argument type: tz must be the name of a time zone.')
+        elif not isinstance(time_col, str):
+            raise TypeError('Invalid argument type: time_col must be a string.')
+        elif not (isinstance(score_cols, (list, tuple)) and all(isinstance(col, str) for col in score_cols)):
+            raise TypeError('Invalid argument type: score_cols must be a list of column names.')
+        # fails early on unknown time zones
+        pd.Timestamp(0, tz=tz)
+
+        self.tz = tz
+        self.time_col = time_col
+        self.score_cols = tuple(score_cols)
+        # the sums kept per bucket: tweets, scored tweets, each score and each sentiment
+        self.fields = ['count', 'scored'] + list(self.score_cols) + _SENTIMENTS
+        self._keys = {resolution: np.zeros(0, dtype=np.int64) for resolution in RESOLUTIONS}
+        self._sums = {resolution: np.zeros((0, len(self.fields))) for resolution in RESOLUTIONS}
+        self._prefix = {}
+
+    def __len__(self):
+        """The number of tweets added."""
+        return int(self._sums['week'][:, 0].sum())
+
+    def _local_seconds(self, times):
+        """Converts times to seconds since 1970 on the wall clock of the rollup's time zone."""
+        times = pd.to_datetime(pd.Series(times), utc=True).dt.tz_convert(self.tz).dt.tz_localize(None)
+        return times.dropna().to_numpy().astype('datetime64[s]').astype(np.int64), times.notna().to_numpy()
+
+    def _bound(self, time):
+        """Converts a query bound to local wall-clock seconds; times without a time zone are in the rollup's."""
+        time = pd.Timestamp(time)
+        if time.tzinfo is not None:
+            time = time.tz_convert(self.tz).tz_localize(None)
+        return int(time.value // 10 ** 9)
+
+    def update(self, tweets):
+        """
+        Adds tweets to the rollup.
+
+        Parameters:
+        -----------
+        tweets : dataframe
+            Tweets with a time column, the output of get_tweets for instance.
+            The scores and the sentiment of the output of tweet_sentiment_analysis
+            are added as well.
+
+        Returns:
+        --------
+        rollup : TimelineRollup
+            The updated rollup itself.
+        """
+        if not isinstance(tweets, pd.DataFrame):
+            raise TypeError('Invalid argument type: tweets must be a dataframe.')
+        elif self.time_col not in tweets:
+            raise KeyError(f"Input does not contain the time column '{self.time_col}'.")
+        scored = 'sentiment' in tweets or any(col in tweets for col in self.score_cols)
+        missing = [col for col in self.score_cols + ('sentiment',) if col not in tweets]
+        if scored and missing:
+            raise KeyError(f"Input does not contain the sentiment columns {missing}, "
+                           "did you use output of tweet_sentiment_analysis?")
+
+        seconds, valid = self._local_seconds(tweets[self.time_col])
+        values = np.zeros((len(seconds), len(self.fields)))
+        values[:, 0] = 1
+        if scored:
+            values[:, 1] = 1
+            for i, col in enumerate(self.score_cols):
+                values[:, 2 + i] = tweets[col].to_numpy(dtype=float)[valid]
+            sentiments = np.asarray(tweets['sentiment'], dtype=object)[valid]
+            for i, sentiment in enumerate(_SENTIMENTS):
+                values[:, 2 + len(self.score_cols) + i] = sentiments == sentiment
+
+        for resolution, keys in self._bucket_keys(seconds).items():
+            self._add(resolution, keys, values)
+        return self
+
+    @staticmethod
+    def _bucket_keys(seconds):
+        """The start of the bucket of each time, at every resolution."""
+        minutes = seconds - seconds % 60
+        hours = minutes - minutes % 3600
+        days = hours - hours % 86400
+        weeks = days - (days + _WEEK_OFFSET) % RESOLUTIONS['week']
+        return {'minute': minutes, 'hour': hours, 'day': days, 'week': weeks}
+
+    def _add(self, resolution, keys, values):
+        """Adds the sums of values per key to the buckets of a resolution."""
+        new_keys, buckets = np.unique(keys, return_inverse=True)
+        buckets = buckets.ravel()
+        new_sums = np.column_stack([np.bincount(buckets, values[:, i], minlength=len(new_keys))
+                                    for i in range(values.shape[1])]).reshape(len(new_keys), values.shape[1])
+
+        # the stored buckets are sorted: existing ones are added to in place, and new ones inserted
+        keys, sums = self._keys[resolution], self._sums[resolution]
+        positions = np.searchsorted(keys, new_keys)
+        found = positions < len(keys)
+        found[found] = keys[positions[found]] == new_keys[found]
+        sums[positions[found]] += new_sums[found]
+        if not found.all():
+            self._keys[resolution] = np.insert(keys, positions[~found], new_keys[~found])
+            self._sums[resolution] = np.insert(sums, positions[~found], new_sums[~found], axis=0)
+        self._prefix.pop(resolution, None)
+
+    def merge(self, other):
+        """
+        Adds the buckets of another rollup, built with the same time zone
+        and score columns, to this one.
+
+        Returns:
+        --------
+        rollup : TimelineRollup
+            The updated rollup itself.
+        """
+        if not isinstance(other, TimelineRollup):
+            raise TypeError('Invalid argument type: other must be a TimelineRollup.')
+        elif (other.tz, other.score_cols) != (self.tz, self.score_cols):
+            raise ValueError('Invalid argument: rollups must have the same time zone and score columns to be merged.')
+        for resolution in RESOLUTIONS:
+            self._add(resolution, other._keys[resolution], other._sums[resolution])
+        return self
+
+    def __iadd__(self, other):
+        return self.merge(other)
+
+    def __add__(self, other):
+        return TimelineRollup(self.tz, self.time_col, self.score_cols).merge(self).merge(other)
+
+    def _check_resolution(self, resolution):
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Invalid argument: resolution must be one of {', '.join(RESOLUTIONS)}.")
+
+    def _range(self, resolution, start, end):
+        """The positions of the buckets of a resolution starting in [start, end)."""
+        keys = self._keys[resolution]
+        lo = 0 if start is None else np.searchsorted(keys, self._bound(start) - RESOLUTIONS[resolution] + 1)
+        hi = len(keys) if end is None else np.searchsorted(keys, self._bound(end))
+        return lo, max(lo, hi)
+
+    def _frame(self, keys, sums):
+        """Turns bucket sums into counts, mean scores and sentiment counts."""
+        index = pd.DatetimeIndex(keys.astype('datetime64[s]').astype('datetime64[ns]'), name='time')
+        index = index.tz_localize(self.tz, ambiguous=np.ones(len(index), dtype=bool), nonexistent='shift_forward')
+        frame = pd.DataFrame({'count': sums[:, 0].astype(np.int64)}, index=index)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for i, col in enumerate(self.score_cols):
+                frame[col] = np.where(sums[:, 1] > 0, sums[:, 2 + i] / sums[:, 1], np.nan)
+        for i, sentiment in enumerate(_SENTIMENTS):
+            frame[sentiment] = sums[:, 2 + len(self.score_cols) + i].astype(np.int64)
+        return frame
+
+    def buckets(self, resolution='hour', start=None, end=None):
+        """
+        Returns the buckets of a resolution within a date range.
+
+        Parameters:
+        -----------
+        resolution : string
+            Optional: One of 'minute', 'hour', 'day' and 'week', 'hour' by default.
+        start : timestamp or string
+            Optional: The start of the range, whose bucket is included. Times
+            without a time zone are in the rollup's. By default the first bucket.
+        end : timestamp or string
+            Optional: The end of the range, excluded. By default the last bucket.
+
+        Returns:
+        --------
+        buckets : dataframe
+            A dataframe indexed by the start of each bucket with tweets, with
+            columns 'count', the mean of each score column over the scored
+            tweets and the number of 'negative', 'neutral' and 'positive' ones.
+        """
+        self._check_resolution(resolution)
+        lo, hi = self._range(resolution, start, end)
+        return self._frame(self._keys[resolution][lo:hi], self._sums[resolution][lo:hi])
+
+    def totals(self, start=None, end=None, resolution='minute'):
+        """
+        Returns the totals over a date range, from prefix sums of the buckets.
+
+        Parameters:
+        -----------
+        start : timestamp or string
+            Optional: The start of the range. By default the first tweet.
+        end : timestamp or string
+            Optional: The end of the range, excluded. By default the last tweet.
+        resolution : string
+            Optional: The resolution of the buckets counted, those overlapping
+            the range, 'minute' by default.
+
+        Returns:
+        --------
+        totals : series
+            The 'count', mean scores and sentiment counts of the range.
+        """
+        self._check_resolution(resolution)
+        prefix = self._prefix.get(resolution)
+        if prefix is None:
+            sums = self._sums[resolution]
+            prefix = self._prefix[resolution] = np.vstack([np.zeros((1, len(self.fields))), np.cumsum(sums, axis=0)])
+        lo, hi = self._range(resolution, start, end)
+        totals = self._frame(np.zeros(1, dtype=np.int64), prefix[hi:hi + 1] - prefix[lo:lo + 1]).iloc[0]
+        return totals.rename(None)
+
+    def save(self, path):
+        """Writes the rollup to an .npz file."""
+        arrays = {f'{resolution}_{name}': data[resolution]
+                  for name, data in (('keys', self._keys), ('sums', self._sums)) for resolution in RESOLUTIONS}
+        meta = json.dumps({'format': 1, 'tz': self.tz, 'time_col': self.time_col, 'score_cols': self.score_cols})
+        tmp_path = os.fspath(path) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, meta=np.array(meta), **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Reads a rollup written by save."""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            rollup = cls(meta['tz'], meta['time_col'], tuple(meta['score_cols']))
+            for resolution in RESOLUTIONS:
+                rollup._keys[resolution] = data[f'{resolution}_keys']
+                rollup._sums[resolution] = data[f'{resolution}_sums']
+        return rollup
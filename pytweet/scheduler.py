@@ -0,0 +1,197 @@
+import random
+import threading
+import time
+
+from pytweet import metrics
+
+
+class RateLimiter:
+    """
+    A thread-safe scheduler that spreads API calls over rate-limit windows.
+
+    Twitter allows 900 user_timeline calls per 15-minute window for a
+    user-authenticated client. Instead of spending the whole allowance at
+    the start of a window and then stalling, calls are released at a steady
+    rate, with a small burst allowed when the limiter has been idle. The
+    rate is chosen so that no window of `period` seconds ever sees more
+    than `calls` calls, however the calls are timed.
+
+    Parameters:
+    -----------
+    calls : int
+        The number of calls allowed per window, 900 by default.
+    period : number
+        The length of a window in seconds, 900 (15 minutes) by default.
+    burst : int
+        Optional: The number of calls that may go out back to back after
+        an idle spell, below calls. By default 1% of calls, and at least
+        one when calls allows it. burst=0 releases every call at the
+        steady rate.
+    clock : callable
+        Optional: Returns the current time in seconds, time.monotonic by default.
+    sleep : callable
+        Optional: Waits for a number of seconds, time.sleep by default.
+    """
+
+    def __init__(self, calls=900, period=900, burst=None, clock=time.monotonic, sleep=time.sleep):
+        if not (isinstance(calls, int) and calls > 0):
+            raise TypeError('Invalid argument: calls must be a positive integer.')
+        if not (isinstance(period, (int, float)) and period > 0):
+            raise TypeError('Invalid argument: period must be a positive number.')
+        if burst is None:
+            burst = min(max(1, calls // 100), calls - 1)
+        if not (isinstance(burst, int) and 0 <= burst < calls):
+            raise TypeError('Invalid argument: burst must be an integer between 0 and calls - 1.')
+
+        self.calls = calls
+        self.period = period
+        self.burst = burst
+        # the burst is paid for by releasing the other calls a little slower,
+        # so that a window starting with a full bucket still sees at most calls
+        self.rate = (calls - burst) / period
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._updated = clock()
+
+    def acquire(self):
+        """
+        Waits until the next call is allowed.
+
+        Returns:
+        --------
+        wait : float
+            The number of seconds the caller was made to wait.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # the token is taken right away, so concurrent callers queue up
+            # behind it instead of all waking up at the same time
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+def _network_failure(error):
+    """
+    Whether an error, or one it was raised from, is a connection error
+    or a timeout. tweepy raises a TweepError without a response both for
+    those and for local failures that never recover, such as missing
+    credentials, and only the former are chained to a network error.
+    """
+    import requests
+    network_errors = (ConnectionError, TimeoutError, requests.exceptions.ConnectionError,
+                      requests.exceptions.Timeout)
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, network_errors):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class RetryPolicy:
+    """
+    Decides which failed API calls are retried, and how long to wait first.
+
+    Rate-limit errors (tweepy.RateLimitError, or HTTP 429) wait until the
+    rate-limit window resets, as told by the x-rate-limit-reset response
+    header, or for a whole window when the header is missing. Server errors
+    (HTTP 5xx) and network failures, connection errors and timeouts, also
+    when tweepy wraps them in a TweepError without a response, are retried
+    after an exponential backoff with full jitter. Any other error, such as
+    a suspended account or missing credentials, is raised right away.
+
+    Parameters:
+    -----------
+    retries : int
+        The number of times a call is retried before its error is raised,
+        5 by default. retries=0 disables retrying.
+    backoff : number
+        The longest wait, in seconds, before the first retry, 1 by default.
+        It doubles with each retry.
+    max_backoff : number
+        The longest wait between two retries of a failing call, 60 by default.
+    window : number
+        The wait after a rate-limit error without a reset time, 900 by default.
+    clock : callable
+        Optional: Returns the current Unix time in seconds, time.time by default.
+    sleep : callable
+        Optional: Waits for a number of seconds, time.sleep by default.
+    jitter : callable
+        Optional: Returns a random number between 0 and 1, random.random by default.
+    """
+
+    def __init__(self, retries=5, backoff=1.0, max_backoff=60.0, window=900,
+                 clock=time.time, sleep=time.sleep, jitter=random.random):
+        if not (isinstance(retries, int) and retries >= 0):
+            raise TypeError('Invalid argument: retries must be a non-negative integer.')
+        for name, value in [('backoff', backoff), ('max_backoff', max_backoff), ('window', window)]:
+            if not (isinstance(value, (int, float)) and value >= 0):
+                raise TypeError(f'Invalid argument: {name} must be a non-negative number.')
+
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.window = window
+        self._clock = clock
+        self._sleep = sleep
+        self._jitter = jitter
+
+    def delay(self, error, attempt):
+        """
+        Returns the seconds to wait before retrying a call that failed,
+        or None if it should not be retried.
+
+        Parameters:
+        -----------
+        error : Exception
+            The error raised by the call.
+        attempt : int
+            The number of retries already made for the call.
+        """
+        if attempt >= self.retries:
+            return None
+
+        import tweepy
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None)
+        if isinstance(error, tweepy.RateLimitError) or status == 429:
+            reset = getattr(response, 'headers', {}).get('x-rate-limit-reset')
+            if reset is None:
+                return self.window
+            # one extra second covers the difference between our clock and Twitter's
+            return max(0.0, float(reset) - self._clock()) + 1
+        transient = _network_failure(error) or (isinstance(error, tweepy.TweepError) and (status or 0) >= 500)
+        if transient:
+            return self._jitter() * min(self.max_backoff, self.backoff * 2 ** attempt)
+        return None
+
+    def call(self, func, *args, **kwargs):
+        """
+        Calls func(*args, **kwargs), retrying it as long as the policy allows.
+
+        Returns:
+        --------
+        result : object
+            What func returned.
+        """
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as error:
+                wait = self.delay(error, attempt)
+                if wait is None:
+                    raise
+            metrics.count('retries')
+            with metrics.stage('fetch.backoff'):
+                self._sleep(wait)
+            attempt += 1
@@ -0,0 +1,230 @@
+import json
+import os
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+_WORD = r'\w+'
+_HASHTAG = r'#\w+'
+# the NaT of int64 nanosecond times, which sorts first
+_NO_TIME = np.iinfo(np.int64).min
+
+
+def _encode_varints(values):
+    """
+    Encodes non-negative integers as varints: 7 bits per byte, low bits
+    first, the high bit set on every byte but the last of a value.
+
+    Returns:
+    --------
+    data : np.array
+        The uint8 encoding of all the values, one after the other.
+    n_bytes : np.array
+        The number of bytes of each value.
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    n_bytes = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 10):
+        n_bytes += values >= np.uint64(1 << (7 * k))
+
+    owners = np.repeat(np.arange(len(values)), n_bytes)
+    shifts = np.arange(len(owners)) - np.repeat(np.cumsum(n_bytes) - n_bytes, n_bytes)
+    data = (values[owners] >> (7 * shifts).astype(np.uint64)) & np.uint64(0x7F)
+    data[shifts < n_bytes[owners] - 1] |= np.uint64(0x80)
+    return data.astype(np.uint8), n_bytes
+
+
+def _decode_varints(data):
+    """Decodes the values encoded by _encode_varints."""
+    data = np.asarray(data, dtype=np.uint8)
+    ends = data < 0x80
+    values = np.cumsum(ends) - ends
+    starts = np.flatnonzero(np.concatenate([[True], ends[:-1]]))
+    shifts = np.arange(len(data)) - starts[values]
+    digits = (data & 0x7F).astype(np.uint64) << (7 * shifts).astype(np.uint64)
+    return np.add.reduceat(digits, starts) if len(data) else np.zeros(0, dtype=np.uint64)
+
+
+class TweetIndex:
+    """
+    An inverted index of tweets, answering keyword, hashtag and time
+    range queries without scanning the tweets.
+
+    The index maps each lowercased word and hashtag to the sorted
+    positions of the tweets using it, its posting list. Posting lists are
+    delta-encoded and stored as varints in one byte array, typically 1 to
+    2 bytes per posting, and only the lists used by a query are decoded.
+    The tweet times are kept sorted, so a time range is a binary search.
+    Queries return row positions, and select returns the matching rows
+    of the tweets the index was built from, ready for
+    tweet_sentiment_analysis, plot_hashtags or plot_timeline.
+
+        index = TweetIndex.build(tweets)
+        index.save('tweets.index.npz')
+        outage = index.select(tweets, words=['down', 'outage'], mode='or', start='2021-03-01')
+
+    Build indexes with TweetIndex.build, or TweetStore.index to keep one
+    next to a stored timeline.
+    """
+
+    def __init__(self, terms, offsets, postings, times, source=''):
+        self.terms = terms
+        self._offsets = offsets
+        self._postings = postings
+        self._times = times
+        self._time_order = np.argsort(times, kind='stable')
+        self._sorted_times = times[self._time_order]
+        self.source = source
+
+    def __len__(self):
+        """The number of tweets indexed."""
+        return len(self._times)
+
+    @classmethod
+    def build(cls, tweets, text_col='tweet', time_col='time'):
+        """
+        Indexes tweets, the output of get_tweets for instance.
+
+        Parameters:
+        -----------
+        tweets : dataframe
+            The tweets.
+        text_col : string
+            Optional: The column name of tweet text in dataframe, 'tweet' by default.
+        time_col : string
+            Optional: The column name of post time in dataframe, 'time' by default.
+            Times without a time zone are taken to be in UTC.
+
+        Returns:
+        --------
+        index : TweetIndex
+            The index, whose row positions are those of tweets.
+        """
+        if not isinstance(tweets, pd.DataFrame):
+            raise TypeError('Invalid argument type: tweets must be a dataframe.')
+        elif text_col not in tweets or time_col not in tweets:
+            raise KeyError(f"Input does not contain the columns '{text_col}' and '{time_col}'.")
+
+        texts = tweets[text_col].fillna('').astype(str).str.lower()
+        tokens = [texts.str.findall(_WORD), texts.str.findall(_HASHTAG)]
+        terms = list(chain.from_iterable(chain.from_iterable(tokens)))
+        rows = np.concatenate([np.repeat(np.arange(len(tweets)), token.str.len().to_numpy(dtype=np.int64))
+                               for token in tokens])
+
+        # posting lists sorted by term, then row, without repeated rows
+        codes, uniques = pd.factorize(np.array(terms, dtype=object))
+        uniques = np.asarray(uniques, dtype=str)
+        order = np.argsort(uniques, kind='stable')
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.arange(len(order))
+        pairs = np.unique(ranks[codes] * max(len(tweets), 1) + rows)
+        term_ids, rows = np.divmod(pairs, max(len(tweets), 1))
+
+        # each list starts with its first row, then the gaps between rows
+        deltas = rows.copy()
+        deltas[1:] -= np.where(term_ids[1:] == term_ids[:-1], rows[:-1], 0)
+        postings, n_bytes = _encode_varints(deltas)
+        offsets = np.zeros(len(order) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(term_ids, n_bytes, minlength=len(order)).astype(np.int64))
+
+        times = pd.to_datetime(tweets[time_col], utc=True).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        return cls(uniques[order], offsets, postings, times)
+
+    def _term_rows(self, term):
+        """Decodes the posting list of a term, empty when no tweet uses it."""
+        i = np.searchsorted(self.terms, term)
+        if i == len(self.terms) or self.terms[i] != term:
+            return np.zeros(0, dtype=np.int64)
+        deltas = _decode_varints(self._postings[self._offsets[i]:self._offsets[i + 1]])
+        return np.cumsum(deltas.astype(np.int64))
+
+    def _time_rows(self, start, end):
+        """The rows of the tweets sent in [start, end), sorted."""
+        def bound(time):
+            time = pd.Timestamp(time)
+            return (time.tz_localize('UTC') if time.tzinfo is None else time).value
+
+        lo = np.searchsorted(self._sorted_times, _NO_TIME, 'right') if start is None \
+            else np.searchsorted(self._sorted_times, bound(start))
+        hi = len(self._sorted_times) if end is None else np.searchsorted(self._sorted_times, bound(end))
+        return np.sort(self._time_order[lo:max(lo, hi)])
+
+    def search(self, words=None, hashtags=None, mode='and', start=None, end=None):
+        """
+        Finds the tweets using some words or hashtags, sent in a time range.
+
+        Parameters:
+        -----------
+        words : string or list
+            Optional: The words to look for, in any case.
+        hashtags : string or list
+            Optional: The hashtags to look for, with or without '#', in any case.
+        mode : string
+            Optional: 'and' to find the tweets using all the words and hashtags,
+            the default, or 'or' for those using any of them.
+        start : timestamp or string
+            Optional: Only the tweets sent from then. Times without a time zone are in UTC.
+        end : timestamp or string
+            Optional: Only the tweets sent before then.
+
+        Returns:
+        --------
+        rows : np.array
+            The sorted row positions of the matching tweets.
+        """
+        if mode not in ('and', 'or'):
+            raise ValueError("Invalid argument: mode must be 'and' or 'or'.")
+        words = [words] if isinstance(words, str) else list(words or [])
+        hashtags = [hashtags] if isinstance(hashtags, str) else list(hashtags or [])
+        if not all(isinstance(term, str) for term in words + hashtags):
+            raise TypeError('Invalid argument type: words and hashtags must be strings.')
+        terms = [word.lower() for word in words] + ['#' + tag.lower().lstrip('#') for tag in hashtags]
+
+        if terms:
+            # the shortest lists first, so that intersections shrink quickly
+            lists = sorted((self._term_rows(term) for term in terms), key=len)
+            rows = lists[0]
+            for other in lists[1:]:
+                rows = np.intersect1d(rows, other, assume_unique=True) if mode == 'and' else np.union1d(rows, other)
+        else:
+            rows = np.arange(len(self))
+        if start is not None or end is not None:
+            rows = np.intersect1d(rows, self._time_rows(start, end), assume_unique=True)
+        return rows
+
+    def select(self, tweets, **query):
+        """
+        Returns the rows of tweets matching a query, see search.
+
+        Parameters:
+        -----------
+        tweets : dataframe
+            The tweets the index was built from.
+
+        Returns:
+        --------
+        tweets : dataframe
+            The matching tweets, in their original order.
+        """
+        if not isinstance(tweets, pd.DataFrame):
+            raise TypeError('Invalid argument type: tweets must be a dataframe.')
+        elif len(tweets) != len(self):
+            raise ValueError('Invalid argument: tweets must be the dataframe the index was built from.')
+        return tweets.iloc[self.search(**query)]
+
+    def save(self, path):
+        """Writes the index to an .npz file."""
+        meta = json.dumps({'format': 1, 'source': self.source})
+        tmp_path = os.fspath(path) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, meta=np.array(meta), terms=self.terms, offsets=self._offsets,
+                     postings=self._postings, times=self._times)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Reads an index written by save."""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            return cls(data['terms'], data['offsets'], data['postings'], data['times'], meta['source'])
@@ -0,0 +1,199 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SentimentCache:
+    """
+    A cache of sentiment scores keyed by a hash of the tweet text.
+
+    Retweets, duplicates and re-runs score the same text over and over;
+    with a cache, every text after the first costs a lookup. Keys are a
+    hash of the normalized text (NFC Unicode form, surrounding whitespace
+    removed) together with a version string naming the analyzers, so
+    upgrading an analyzer never serves stale scores. Scores live in an
+    in-memory LRU tier and, optionally, in an SQLite file shared between
+    runs. Both tiers are bounded; the least recently used scores are
+    evicted first.
+
+    Parameters:
+    -----------
+    max_items : int
+        Optional: The number of scores kept in memory, 100000 by default.
+    path : string
+        Optional: An SQLite file for the on-disk tier. By default
+        scores are only kept in memory.
+    max_disk_items : int
+        Optional: The number of scores kept on disk, 10000000 by default.
+    """
+
+    def __init__(self, max_items=100000, path=None, max_disk_items=10000000):
+        if not (isinstance(max_items, int) and max_items >= 0):
+            raise TypeError('Invalid argument: max_items must be a non-negative integer.')
+        if not (path is None or isinstance(path, (str, os.PathLike))):
+            raise TypeError('Invalid argument type: path must be a path or None.')
+        if not (isinstance(max_disk_items, int) and max_disk_items > 0):
+            raise TypeError('Invalid argument: max_disk_items must be a positive integer.')
+
+        self.max_items = max_items
+        self.max_disk_items = max_disk_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'memory_hits': 0, 'disk_hits': 0}
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(os.fspath(path), check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS scores '
+                             '(key BLOB PRIMARY KEY, scores BLOB NOT NULL, used REAL NOT NULL)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS scores_used ON scores (used)')
+            self._db.commit()
+            # the rows are counted once here, then kept count of as they are added and evicted
+            self._disk_rows = self._db.execute('SELECT COUNT(*) FROM scores').fetchone()[0]
+
+    @staticmethod
+    def key(text, version):
+        """Returns the cache key of a text scored by the analyzers named by version."""
+        text = unicodedata.normalize('NFC', text).strip()
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(version.encode())
+        digest.update(b'\0')
+        digest.update(text.encode('utf-8', 'surrogatepass'))
+        return digest.digest()
+
+    def lookup(self, texts, version, width):
+        """
+        Looks up the scores of several texts.
+
+        Parameters:
+        -----------
+        texts : sequence
+            The texts to look up.
+        version : string
+            The name and version of the analyzers that scored them.
+        width : int
+            The number of scores per text.
+
+        Returns:
+        --------
+        scores : np.array
+            A (len(texts), width) array, with the rows of cache misses left as NaN.
+        missing : np.array
+            A boolean array marking the cache misses.
+        """
+        keys = [self.key(text, version) for text in texts]
+        scores = np.full((len(keys), width), np.nan)
+        missing = np.ones(len(keys), dtype=bool)
+        disk_keys = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                found = self._memory.get(key)
+                if found is not None:
+                    self._memory.move_to_end(key)
+                    scores[i] = found
+                    missing[i] = False
+                elif self._db is not None:
+                    disk_keys.setdefault(key, []).append(i)
+            n_memory = len(keys) - int(missing.sum())
+
+            n_disk = 0
+            if disk_keys:
+                now = time.time()
+                found_keys = []
+                for key, blob in self._select(list(disk_keys)):
+                    row = np.frombuffer(blob, dtype=np.float64)
+                    scores[disk_keys[key]] = row
+                    missing[disk_keys[key]] = False
+                    n_disk += len(disk_keys[key])
+                    found_keys.append(key)
+                    self._remember(key, row)
+                self._db.executemany('UPDATE scores SET used = ? WHERE key = ?', [(now, key) for key in found_keys])
+                self._db.commit()
+
+            self._stats['memory_hits'] += n_memory
+            self._stats['disk_hits'] += n_disk
+            self._stats['hits'] += n_memory + n_disk
+            self._stats['misses'] += int(missing.sum())
+        return scores, missing
+
+    def _select(self, keys):
+        """Reads the rows of keys from the disk tier, in batches below SQLite's parameter limit."""
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            yield from self._db.execute('SELECT key, scores FROM scores WHERE key IN (%s)' % ','.join('?' * len(batch)),
+                                        batch)
+
+    def _remember(self, key, row):
+        """Adds scores to the memory tier, evicting the least recently used ones beyond max_items."""
+        if self.max_items == 0:
+            return
+        self._memory[key] = row
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def store(self, texts, scores, version):
+        """
+        Adds the scores of several texts to the cache.
+
+        Parameters:
+        -----------
+        texts : sequence
+            The texts that were scored.
+        scores : np.array
+            A (len(texts), width) array of their scores.
+        version : string
+            The name and version of the analyzers that scored them.
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        keys = [self.key(text, version) for text in texts]
+        with self._lock:
+            for key, row in zip(keys, scores):
+                self._remember(key, row.copy())
+            if self._db is not None and keys:
+                now = time.time()
+                rows = [(key, row.tobytes(), now) for key, row in zip(keys, scores)]
+                inserted = self._db.executemany('INSERT OR IGNORE INTO scores VALUES (?, ?, ?)', rows).rowcount
+                if inserted < len(rows):
+                    # some keys were stored already, by another run or process
+                    self._db.executemany('UPDATE scores SET scores = ?, used = ? WHERE key = ?',
+                                         [(blob, used, key) for key, blob, used in rows])
+                self._disk_rows += inserted
+                excess = self._disk_rows - self.max_disk_items
+                if excess > 0:
+                    self._disk_rows -= self._db.execute('DELETE FROM scores WHERE key IN '
+                                                        '(SELECT key FROM scores ORDER BY used, rowid LIMIT ?)',
+                                                        (excess,)).rowcount
+                self._db.commit()
+
+    @property
+    def stats(self):
+        """
+        The hit and miss counts since the cache was created, as a dict with
+        keys 'hits', 'misses', 'memory_hits', 'disk_hits' and 'hit_rate'.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Removes every score from both tiers; the statistics are kept."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM scores')
+                self._db.commit()
+                self._disk_rows = 0
+
+    def close(self):
+        """Closes the on-disk tier."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,231 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+
+def _hash_items(items, seed):
+    """Hashes items to uint64 values, the same in every process for a given seed."""
+    return pd.util.hash_array(np.asarray(items, dtype=object), hash_key=f'pytweet{seed:09d}')
+
+
+class CountMinSketch:
+    """
+    Approximate counts of a stream of items in a fixed amount of memory,
+    a table of depth rows of width counters.
+
+    Each item is added to one counter per row, chosen by hashing it, and
+    its count is estimated by the smallest of its counters. Estimates
+    never fall below the true count, and with N the total count added,
+    each one is above it by no more than epsilon * N = e / width * N
+    with probability at least 1 - delta = 1 - exp(-depth).
+
+    Sketches built with the same width, depth and seed, on different
+    shards or workers, can be added together.
+
+    Parameters:
+    -----------
+    width : int
+        Optional: The number of counters per row, 16384 by default,
+        for epsilon = 0.017%.
+    depth : int
+        Optional: The number of rows, 4 by default, for delta = 1.8%.
+        The table takes width * depth * 8 bytes, 512 KB by default.
+    seed : int
+        Optional: The seed of the hash functions, 0 by default.
+    """
+
+    def __init__(self, width=16384, depth=4, seed=0):
+        if not (isinstance(width, int) and width > 0 and isinstance(depth, int) and depth > 0):
+            raise TypeError('Invalid argument: width and depth must be positive integers.')
+        elif not (isinstance(seed, int) and 0 <= seed < 10 ** 9):
+            raise TypeError('Invalid argument: seed must be a non-negative integer below 10 ** 9.')
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.total = 0
+        self._table = np.zeros((depth, width), dtype=np.int64)
+
+    @classmethod
+    def from_error(cls, epsilon, delta, seed=0):
+        """Returns the smallest sketch overestimating by at most epsilon * N with probability 1 - delta."""
+        if not (0 < epsilon < 1 and 0 < delta < 1):
+            raise ValueError('Invalid argument: epsilon and delta must be between 0 and 1.')
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)), seed)
+
+    @property
+    def epsilon(self):
+        """The relative error bound of the estimates, e / width."""
+        return math.e / self.width
+
+    @property
+    def delta(self):
+        """The probability that an estimate exceeds the error bound, exp(-depth)."""
+        return math.exp(-self.depth)
+
+    def _columns(self, items):
+        """The counter of each item in each row, a (depth, len(items)) array."""
+        hashes = _hash_items(items, self.seed)
+        # depth hash functions from two halves of one hash
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = (hashes >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((low + rows * high) % np.uint64(self.width)).astype(np.int64)
+
+    def add(self, items, counts=None):
+        """
+        Adds items to the sketch.
+
+        Parameters:
+        -----------
+        items : sequence
+            The items, strings for instance.
+        counts : sequence
+            Optional: The non-negative count of each item, 1 by default.
+        """
+        items = np.asarray(items, dtype=object)
+        counts = np.ones(len(items), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        if len(counts) != len(items) or (counts < 0).any():
+            raise ValueError('Invalid argument: counts must be one non-negative count per item.')
+        columns = self._columns(items)
+        for row in range(self.depth):
+            self._table[row] += np.bincount(columns[row], counts, minlength=self.width).astype(np.int64)
+        self.total += int(counts.sum())
+
+    def estimate(self, items):
+        """Returns the estimated count of each item, an int64 array."""
+        columns = self._columns(np.asarray(items, dtype=object))
+        return self._table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def _check_compatible(self, other):
+        if not isinstance(other, type(self)):
+            raise TypeError(f'Invalid argument type: other must be a {type(self).__name__}.')
+        elif (other.width, other.depth, other.seed) != (self.width, self.depth, self.seed):
+            raise ValueError('Invalid argument: sketches must have the same width, depth and seed to be merged.')
+
+    def merge(self, other):
+        """Adds the counts of another sketch to this one, and returns this one."""
+        self._check_compatible(other)
+        self._table += other._table
+        self.total += other.total
+        return self
+
+    def __iadd__(self, other):
+        return self.merge(other)
+
+    def __add__(self, other):
+        return type(self)(self.width, self.depth, self.seed).merge(self).merge(other)
+
+
+class HeavyHitters:
+    """
+    The k most frequent items of a stream, approximately, in a fixed
+    amount of memory: a CountMinSketch and a list of k candidates.
+
+    After each batch of items the candidates, and the items of the batch,
+    are ranked by their estimated count and the top k kept. With N the
+    total count added, every item counted more than N / k + epsilon * N
+    times is kept, with probability at least 1 - delta, and the counts
+    reported are estimates of the sketch, never below the true counts and
+    above them by at most epsilon * N, see CountMinSketch. Items near the
+    bottom of the list may be missing or in the wrong order when their
+    counts are within epsilon * N of each other.
+
+    Summaries built with the same parameters can be added together.
+
+    Parameters:
+    -----------
+    k : int
+        Optional: The number of items kept, 15 by default.
+    width : int
+        Optional: The width of the sketch, 16384 by default.
+    depth : int
+        Optional: The depth of the sketch, 4 by default.
+    seed : int
+        Optional: The seed of the hash functions, 0 by default.
+    """
+
+    def __init__(self, k=15, width=16384, depth=4, seed=0):
+        if not (isinstance(k, int) and k > 0):
+            raise TypeError('Invalid argument: k must be a positive integer.')
+        self.k = k
+        self.sketch = CountMinSketch(width, depth, seed)
+        self._items = np.zeros(0, dtype=object)
+        self._counts = np.zeros(0, dtype=np.int64)
+
+    @property
+    def total(self):
+        """The total count added."""
+        return self.sketch.total
+
+    def update(self, items, counts=None):
+        """
+        Adds a batch of items.
+
+        Parameters:
+        -----------
+        items : sequence
+            The items, strings for instance.
+        counts : sequence
+            Optional: The non-negative count of each item, 1 by default.
+
+        Returns:
+        --------
+        heavy_hitters : HeavyHitters
+            The updated summary itself.
+        """
+        items = np.asarray(items, dtype=object)
+        counts = np.ones(len(items), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        if len(counts) != len(items):
+            raise ValueError('Invalid argument: counts must be one count per item.')
+        # each distinct item of the batch is hashed once
+        codes, uniques = pd.factorize(items)
+        batch_counts = np.bincount(codes, counts, minlength=len(uniques)).astype(np.int64)
+        self.sketch.add(uniques, batch_counts)
+        self._keep(np.concatenate([self._items, np.asarray(uniques, dtype=object)]))
+        return self
+
+    def _keep(self, candidates):
+        """Keeps the k candidates with the highest estimated counts."""
+        candidates = pd.unique(candidates)
+        estimates = self.sketch.estimate(candidates)
+        if len(candidates) > self.k:
+            # ties are broken by the order the candidates were first seen in
+            top = np.argsort(-estimates, kind='stable')[:self.k]
+            candidates, estimates = candidates[top], estimates[top]
+        self._items = np.asarray(candidates, dtype=object)
+        self._counts = estimates
+
+    def top(self, n=None):
+        """
+        Returns the most frequent items.
+
+        Parameters:
+        -----------
+        n : int
+            Optional: The number of items returned, at most k, all k by default.
+
+        Returns:
+        --------
+        counts : series
+            The estimated count of each item, indexed by item, most frequent first.
+        """
+        order = np.argsort(-self._counts, kind='stable')[:n]
+        return pd.Series(self._counts[order], index=pd.Index(self._items[order], dtype=object), name='count')
+
+    def merge(self, other):
+        """Adds another summary to this one, and returns this one."""
+        if not isinstance(other, HeavyHitters):
+            raise TypeError('Invalid argument type: other must be a HeavyHitters.')
+        elif other.k != self.k:
+            raise ValueError('Invalid argument: summaries must keep the same number of items to be merged.')
+        self.sketch.merge(other.sketch)
+        self._keep(np.concatenate([self._items, other._items]))
+        return self
+
+    def __iadd__(self, other):
+        return self.merge(other)
+
+    def __add__(self, other):
+        sketch = self.sketch
+        return HeavyHitters(self.k, sketch.width, sketch.depth, sketch.seed).merge(self).merge(other)
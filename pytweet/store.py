@@ -0,0 +1,263 @@
+import json
+import os
+import re
+
+import pandas as pd
+
+from pytweet.search import TweetIndex
+
+
+class TweetStore:
+    """
+    A local store of downloaded timelines that can be refreshed incrementally.
+
+    Each handle's tweets are kept as Parquet part files in their own
+    directory, and the highest tweet id seen per handle is kept in a
+    JSON sidecar file, `cursors.json`. Refreshes only ask Twitter for
+    tweets newer than that id and append them as a new part file, so the
+    tweets already stored are never downloaded again. Timelines with and
+    without replies are stored apart, under different keys.
+
+    Once a handle has more than max_parts part files, they are merged
+    into one, so that a handle refreshed every hour does not pile up
+    thousands of small files for load to read.
+
+    Parameters:
+    -----------
+    directory : string
+        The directory holding the store, created if it does not exist.
+    max_parts : int
+        Optional: The number of part files a handle may have before they
+        are merged, 24 by default.
+    """
+
+    def __init__(self, directory, max_parts=24):
+        if not isinstance(directory, (str, os.PathLike)):
+            raise TypeError('Invalid argument type: directory must be a path.')
+        elif not (isinstance(max_parts, int) and max_parts > 0):
+            raise TypeError('Invalid argument: max_parts must be a positive integer.')
+        self.directory = os.fspath(directory)
+        self.max_parts = max_parts
+        os.makedirs(self.directory, exist_ok=True)
+        self._cursor_path = os.path.join(self.directory, 'cursors.json')
+
+    @staticmethod
+    def key(handle, include_replies=False):
+        """
+        Returns the store key of a handle: '@BrunoMars' and 'brunomars' are
+        the same account, and its timeline with replies is kept apart.
+        """
+        return re.sub(r'\W', '_', handle.lstrip('@').lower()) + ('-replies' if include_replies else '')
+
+    def _parts(self, key):
+        """The part files of a key, oldest first."""
+        handle_dir = os.path.join(self.directory, key)
+        return sorted(os.listdir(handle_dir)) if os.path.isdir(handle_dir) else []
+
+    def _cursors(self):
+        """Reads the cursor file, a mapping of handle key to the highest tweet id stored."""
+        if not os.path.exists(self._cursor_path):
+            return {}
+        with open(self._cursor_path) as f:
+            return json.load(f)
+
+    def since_id(self, handle, include_replies=False):
+        """
+        Returns the highest tweet id stored for a handle, or None
+        if nothing has been stored for it yet.
+        """
+        return self._cursors().get(self.key(handle, include_replies))
+
+    def append(self, handle, tweets, include_replies=False):
+        """
+        Appends newly downloaded tweets to a handle's dataset and moves
+        its cursor to the highest id among them.
+
+        Parameters:
+        -----------
+        handle : string
+            The Twitter handle of the user.
+        tweets : dataframe
+            The new tweets, with columns 'id', 'time' and 'tweet'.
+        include_replies : boolean
+            Optional: Whether the tweets were downloaded with the user's
+            replies, False by default.
+        """
+        if len(tweets) == 0:
+            return
+        key = self.key(handle, include_replies)
+        newest = int(tweets['id'].max())
+        handle_dir = os.path.join(self.directory, key)
+        os.makedirs(handle_dir, exist_ok=True)
+        # part files are named after their newest tweet, so they sort by time
+        tweets[['id', 'time', 'tweet']].to_parquet(os.path.join(handle_dir, f'part-{newest:020d}.parquet'),
+                                                   index=False)
+
+        # the cursor only moves once the tweets are safely on disk
+        cursors = self._cursors()
+        cursors[key] = max(newest, cursors.get(key, newest))
+        tmp_path = self._cursor_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(cursors, f)
+        os.replace(tmp_path, self._cursor_path)
+
+        if len(self._parts(key)) > self.max_parts:
+            self._compact(key)
+
+    def _read(self, key):
+        """Reads the tweets of a key, newest first, without repeated ids."""
+        handle_dir = os.path.join(self.directory, key)
+        parts = self._parts(key)
+        if not parts:
+            return pd.DataFrame(columns=['id', 'time', 'tweet'])
+        tweets = pd.concat([pd.read_parquet(os.path.join(handle_dir, part)) for part in reversed(parts)],
+                           ignore_index=True)
+        # a refresh interrupted before its cursor was saved downloads its tweets again
+        return tweets.drop_duplicates('id').sort_values('id', ascending=False, ignore_index=True)
+
+    def _compact(self, key):
+        """Merges the part files of a key into one, named after the newest part."""
+        handle_dir = os.path.join(self.directory, key)
+        parts = self._parts(key)
+        tweets = self._read(key)
+        tmp_path = os.path.join(handle_dir, 'compact.tmp')
+        tweets.to_parquet(tmp_path, index=False)
+        # the newest part is replaced by all the tweets before the others are
+        # removed, so an interrupted compaction only leaves duplicates behind
+        os.replace(tmp_path, os.path.join(handle_dir, parts[-1]))
+        for part in parts[:-1]:
+            os.remove(os.path.join(handle_dir, part))
+
+    def load(self, handle, include_replies=False):
+        """
+        Reads every tweet stored for a handle.
+
+        Returns:
+        --------
+        tweets : dataframe
+            A dataframe with columns 'id', 'time' and 'tweet', newest tweets first.
+        """
+        return self._read(self.key(handle, include_replies))
+
+    def index(self, handle, include_replies=False):
+        """
+        Returns a TweetIndex of the tweets load returns for a handle. The
+        index is saved next to the handle's tweets, as `<handle>.index.npz`,
+        and only rebuilt once tweets were appended since.
+
+            tweets = store.load('@BrunoMars')
+            store.index('@BrunoMars').select(tweets, hashtags='24kmagic')
+
+        Returns:
+        --------
+        index : TweetIndex
+            The index of the handle's tweets.
+        """
+        key = self.key(handle, include_replies)
+        parts = self._parts(key)
+        path = os.path.join(self.directory, f'{key}.index.npz')
+        if os.path.exists(path):
+            index = TweetIndex.load(path)
+            if index.source == '\n'.join(parts):
+                return index
+        index = TweetIndex.build(self._read(key))
+        index.source = '\n'.join(parts)
+        index.save(path)
+        return index
+
+
+class FetchCheckpoint:
+    """
+    The progress of one long fetch, saved to disk so that an interrupted
+    fetch resumes where it stopped instead of starting over.
+
+    Every downloaded page is written to its own Parquet file, then the
+    paging cursor (the max_id of the next request) and the number of
+    tweets downloaded are saved in `state.json`, replacing the previous
+    state atomically. A fetch given the same checkpoint again reads the
+    saved pages back and continues from the cursor. The checkpoint is
+    cleared once the fetch completes.
+
+    Parameters:
+    -----------
+    directory : string
+        The directory holding the checkpoint, created if it does not exist.
+    """
+
+    def __init__(self, directory):
+        if not isinstance(directory, (str, os.PathLike)):
+            raise TypeError('Invalid argument type: directory must be a path.')
+        self.directory = os.fspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self._state_path = os.path.join(self.directory, 'state.json')
+
+    def state(self):
+        """
+        Returns the saved progress, a dict with the 'fetch' it belongs to,
+        the 'max_id' cursor, 'n_downloaded' and the 'pages' saved, or None
+        when nothing has been saved.
+        """
+        if not os.path.exists(self._state_path):
+            return None
+        with open(self._state_path) as f:
+            return json.load(f)
+
+    def resume(self, fetch):
+        """
+        Returns the saved progress of a fetch and its pages.
+
+        Parameters:
+        -----------
+        fetch : dict
+            The arguments identifying the fetch, such as the handle.
+
+        Returns:
+        --------
+        max_id : int
+            The cursor to continue paging from, None for a new fetch.
+        n_downloaded : int
+            The number of tweets already downloaded.
+        pages : list
+            The pages already downloaded, as dataframes, newest first.
+        """
+        state = self.state()
+        if state is None:
+            return None, 0, []
+        if state['fetch'] != fetch:
+            raise ValueError(f"The checkpoint in {self.directory} belongs to another fetch: {state['fetch']}.")
+        pages = [pd.read_parquet(os.path.join(self.directory, page)) for page in state['pages']]
+        return state['max_id'], state['n_downloaded'], pages
+
+    def save(self, fetch, page, max_id, n_downloaded):
+        """
+        Saves a newly downloaded page and moves the cursor past it.
+
+        Parameters:
+        -----------
+        fetch : dict
+            The arguments identifying the fetch, such as the handle.
+        page : dataframe
+            The page, with columns 'id', 'time' and 'tweet'.
+        max_id : int
+            The max_id of the next request.
+        n_downloaded : int
+            The number of tweets downloaded, including this page.
+        """
+        state = self.state() or {'pages': []}
+        name = f'page-{len(state["pages"]):06d}.parquet'
+        page.to_parquet(os.path.join(self.directory, name), index=False)
+
+        # the state only points at the page once it is safely on disk
+        state = {'fetch': fetch, 'max_id': max_id, 'n_downloaded': n_downloaded, 'pages': state['pages'] + [name]}
+        tmp_path = self._state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._state_path)
+
+    def clear(self):
+        """Deletes the saved progress and pages."""
+        if os.path.exists(self._state_path):
+            os.remove(self._state_path)
+        for name in os.listdir(self.directory):
+            if name.startswith('page-') and name.endswith('.parquet'):
+                os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,332 @@
+import re
+import string
+from itertools import chain
+
+import numpy as np
+
+# the properties of a token, one per row of the token table
+_NEVER, _SO_THIS, _AT_VERY, _LEAST, _BUT, _KIND, _OF = range(7)
+
+
+# the first NLTK release whose VADER rules CompiledVader reproduces
+MIN_NLTK_VERSION = (3, 6)
+
+
+def _check_nltk_version():
+    """Checks that the installed NLTK scores tweets with the VADER rules compiled here."""
+    import nltk
+    version = tuple(int(part) for part in re.findall(r'\d+', nltk.__version__)[:2])
+    if version < MIN_NLTK_VERSION:
+        raise ImportError(f"CompiledVader reproduces the VADER of NLTK {'.'.join(map(str, MIN_NLTK_VERSION))} "
+                          f"or newer, not {nltk.__version__}. Upgrade nltk or use the 'vader' scorer.")
+
+
+class CompiledVader:
+    """
+    An array-backed implementation of NLTK's VADER sentiment analyzer,
+    giving the same neg, neu, pos and compound scores as
+    SentimentIntensityAnalyzer.polarity_scores, several times faster.
+
+    NLTK scores one tweet at a time, with a dictionary lookup, lowercasing
+    and punctuation handling for every token and its neighbours. Here the
+    whitespace tokens of a whole batch of tweets are interned into a table
+    of token ids, whose lexicon valence, booster, negation and
+    capitalization properties are worked out once per distinct token and
+    kept in NumPy arrays. VADER's rules, which only look up to three
+    tokens back, are then applied to every token of the batch at once
+    with shifted arrays, and the scores are summed per tweet with
+    bincount, in the same order as NLTK, so that the floating point
+    results are identical.
+
+    The rare tweets containing one of VADER's special-case idioms, such as
+    'the bomb' or 'kiss of death', are left to NLTK.
+
+    The rules are those of NLTK 3.6 and newer. NLTK 3.5 only gave 'but'
+    its weight in lowercase or capitals, not as 'But', so older versions
+    are refused rather than scored differently.
+
+    Parameters:
+    -----------
+    analyzer : nltk.sentiment.vader.SentimentIntensityAnalyzer
+        The analyzer whose lexicon and constants are compiled, and which
+        scores the tweets with idioms.
+    max_tokens : int
+        Optional: The number of distinct tokens remembered between batches,
+        1000000 by default. The table is emptied when it grows beyond that.
+    """
+
+    def __init__(self, analyzer, max_tokens=1000000):
+        if not (isinstance(max_tokens, int) and max_tokens > 0):
+            raise TypeError('Invalid argument: max_tokens must be a positive integer.')
+        _check_nltk_version()
+        self.analyzer = analyzer
+        self.max_tokens = max_tokens
+        constants = analyzer.constants
+        self._lexicon = analyzer.lexicon
+        self._boosters = constants.BOOSTER_DICT
+        self._negations = constants.NEGATE
+        self._c_incr = constants.C_INCR
+        self._n_scalar = constants.N_SCALAR
+        self._b_decr = constants.B_DECR
+        self._punctuation = string.punctuation
+        self._punctuation_table = str.maketrans('', '', string.punctuation)
+        self._punc_list = frozenset(constants.PUNC_LIST)
+
+        # idioms and booster bigrams are matched on the tokens as they are, not lowercased
+        self._idioms = [tuple(idiom.split()) for idiom in constants.SPECIAL_CASE_IDIOMS]
+        self._bigram_boosters = [tuple(booster.split()) for booster in self._boosters if ' ' in booster]
+        self._special_words = sorted({word for words in self._idioms + self._bigram_boosters for word in words})
+        self._clear()
+
+    def _clear(self):
+        """Empties the token table."""
+        # raw whitespace token -> token id, -1 for the single characters VADER drops
+        self._ids = {}
+        # token, with leading or trailing punctuation removed as VADER does -> token id
+        self._token_ids = {}
+        self._valence = np.zeros(0)
+        self._in_lexicon = np.zeros(0, dtype=bool)
+        self._booster = np.zeros(0)
+        self._is_booster = np.zeros(0, dtype=bool)
+        self._is_upper = np.zeros(0, dtype=bool)
+        self._negated = np.zeros(0, dtype=bool)
+        self._flags = np.zeros((0, 7), dtype=bool)
+        self._special = np.zeros(0, dtype=np.int16)
+
+    def _normalize(self, token):
+        """
+        Strips the leading or trailing punctuation of a token as NLTK's SentiText
+        does: only when it is one of VADER's punctuation marks, on one side
+        only, and what remains is a word of two characters or more without
+        any punctuation.
+        """
+        stripped = token.lstrip(self._punctuation)
+        if len(stripped) == len(token):
+            stripped = token.rstrip(self._punctuation)
+            mark = token[len(stripped):]
+        else:
+            if stripped.rstrip(self._punctuation) != stripped:
+                return token
+            mark = token[:len(token) - len(stripped)]
+        if mark and mark in self._punc_list and len(stripped) > 1 \
+                and stripped.translate(self._punctuation_table) == stripped:
+            return stripped
+        return token
+
+    def _compile(self, raw_tokens):
+        """Adds new whitespace tokens to the token table."""
+        new_tokens = []
+        for raw in raw_tokens:
+            if raw in self._ids:
+                continue
+            if len(raw) <= 1:
+                self._ids[raw] = -1
+                continue
+            token = self._normalize(raw)
+            token_id = self._token_ids.get(token)
+            if token_id is None:
+                token_id = self._token_ids[token] = len(self._token_ids)
+                new_tokens.append(token)
+            self._ids[raw] = token_id
+        if not new_tokens:
+            return
+
+        lexicon = self._lexicon
+        boosters = self._boosters
+        lowered = [token.lower() for token in new_tokens]
+        special = {word: i + 1 for i, word in enumerate(self._special_words)}
+        self._valence = np.concatenate([self._valence, [lexicon.get(word, 0.0) for word in lowered]])
+        self._in_lexicon = np.concatenate([self._in_lexicon, [word in lexicon for word in lowered]])
+        self._booster = np.concatenate([self._booster, [boosters.get(word, 0.0) for word in lowered]])
+        self._is_booster = np.concatenate([self._is_booster, [word in boosters for word in lowered]])
+        self._is_upper = np.concatenate([self._is_upper, [token.isupper() for token in new_tokens]])
+        self._negated = np.concatenate([self._negated, [word in self._negations or "n't" in word
+                                                        for word in lowered]])
+        flags = [(token == 'never', token in ('so', 'this'), word in ('at', 'very'), word == 'least',
+                  word == 'but', word == 'kind', word == 'of') for token, word in zip(new_tokens, lowered)]
+        self._flags = np.concatenate([self._flags, np.array(flags, dtype=bool).reshape(-1, 7)])
+        self._special = np.concatenate([self._special, [special.get(token, 0) for token in new_tokens]])
+
+    def polarity_scores(self, texts):
+        """
+        Scores a batch of tweets.
+
+        Parameters:
+        -----------
+        texts : sequence
+            The tweet texts.
+
+        Returns:
+        --------
+        scores : np.array
+            A (len(texts), 4) float array of the neg, neu, pos and compound
+            scores of each tweet, rounded as NLTK rounds them.
+        """
+        texts = list(texts)
+        n_texts = len(texts)
+        scores = np.zeros((n_texts, 4))
+        if n_texts == 0:
+            return scores
+        if not all(isinstance(text, str) for text in texts):
+            # NLTK's handling of other objects, errors included, is kept as it is
+            return np.array([self._nltk_scores(text) for text in texts]).reshape(-1, 4)
+
+        if len(self._token_ids) > self.max_tokens:
+            self._clear()
+        split = [text.split() for text in texts]
+        raw_tokens = list(chain.from_iterable(split))
+        self._compile(raw_tokens)
+        ids = np.fromiter(map(self._ids.__getitem__, raw_tokens), dtype=np.int64, count=len(raw_tokens))
+        docs = np.repeat(np.arange(n_texts), np.fromiter(map(len, split), dtype=np.int64, count=n_texts))
+        kept = ids >= 0
+        ids = ids[kept]
+        docs = docs[kept]
+
+        sentiments, fallback = self._sentiments(ids, docs, n_texts)
+        scores[:] = self._score_valence(sentiments, docs, texts)
+        for i in np.flatnonzero(fallback):
+            scores[i] = self._nltk_scores(texts[i])
+        return scores
+
+    def _nltk_scores(self, text):
+        """Scores one tweet with NLTK."""
+        score = self.analyzer.polarity_scores(text)
+        return score['neg'], score['neu'], score['pos'], score['compound']
+
+    def _sentiments(self, ids, docs, n_texts):
+        """
+        Computes the valence of every token, as SentimentIntensityAnalyzer.polarity_scores
+        does before summing them, and which tweets contain an idiom.
+        """
+        n_tokens = len(ids)
+        doc_lengths = np.bincount(docs, minlength=n_texts)
+        starts = np.cumsum(doc_lengths) - doc_lengths
+        positions = np.arange(n_tokens) - starts[docs]
+        ends = positions == doc_lengths[docs] - 1
+
+        # the tweets with some but not all of their tokens in capitals
+        n_upper = np.bincount(docs, weights=self._is_upper[ids], minlength=n_texts)
+        cap_diff = ((0 < doc_lengths - n_upper) & (doc_lengths - n_upper < doc_lengths))[docs]
+
+        # properties of the token k places back, or after, within the same tweet
+        def back(values, k):
+            shifted = np.empty_like(values)
+            shifted[k:] = values[:-k] if k < n_tokens else values[:0]
+            shifted[:k] = values[:k] if k <= n_tokens else values
+            return shifted
+
+        prev_ids = [back(ids, k) for k in (1, 2, 3)]
+        next_ids = np.append(ids[1:], 0) if n_tokens else ids
+
+        flags = self._flags
+        valence = self._valence[ids].copy()
+        in_lexicon = self._in_lexicon[ids]
+        is_upper = self._is_upper
+
+        capitals = is_upper[ids] & cap_diff
+        valence = np.where(capitals, np.where(valence > 0, valence + self._c_incr, valence - self._c_incr), valence)
+
+        so_this = flags[:, _SO_THIS]
+        never = flags[:, _NEVER]
+        for k in range(3):
+            prev = prev_ids[k]
+            scored = in_lexicon & (positions > k) & ~self._in_lexicon[prev]
+
+            # boosters and dampeners before the word, weaker the further back they are
+            scalar = np.where(valence < 0, -self._booster[prev], self._booster[prev])
+            capital_booster = self._is_booster[prev] & is_upper[prev] & cap_diff
+            scalar = np.where(capital_booster,
+                              np.where(valence > 0, scalar + self._c_incr, scalar - self._c_incr), scalar)
+            if k > 0:
+                scalar = np.where(scalar != 0, scalar * (0.95 if k == 1 else 0.9), scalar)
+            valence = np.where(scored, valence + scalar, valence)
+
+            # negations, and 'never so' or 'never this', which intensify instead
+            if k == 0:
+                intensified = np.zeros(n_tokens, dtype=bool)
+            elif k == 1:
+                intensified = never[prev_ids[1]] & so_this[prev_ids[0]]
+            else:
+                intensified = (never[prev_ids[2]] & so_this[prev_ids[1]]) | so_this[prev_ids[0]]
+            negated = ~intensified & self._negated[prev]
+            valence = np.where(scored & intensified, valence * (1.5 if k == 1 else 1.25), valence)
+            valence = np.where(scored & negated, valence * self._n_scalar, valence)
+
+            if k == 2:
+                # booster bigrams such as 'kind of' three and two tokens back, or two and one
+                bigram = np.zeros(n_tokens, dtype=bool)
+                for first, second in self._bigram_boosters:
+                    first = self._special_words.index(first) + 1
+                    second = self._special_words.index(second) + 1
+                    bigram |= (self._special[prev_ids[2]] == first) & (self._special[prev_ids[1]] == second)
+                    bigram |= (self._special[prev_ids[1]] == first) & (self._special[prev_ids[0]] == second)
+                valence = np.where(scored & bigram, valence + self._b_decr, valence)
+
+        # 'least' negates the word after it, except in 'at least' and 'very least'
+        prev, prev2 = prev_ids[0], prev_ids[1]
+        least = (positions > 0) & flags[prev, _LEAST] & ~self._in_lexicon[prev]
+        least &= (positions == 1) | ~flags[prev2, _AT_VERY]
+        valence = np.where(in_lexicon & least, valence * self._n_scalar, valence)
+
+        # boosters, and 'kind' in 'kind of', have no valence of their own
+        kind_of = flags[ids, _KIND] & ~ends & flags[next_ids, _OF]
+        valence = np.where(in_lexicon & ~self._is_booster[ids] & ~kind_of, valence, 0.0)
+
+        # NLTK scores every occurrence of a token in a tweet as its first one
+        _, first, occurrences = np.unique(docs * (len(self._token_ids) + 1) + ids,
+                                          return_index=True, return_inverse=True)
+        sentiments = valence[first][occurrences.ravel()]
+
+        # words after the first 'but' count more, and those before it less
+        is_but = flags[ids, _BUT]
+        but_positions = np.full(n_texts, -1, dtype=np.int64)
+        but_positions[docs[is_but][::-1]] = positions[is_but][::-1]
+        but_position = but_positions[docs]
+        has_but = but_position >= 0
+        sentiments = np.where(has_but & (positions < but_position), sentiments * 0.5,
+                              np.where(has_but & (positions > but_position), sentiments * 1.5, sentiments))
+
+        # tweets with an idiom are left to NLTK
+        fallback = np.zeros(n_texts, dtype=bool)
+        special = self._special[ids]
+        for idiom in self._idioms:
+            codes = [self._special_words.index(word) + 1 for word in idiom]
+            start = np.arange(n_tokens - len(idiom) + 1)
+            if len(start) == 0:
+                continue
+            match = np.ones(len(start), dtype=bool)
+            for offset, code in enumerate(codes):
+                match &= special[start + offset] == code
+            match &= docs[start] == docs[start + len(idiom) - 1]
+            fallback[docs[start[match]]] = True
+        return sentiments, fallback
+
+    def _score_valence(self, sentiments, docs, texts):
+        """Sums the valences of each tweet into its scores, as SentimentIntensityAnalyzer.score_valence does."""
+        n_texts = len(texts)
+        has_tokens = np.bincount(docs, minlength=n_texts) > 0
+        # bincount adds the weights one after the other, in the order NLTK sums them
+        sum_s = np.bincount(docs, weights=sentiments, minlength=n_texts)
+        pos_sum = np.bincount(docs, weights=np.where(sentiments > 0, sentiments + 1, 0.0), minlength=n_texts)
+        neg_sum = np.bincount(docs, weights=np.where(sentiments < 0, sentiments - 1, 0.0), minlength=n_texts)
+        neu_count = np.bincount(docs, weights=sentiments == 0, minlength=n_texts)
+
+        # emphasis from exclamation points and question marks
+        exclamations = np.minimum(np.fromiter((text.count('!') for text in texts), dtype=np.int64, count=n_texts), 4)
+        questions = np.fromiter((text.count('?') for text in texts), dtype=np.int64, count=n_texts)
+        emphasis = exclamations * 0.292 + np.where(questions > 1, np.where(questions <= 3, questions * 0.18, 0.96), 0)
+
+        sum_s = np.where(sum_s > 0, sum_s + emphasis, np.where(sum_s < 0, sum_s - emphasis, sum_s))
+        compound = sum_s / np.sqrt(sum_s * sum_s + 15)
+        abs_neg = np.abs(neg_sum)
+        pos_sum, neg_sum = (np.where(pos_sum > abs_neg, pos_sum + emphasis, pos_sum),
+                            np.where(pos_sum < abs_neg, neg_sum - emphasis, neg_sum))
+        total = pos_sum + np.abs(neg_sum) + neu_count
+        total = np.where(has_tokens, total, 1.0)
+        scores = np.stack([np.abs(neg_sum / total), np.abs(neu_count / total), np.abs(pos_sum / total), compound], 1)
+        scores[~has_tokens] = 0.0
+
+        # Python's round, which NumPy's does not always match
+        rounded = [(round(neg, 3), round(neu, 3), round(pos, 3), round(comp, 4))
+                   for neg, neu, pos, comp in scores.tolist()]
+        return np.array(rounded).reshape(-1, 4)
@@ -0,0 +1,82 @@
+# A local stand-in for tweepy.API used to test the fetching functions offline.
+
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+
+def make_timeline(n_tweets, first_id=1000, replies_every=0):
+    """
+    Creates a fake timeline of tweepy-like statuses, newest first.
+    Every replies_every-th tweet is a reply when replies_every > 0.
+    """
+    start = datetime(2021, 3, 1)
+    timeline = []
+    for i in range(n_tweets):
+        tweet_id = first_id + i
+        is_reply = replies_every > 0 and i % replies_every == 0
+        timeline.append(SimpleNamespace(id=tweet_id,
+                                        created_at=start + timedelta(minutes=37 * i),
+                                        text=f"@fan reply {tweet_id}" if is_reply else f"tweet {tweet_id} #pytweet",
+                                        in_reply_to_status_id=1 if is_reply else None))
+    return timeline[::-1]
+
+
+class FakeAPI:
+    """
+    Serves user_timeline pages from in-memory timelines keyed by handle,
+    each one newest first. Pages are sliced with a binary search on the
+    ids, so paging through a timeline costs as little as Twitter's.
+    """
+
+    def __init__(self, timelines):
+        self.timelines = timelines
+        self.calls = []
+        # negated ids of each timeline, ascending, for bisect
+        self._ids = {name: (timeline, [-tweet.id for tweet in timeline]) for name, timeline in timelines.items()}
+
+    def _sorted_ids(self, screen_name):
+        """The negated ids of a timeline, rebuilt when the timeline is replaced."""
+        timeline = self.timelines[screen_name]
+        if screen_name not in self._ids or self._ids[screen_name][0] is not timeline:
+            self._ids[screen_name] = (timeline, [-tweet.id for tweet in timeline])
+        return self._ids[screen_name][1]
+
+    def user_timeline(self, screen_name, exclude_replies=False, count=20, max_id=None, since_id=None):
+        self.calls.append({'screen_name': screen_name, 'max_id': max_id, 'since_id': since_id})
+        ids = self._sorted_ids(screen_name)
+        start = 0 if max_id is None else bisect_left(ids, -max_id)
+        end = len(ids) if since_id is None else bisect_left(ids, -since_id)
+        page = self.timelines[screen_name][start:max(start, min(end, start + count))]
+        # like Twitter, replies are removed after the page has been cut
+        if exclude_replies:
+            page = [tweet for tweet in page if tweet.in_reply_to_status_id is None]
+        return page
+
+
+def api_error(status, reset=None):
+    """Creates the error tweepy raises for an HTTP error status, with the rate-limit reset time if given."""
+    import tweepy
+    headers = {} if reset is None else {'x-rate-limit-reset': str(reset)}
+    response = SimpleNamespace(status_code=status, headers=headers)
+    error_class = tweepy.RateLimitError if status == 429 else tweepy.TweepError
+    return error_class(f'Twitter error response: status code = {status}', response=response)
+
+
+class FlakyAPI(FakeAPI):
+    """
+    A FakeAPI that fails on chosen attempts: failures maps the index of a
+    user_timeline attempt, counting failed ones, to the error it raises.
+    """
+
+    def __init__(self, timelines, failures):
+        super().__init__(timelines)
+        self.failures = dict(failures)
+        self.attempts = 0
+
+    def user_timeline(self, **params):
+        attempt = self.attempts
+        self.attempts += 1
+        if attempt in self.failures:
+            raise self.failures[attempt]
+        return super().user_timeline(**params)
@@ -0,0 +1,75 @@
+import os
+import pandas as pd
+from pytweet.pytweet import analyze_archive, tweet_sentiment_analysis, _sentiment_word_counts, _tweet_rank
+from pytest import raises
+
+
+def test_analyze_archive(tmp_path):
+    """
+    Test that an archive processed in chunks gives the same sentiment
+    columns and top words as the in-memory functions.
+    """
+    data = pd.read_csv("tests/brunomars_data.csv")
+    expected = tweet_sentiment_analysis(data)
+
+    top_words = analyze_archive("tests/brunomars_data.csv", tmp_path / 'scored.parquet', chunksize=97)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / 'scored.parquet'), expected)
+
+    terms, counts = _sentiment_word_counts(expected['tweet'], expected['sentiment'])
+    for sentiment, sentiment_counts in counts.items():
+        ranked = _tweet_rank(terms, sentiment_counts)
+        words = top_words[top_words['sentiment'] == sentiment]
+        assert words['Word'].tolist() == ranked.index.tolist()
+        assert words['frequency'].tolist() == ranked['frequency'].tolist()
+
+    # parquet archives work too, with another text column
+    data.rename(columns={'tweet': 'text'}).to_parquet(tmp_path / 'archive.parquet')
+    analyze_archive(tmp_path / 'archive.parquet', tmp_path / 'scored2.parquet', text_col='text', chunksize=200)
+    result = pd.read_parquet(tmp_path / 'scored2.parquet')
+    assert result['text'].tolist() == data['tweet'].tolist()
+    assert result['sentiment'].tolist() == expected['sentiment'].tolist()
+
+
+def test_analyze_archive_late_values(tmp_path):
+    """
+    Test that columns getting values, or wider values, only in later
+    chunks are widened instead of failing part way through.
+    """
+    data = pd.read_csv("tests/brunomars_data.csv").head(9)
+    data['reply_to'] = [None] * 4 + ['@x', None, '@y', None, None]
+    data['count'] = [1, 2, 3, 4, 5, 6, 7, 8.5, 9]
+    data['code'] = [1, 2, 3, 4, 5, 6, 'a7', 8, 9]
+    data.to_csv(tmp_path / 'archive.csv', index=False)
+    expected = tweet_sentiment_analysis(pd.read_csv(tmp_path / 'archive.csv'))
+
+    analyze_archive(tmp_path / 'archive.csv', tmp_path / 'scored.parquet', chunksize=2)
+    result = pd.read_parquet(tmp_path / 'scored.parquet')
+    assert list(result.columns) == list(expected.columns)
+    assert result['reply_to'].tolist() == [None] * 4 + ['@x', None, '@y', None, None]
+    assert result['count'].tolist() == data['count'].tolist()
+    assert result['code'].tolist() == [str(code) for code in data['code']]
+    assert result['compound'].tolist() == expected['compound'].tolist()
+    assert sorted(os.listdir(tmp_path)) == ['archive.csv', 'scored.parquet']
+
+
+def test_analyze_archive_failure(tmp_path):
+    """Test that a run failing part way through leaves no truncated file behind."""
+    data = pd.read_csv("tests/brunomars_data.csv").head(9)
+    data.loc[6, 'tweet'] = None
+    data.to_csv(tmp_path / 'archive.csv', index=False)
+    with raises(TypeError):
+        analyze_archive(tmp_path / 'archive.csv', tmp_path / 'scored.parquet', chunksize=2)
+    assert os.listdir(tmp_path) == ['archive.csv']
+
+
+def test_analyze_archive_error(tmp_path):
+    """
+    Test error cases and error messages thrown by analyze_archive.
+    """
+    with raises(TypeError) as e:
+        analyze_archive("tests/brunomars_data.csv", tmp_path / 'out.parquet', chunksize=0)
+    assert str(e.value) == 'Invalid argument: chunksize must be a positive integer.'
+
+    with raises(ValueError) as e:
+        analyze_archive("tests/brunomars_data.json", tmp_path / 'out.parquet')
+    assert str(e.value) == "The archive must be a '.csv' or '.parquet' file."
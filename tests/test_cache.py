@@ -0,0 +1,94 @@
+import pandas as pd
+from pytweet.cache import TweetCache
+from pytweet.pytweet import get_tweets
+from pytest import raises
+from tests.fake_twitter import FakeAPI, make_timeline
+
+
+class FakeClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_tweets_cache(tmp_path):
+    """
+    Test that get_tweets serves fresh timelines from the cache
+    and downloads them again once they expire.
+    """
+    clock = FakeClock()
+    cache = TweetCache(tmp_path, ttl=60, clock=clock)
+    api = FakeAPI({'@pytweetGod': make_timeline(300)})
+
+    result = get_tweets('@pytweetGod', verbose=False, api=api, cache=cache)
+    n_calls = len(api.calls)
+
+    # served from the cache, with typed columns
+    cached = get_tweets('@pytweetGod', verbose=False, api=api, cache=cache)
+    pd.testing.assert_frame_equal(cached, result)
+    assert cached['time'].dtype == 'datetime64[ns]'
+    assert len(get_tweets('@pytweetGod', n_tweets=20, verbose=False, api=api, cache=cache)) == 20
+    assert len(api.calls) == n_calls
+
+    # a partial timeline only answers smaller requests
+    get_tweets('@pytweetGod', n_tweets=10, include_replies=True, verbose=False, api=api, cache=cache)
+    n_calls = len(api.calls)
+    assert len(get_tweets('@pytweetGod', n_tweets=5, include_replies=True, verbose=False, api=api, cache=cache)) == 5
+    assert len(api.calls) == n_calls
+    get_tweets('@pytweetGod', n_tweets=50, include_replies=True, verbose=False, api=api, cache=cache)
+    assert len(api.calls) > n_calls
+
+    # expired entries are downloaded again
+    clock.now += 61
+    n_calls = len(api.calls)
+    get_tweets('@pytweetGod', verbose=False, api=api, cache=cache)
+    assert len(api.calls) > n_calls
+
+
+def test_tweet_cache_eviction(tmp_path):
+    """
+    Test that the least recently used entries are evicted once the cache is too big.
+    """
+    clock = FakeClock()
+    tweets = pd.DataFrame({'time': pd.date_range('2021-03-01', periods=100, freq='H'),
+                           'tweet': [f'tweet number {i}' for i in range(100)]})
+    TweetCache(tmp_path).put('probe', tweets)
+    size = (tmp_path / 'probe.feather').stat().st_size
+
+    cache = TweetCache(tmp_path / 'lru', ttl=None, max_bytes=2 * size, clock=clock)
+    for key in ['a', 'b']:
+        clock.now += 1
+        cache.put(key, tweets)
+    clock.now += 1
+    cache.get('a')
+    clock.now += 1
+    cache.put('c', tweets)
+
+    # 'b' was used least recently
+    assert cache.get('b') is None
+    pd.testing.assert_frame_equal(cache.get('a')[0], tweets)
+    assert cache.get('c') is not None
+
+    cache.clear()
+    assert cache.get('a') is None
+
+
+def test_tweet_cache_error(tmp_path):
+    """
+    Test error cases and error messages thrown by TweetCache and get_tweets.
+    """
+    with raises(TypeError) as e:
+        TweetCache(tmp_path, ttl=-1)
+    assert str(e.value) == 'Invalid argument: ttl must be a non-negative number or None.'
+
+    with raises(TypeError) as e:
+        TweetCache(tmp_path, max_bytes=0)
+    assert str(e.value) == 'Invalid argument: max_bytes must be a positive integer or None.'
+
+    with raises(TypeError) as e:
+        get_tweets('@pytweetGod', cache=str(tmp_path), api=FakeAPI({}))
+    assert str(e.value) == 'Invalid argument type: cache must be a TweetCache.'
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+from pytweet.pytweet import compact_tweets, get_tweets, tweet_sentiment_analysis, visualize_sentiment
+from pytweet.cache import TweetCache
+from pytest import raises
+from tests.fake_twitter import FakeAPI, make_timeline
+
+
+def test_compact_tweets():
+    """
+    Test that compact output has the compact column types, the same values,
+    and uses less memory.
+    """
+    data = pd.read_csv("tests/brunomars_data.csv")[["time", "tweet"]]
+    data['id'] = np.arange(len(data)) + 10 ** 18
+    result = tweet_sentiment_analysis(data)
+    compact = tweet_sentiment_analysis(data, compact=True)
+
+    assert compact.index.dtype == 'int64' and compact.index[0] == 10 ** 18
+    assert compact['time'].dtype == 'datetime64[ns]'
+    assert compact['sentiment'].dtype == 'category'
+    assert list(compact['sentiment'].cat.categories) == ['negative', 'neutral', 'positive']
+    assert (compact['sentiment'].astype(object).to_numpy() == result['sentiment'].to_numpy()).all()
+    for col in ['polarity', 'subjectivity', 'neg', 'neu', 'pos', 'compound']:
+        assert compact[col].dtype == 'float32'
+        np.testing.assert_allclose(compact[col], result[col], atol=1e-6)
+    assert compact.memory_usage(deep=True).sum() < result.memory_usage(deep=True).sum()
+
+    # converting afterwards gives the same frame
+    pd.testing.assert_frame_equal(compact_tweets(result), compact)
+
+    # Arrow-backed text
+    arrow = tweet_sentiment_analysis(data, compact='arrow')
+    assert arrow['tweet'].dtype == 'string[pyarrow]'
+    assert (arrow['tweet'].to_numpy() == data['tweet'].to_numpy()).all()
+
+    # compact output can be plotted
+    visualize_sentiment(arrow)
+
+
+def test_get_tweets_compact(tmp_path):
+    """Test that get_tweets returns tweets indexed by id, also from its cache."""
+    timeline = make_timeline(300)
+    api = FakeAPI({'@pytweetGod': timeline})
+    result = get_tweets('@pytweetGod', verbose=False, api=api, compact=True)
+    assert list(result.columns) == ['time', 'tweet']
+    assert result.index.dtype == 'int64' and result.index[0] == timeline[0].id
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), get_tweets('@pytweetGod', verbose=False, api=api))
+
+    cache = TweetCache(tmp_path)
+    get_tweets('@pytweetGod', verbose=False, api=api, cache=cache)
+    n_calls = len(api.calls)
+    pd.testing.assert_frame_equal(get_tweets('@pytweetGod', verbose=False, api=api, cache=cache, compact=True), result)
+    assert len(api.calls) == n_calls
+
+    assert len(get_tweets('@quiet', verbose=False, api=FakeAPI({'@quiet': []}), compact='arrow')) == 0
+
+
+def test_compact_tweets_error():
+    """Test error cases and error messages of compact output."""
+    with raises(TypeError) as e:
+        compact_tweets([1, 2])
+    assert str(e.value) == 'Invalid argument type: input must be a dataframe.'
+
+    with raises(TypeError) as e:
+        tweet_sentiment_analysis(pd.DataFrame({'tweet': ['hi']}), compact='yes')
+    assert str(e.value) == "Invalid argument: compact must be True, False or 'arrow'."
+
+
+def test_compact_arrow_old_pandas(monkeypatch):
+    """Test that Arrow-backed text fails clearly, before fetching, on pandas older than 1.3."""
+    monkeypatch.setattr(pd, '__version__', '1.2.3')
+    data = pd.DataFrame({'tweet': ['hi']})
+    with raises(ValueError) as e:
+        compact_tweets(data, arrow_strings=True)
+    assert str(e.value) == ("Invalid argument: Arrow-backed strings need pandas 1.3 or newer, "
+                            "not 1.2.3. Use compact=True instead.")
+
+    api = FakeAPI({'@pytweetGod': make_timeline(10)})
+    with raises(ValueError):
+        get_tweets('@pytweetGod', verbose=False, api=api, compact='arrow')
+    assert api.calls == []
+    assert compact_tweets(data)['tweet'].tolist() == ['hi']
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+from pytweet.dedup import duplicate_groups, minhash_signatures, near_duplicate_labels, normalize_texts
+from pytweet.pytweet import (WordFrequencyIndex, collapse_duplicates, hashtag_counts, tweet_sentiment_analysis,
+                             _sentiment_word_counts)
+from pytest import raises
+
+TEXTS = ['RT @bruno: Loving the #24kmagic tour tonight https://t.co/abc',
+         'Loving the #24kmagic tour tonight https://t.co/xyz',
+         'loving  the #24KMagic tour tonight',
+         'rt @a: RT @b: Loving the #24kmagic tour tonight!!',
+         'Such a sad day today, I really miss you and all the music we made together #RIP',
+         'Such a sad day today, I really miss you and all the music we made together!! #RIP',
+         'Something else entirely']
+
+
+def test_duplicate_groups():
+    """Test that retweets and copies are grouped exactly, and near duplicates only when asked."""
+    assert normalize_texts(TEXTS[:3]).tolist() == ['loving the #24kmagic tour tonight'] * 3
+
+    groups, first = duplicate_groups(TEXTS)
+    assert groups.tolist() == [0, 0, 0, 1, 2, 3, 4]
+    assert first.tolist() == [0, 3, 4, 5, 6]
+
+    groups, first = duplicate_groups(TEXTS, near_duplicates=True)
+    assert groups.tolist() == [0, 0, 0, 0, 1, 1, 2]
+    assert first.tolist() == [0, 4, 6]
+
+    # a high threshold only keeps exact copies together
+    assert near_duplicate_labels(['abcdefgh', 'abcdefgh', 'abcdefgx'], threshold=1.0).tolist() == [0, 0, 2]
+    assert duplicate_groups([])[0].tolist() == []
+
+
+def test_minhash_signatures():
+    """Test that signature agreement estimates the Jaccard similarity of shingles."""
+    a = 'the quick brown fox jumps over the lazy dog'
+    b = 'the quick brown fox jumps over the lazy cat'
+    signatures = minhash_signatures([a, b, a, ''], num_perm=256)
+    assert signatures.shape == (4, 256)
+    np.testing.assert_array_equal(signatures[0], signatures[2])
+
+    shingles = [{text[i:i + 5] for i in range(len(text) - 4)} for text in (a, b)]
+    jaccard = len(shingles[0] & shingles[1]) / len(shingles[0] | shingles[1])
+    assert abs((signatures[0] == signatures[1]).mean() - jaccard) < 4 * 0.5 / np.sqrt(256)
+
+    with raises(TypeError):
+        minhash_signatures([a], num_perm=0)
+    with raises(TypeError):
+        near_duplicate_labels([a], threshold=0)
+
+
+def test_collapse_duplicates():
+    """
+    Test that collapsed tweets give the same hashtag and word counts as all
+    of them, and that scores are broadcast to every copy.
+    """
+    data = pd.read_csv("tests/brunomars_data.csv")[['time', 'tweet']]
+    data = pd.concat([data, data.iloc[:100], 'RT @BrunoMars: ' + data[['tweet']].iloc[50:150]], ignore_index=True)
+
+    collapsed = collapse_duplicates(data)
+    assert collapsed['multiplicity'].sum() == len(data)
+    assert len(collapsed) == len(set(normalize_texts(data['tweet'])))
+    assert collapsed.index.is_monotonic_increasing
+
+    # collapsing twice keeps the multiplicities
+    pd.testing.assert_frame_equal(collapse_duplicates(collapsed), collapsed)
+
+    # the retweets do not carry the same hashtags, so only count those of the copies
+    copies = data.iloc[:len(data) - 100]
+    expected = hashtag_counts(copies, 'tweet', top_n=None).sort_values(['Count', 'Keyword'])
+    result = hashtag_counts(collapse_duplicates(copies), 'tweet', top_n=None).sort_values(['Count', 'Keyword'])
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True))
+
+    scored = tweet_sentiment_analysis(data, dedup=True)
+    assert list(scored.columns) == list(tweet_sentiment_analysis(data.iloc[:5]).columns)
+    groups, first = duplicate_groups(data['tweet'])
+    for col in ['sentiment', 'compound', 'polarity']:
+        assert (scored.groupby(groups)[col].nunique() == 1).all()
+    # the copies with the same text as the first of their group score exactly as before
+    texts = data['tweet'].to_numpy()
+    same = texts == texts[first][groups]
+    pd.testing.assert_frame_equal(scored[same], tweet_sentiment_analysis(data[same]))
+
+    # and so do their word counts
+    scored = scored[same]
+    terms, counts = _sentiment_word_counts(scored['tweet'], scored['sentiment'])
+    collapsed = collapse_duplicates(scored)
+    index = WordFrequencyIndex().update(collapsed)
+    for sentiment, sentiment_counts in counts.items():
+        used = np.flatnonzero(sentiment_counts)
+        assert index.counts(sentiment) == dict(zip(terms[used], sentiment_counts[used]))
+
+    with raises(TypeError):
+        tweet_sentiment_analysis(data, dedup='fuzzy')
+    with raises(TypeError):
+        collapse_duplicates(data['tweet'])
@@ -0,0 +1,69 @@
+import pandas as pd
+from pytweet.pytweet import get_tweets, iter_tweets
+from pytweet.scheduler import RetryPolicy
+from pytweet.store import FetchCheckpoint
+from pytest import raises
+from tests.fake_twitter import FakeAPI, FlakyAPI, api_error, make_timeline
+
+NO_WAIT = RetryPolicy(retries=2, sleep=lambda seconds: None)
+
+
+def test_get_tweets_retry():
+    """Test that failed pages are retried and the fetch carries on."""
+    timeline = make_timeline(450)
+    api = FlakyAPI({'@pytweetGod': timeline}, {1: api_error(503), 2: api_error(429), 4: ConnectionError()})
+    result = get_tweets('@pytweetGod', verbose=False, api=api, retry=NO_WAIT)
+    pd.testing.assert_frame_equal(result, get_tweets('@pytweetGod', verbose=False, api=FakeAPI(api.timelines)))
+    assert api.attempts == 4 + 3
+
+    # errors that retrying cannot fix are raised at once
+    api = FlakyAPI({'@pytweetGod': timeline}, {1: api_error(401)})
+    with raises(Exception) as e:
+        get_tweets('@pytweetGod', verbose=False, api=api, retry=NO_WAIT)
+    assert e.value.response.status_code == 401
+    assert api.attempts == 2
+
+
+def test_get_tweets_checkpoint(tmp_path):
+    """
+    Test that an interrupted fetch resumes from its checkpoint without downloading
+    the pages it already had, and that the checkpoint is cleared once it completes.
+    """
+    timeline = make_timeline(650)
+    expected = get_tweets('@pytweetGod', verbose=False, api=FakeAPI({'@pytweetGod': timeline}))
+
+    # the third page keeps failing, after two pages were downloaded
+    failing = {attempt: api_error(503) for attempt in range(2, 5)}
+    api = FlakyAPI({'@pytweetGod': timeline}, failing)
+    with raises(Exception):
+        get_tweets('@pytweetGod', verbose=False, api=api, retry=NO_WAIT, checkpoint=tmp_path)
+    state = FetchCheckpoint(tmp_path).state()
+    assert state['n_downloaded'] == 400 and state['max_id'] == timeline[399].id - 1
+
+    # the same fetch starts from the third page
+    api = FakeAPI({'@pytweetGod': timeline})
+    result = get_tweets('@pytweetGod', verbose=False, api=api, checkpoint=str(tmp_path))
+    pd.testing.assert_frame_equal(result, expected)
+    assert [call['max_id'] for call in api.calls] == [timeline[399].id - 1, timeline[599].id - 1,
+                                                      timeline[649].id - 1]
+    assert FetchCheckpoint(tmp_path).state() is None
+    assert list(tmp_path.iterdir()) == []
+
+    # a checkpoint is only resumed by the fetch it belongs to
+    api = FlakyAPI({'@pytweetGod': timeline}, {1: api_error(404)})
+    with raises(Exception):
+        list(iter_tweets('@pytweetGod', verbose=False, api=api, checkpoint=tmp_path))
+    with raises(ValueError):
+        list(iter_tweets('@pytweetGod', n_tweets=300, verbose=False, api=api, checkpoint=tmp_path))
+
+
+def test_get_tweets_checkpoint_error():
+    """Test error cases and error messages of the retry and checkpoint arguments."""
+    api = FakeAPI({})
+    with raises(TypeError) as e:
+        get_tweets('@pytweetGod', api=api, retry=3)
+    assert str(e.value) == 'Invalid argument type: retry must be a RetryPolicy.'
+
+    with raises(TypeError) as e:
+        iter_tweets('@pytweetGod', api=api, checkpoint=True)
+    assert str(e.value) == 'Invalid argument type: checkpoint must be a FetchCheckpoint or a path.'
@@ -0,0 +1,47 @@
+from pytweet.pytweet import get_tweets_many
+from pytweet.scheduler import RateLimiter
+from pytest import raises
+from tests.fake_twitter import FakeAPI, make_timeline
+
+
+def test_get_tweets_many():
+    """
+    Test that several handles are fetched through one client into
+    a single dataframe with a handle column, in the order given.
+    """
+    timelines = {'@a': make_timeline(430, first_id=1), '@b': make_timeline(5, first_id=5000),
+                 '@c': [], '@d': make_timeline(210, first_id=9000)}
+    api = FakeAPI(timelines)
+    limiter = RateLimiter(calls=900, period=900, burst=899)
+    result = get_tweets_many(['@d', '@a', '@b', '@c'], max_workers=3, rate_limiter=limiter, api=api)
+
+    assert list(result.columns) == ['handle', 'time', 'tweet']
+    assert result['handle'].drop_duplicates().tolist() == ['@d', '@a', '@b']
+    assert result.groupby('handle').size().to_dict() == {'@a': 430, '@b': 5, '@d': 210}
+    # 3 + 1 + 1 + 1 user_timeline calls, including the empty last pages
+    assert len(api.calls) == 3 + 4 + 2 + 1
+
+    # n_tweets applies to each handle
+    result = get_tweets_many(['@a', '@d'], n_tweets=20, rate_limiter=limiter, api=api)
+    assert result.groupby('handle').size().to_dict() == {'@a': 20, '@d': 20}
+
+    # no handles, no tweets
+    assert len(get_tweets_many([], api=api)) == 0
+
+
+def test_get_tweets_many_error():
+    """
+    Test error cases and error messages thrown by get_tweets_many.
+    """
+    api = FakeAPI({})
+    with raises(TypeError) as e:
+        get_tweets_many('@a', api=api)
+    assert str(e.value) == 'Invalid argument type: handles must be a list of strings.'
+
+    with raises(TypeError) as e:
+        get_tweets_many(['@a'], max_workers=0, api=api)
+    assert str(e.value) == 'Invalid argument: max_workers must be a positive integer.'
+
+    with raises(TypeError) as e:
+        get_tweets_many(['@a'], n_tweets='all', api=api)
+    assert str(e.value) == 'Invalid argument: input n_tweets must be >= 0.'
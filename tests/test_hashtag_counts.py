@@ -0,0 +1,36 @@
+import pandas as pd
+from pytweet.pytweet import hashtag_counts
+from pytest import raises
+
+
+def test_hashtag_counts():
+    """
+    Tests that hashtags are counted across tweets and the most used ones returned first.
+    """
+    data = pd.DataFrame({'tweet': ['#a #b #a', 'no hashtags', '#b #c', '#a #d!', '#e']})
+    result = hashtag_counts(data, 'tweet', top_n=None)
+    assert list(result.columns) == ['Keyword', 'Count']
+    assert dict(zip(result['Keyword'], result['Count'])) == {'#a': 3, '#b': 2, '#c': 1, '#d': 1, '#e': 1}
+    assert result['Count'].is_monotonic_decreasing
+
+    # ties with the last hashtag are kept
+    assert hashtag_counts(data, 'tweet', top_n=1)['Keyword'].tolist() == ['#a']
+    assert len(hashtag_counts(data, 'tweet', top_n=3)) == 5
+
+    # the input is left untouched
+    assert list(data.columns) == ['tweet']
+
+    # the test dataset has more than 15 hashtags
+    data = pd.read_csv("tests/brunomars_data.csv")
+    result = hashtag_counts(data, 'tweet')
+    assert result.loc[0, 'Keyword'] == '#24kmagicworldtour'
+    assert len(result) >= 15
+
+
+def test_hashtag_counts_error():
+    """
+    Test error cases and error messages thrown by hashtag_counts.
+    """
+    with raises(Exception) as e:
+        hashtag_counts(pd.DataFrame({'tweet': ['#a']}), 'tweet', top_n=0)
+    assert str(e.value) == "The value of the argument 'top_n' must be a positive integer or None"
@@ -0,0 +1,58 @@
+import subprocess
+import sys
+import zipfile
+
+import nltk
+from pytweet import pytweet
+from pytweet.pytweet import ensure_nltk_resources
+from pytest import raises
+
+
+def test_import_is_lazy():
+    """
+    Test that importing pytweet neither imports the heavy dependencies
+    nor downloads anything, so short-lived jobs start quickly.
+    """
+    # pandas and numpy are imported first, so only what pytweet adds on top of them is timed
+    code = ("import sys, time\n"
+            "import numpy, pandas\n"
+            "start = time.perf_counter()\n"
+            "import pytweet.pytweet\n"
+            "print(time.perf_counter() - start)\n"
+            "print(' '.join(m for m in ('tweepy', 'altair', 'textblob', 'nltk', 'sklearn') if m in sys.modules))\n")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    seconds, loaded = result.stdout.split('\n')[:2]
+    assert loaded == ''
+    assert 'nltk_data' not in result.stderr
+    # pytweet's own modules take a few tens of milliseconds; the heavy
+    # dependencies it used to import eagerly added over a second
+    assert float(seconds) < 0.5
+
+
+def test_ensure_nltk_resources(monkeypatch, tmp_path):
+    """
+    Test that the NLTK data is found in data_dir, and that missing data
+    is reported when downloading is turned off, whatever data the
+    machine has installed.
+    """
+    monkeypatch.setattr(pytweet, '_NLTK_READY', False)
+    monkeypatch.setattr(nltk.data, 'path', [])
+    missing = tmp_path / 'missing'
+    missing.mkdir()
+    with raises(LookupError) as e:
+        ensure_nltk_resources(data_dir=missing, download=False)
+    assert str(e.value) == ("The NLTK resource 'stopwords' is missing. Install it with "
+                            "nltk.download('stopwords') or point data_dir at a directory holding it.")
+    assert nltk.data.path == [str(missing)]
+    assert not pytweet._NLTK_READY
+
+    # a data directory laid out like NLTK's, with the resources pytweet needs
+    installed = tmp_path / 'nltk_data'
+    (installed / 'corpora' / 'stopwords').mkdir(parents=True)
+    (installed / 'sentiment').mkdir()
+    with zipfile.ZipFile(installed / 'sentiment' / 'vader_lexicon.zip', 'w') as lexicon:
+        lexicon.writestr('vader_lexicon/vader_lexicon.txt', 'love\t3.2\t0.4\t[3, 3, 3, 4, 3, 3, 3, 4, 3, 3]\n')
+    monkeypatch.setattr(nltk.data, 'path', [])
+    ensure_nltk_resources(data_dir=installed, download=False)
+    assert pytweet._NLTK_READY
+    assert nltk.data.path == [str(installed)]
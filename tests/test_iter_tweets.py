@@ -0,0 +1,56 @@
+import pandas as pd
+from pytweet.pytweet import iter_tweets, get_tweets
+from pytest import raises
+from tests.fake_twitter import FakeAPI, make_timeline
+
+
+def test_iter_tweets():
+    """
+    Test that iter_tweets yields one compact dataframe per page
+    and that get_tweets can stream or collect those pages.
+    """
+    api = FakeAPI({'@pytweetGod': make_timeline(450, replies_every=10)})
+
+    # one page per user_timeline call, newest tweets first
+    pages = list(iter_tweets('@pytweetGod', include_replies=True, verbose=False, api=api))
+    assert [len(page) for page in pages] == [200, 200, 50]
+    assert list(pages[0].columns) == ['id', 'time', 'tweet']
+    ids = pd.concat(pages)['id']
+    assert ids.is_monotonic_decreasing and ids.is_unique
+
+    # pages with replies removed are not mistaken for the end of the timeline
+    pages = list(iter_tweets('@pytweetGod', verbose=False, api=api))
+    assert sum(len(page) for page in pages) == 405
+
+    # n_tweets stops the paging early
+    api.calls.clear()
+    pages = list(iter_tweets('@pytweetGod', n_tweets=250, include_replies=True, verbose=False, api=api))
+    assert sum(len(page) for page in pages) == 250
+    assert len(api.calls) == 2
+
+    # stream=True returns the generator, otherwise the pages are collected
+    stream = get_tweets('@pytweetGod', n_tweets=10, verbose=False, stream=True, api=api)
+    assert isinstance(next(stream), pd.DataFrame)
+    result = get_tweets('@pytweetGod', n_tweets=10, verbose=False, api=api)
+    assert list(result.columns) == ['time', 'tweet']
+    assert len(result) == 10
+
+    # an empty timeline gives an empty dataframe
+    api = FakeAPI({'@quiet': []})
+    assert list(iter_tweets('@quiet', verbose=False, api=api)) == []
+    assert len(get_tweets('@quiet', verbose=False, api=api)) == 0
+
+
+def test_iter_tweets_error():
+    """
+    Test that invalid arguments are rejected before anything is downloaded.
+    """
+    api = FakeAPI({})
+    with raises(TypeError) as e:
+        iter_tweets(123, api=api)
+    assert str(e.value) == 'Invalid argument type: handle must be a string.'
+
+    with raises(TypeError) as e:
+        get_tweets('@pytweetGod', stream='yes', api=api)
+    assert str(e.value) == 'Invalid argument type: stream must be boolean.'
+    assert api.calls == []
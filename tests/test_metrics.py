@@ -0,0 +1,71 @@
+import io
+import logging
+import pandas as pd
+from pytweet import metrics
+from pytweet.metrics import Metrics, profile
+from pytweet.pytweet import get_tweets, tweet_sentiment_analysis, visualize_sentiment
+from pytest import raises
+from tests.fake_twitter import FakeAPI, make_timeline
+
+
+def test_metrics():
+    """
+    Test that the stages and counters of a fetch and an analysis are collected,
+    reported to the callback, and no longer collected once the block is left.
+    """
+    api = FakeAPI({'@pytweetGod': make_timeline(450)})
+    events = []
+    with Metrics(callback=lambda *event: events.append(event)) as collected:
+        tweets = get_tweets('@pytweetGod', verbose=False, api=api)
+        tweets['tweet'] = tweets['tweet'] + pd.Series(['', ' love it', ' so bad']).repeat(150).to_numpy()
+        visualize_sentiment(tweet_sentiment_analysis(tweets))
+
+    # 3 pages, and the empty page that ends the fetch
+    assert collected.counters['api_calls'] == 4
+    assert collected.counters['pages'] == 3
+    assert collected.counters['tweets_downloaded'] == 450
+    assert collected.counters['rows_scored'] == 450
+    assert collected.calls['fetch.user_timeline'] == 4
+    assert collected.calls['text_cleaning'] == 450
+    for name in ['sentiment.textblob', 'sentiment.vader', 'words.vectorize', 'words.rank', 'chart.sentiment']:
+        assert collected.timings[name] > 0
+
+    summary = collected.summary()
+    assert list(summary.columns) == ['calls', 'seconds']
+    assert summary['seconds'].is_monotonic_decreasing
+    assert ('count', 'tweets_downloaded', 200) in events
+    vader_events = [value for kind, name, value in events if name == 'sentiment.vader']
+    assert sum(vader_events) == collected.timings['sentiment.vader']
+
+    assert not metrics.enabled()
+    get_tweets('@pytweetGod', verbose=False, api=api)
+    assert collected.counters['api_calls'] == 4
+
+
+def test_metrics_logger(caplog):
+    """Test that events are logged, and that nested Metrics both collect."""
+    with caplog.at_level(logging.INFO, logger='pytweet.test'):
+        with Metrics(logger='pytweet.test', level=logging.INFO) as outer, Metrics() as inner:
+            tweet_sentiment_analysis(pd.DataFrame({'tweet': ['I love it', 'I hate it']}))
+    assert outer.counters == inner.counters == {'rows_scored': 2}
+    assert 'pytweet count rows_scored: 2' in caplog.messages
+
+
+def test_metrics_error():
+    """Test that invalid arguments raise errors."""
+    with raises(TypeError):
+        Metrics(callback='print')
+    with raises(TypeError):
+        Metrics(logger=42)
+
+
+def test_profile(tmp_path):
+    """Test that a block is profiled and the profile printed or saved."""
+    stream = io.StringIO()
+    with profile(stream=stream):
+        tweet_sentiment_analysis(pd.DataFrame({'tweet': ['I love it']}))
+    assert '(tweet_sentiment_analysis)' in stream.getvalue()
+
+    with profile(path=tmp_path / 'profile.out'):
+        sum(range(10))
+    assert (tmp_path / 'profile.out').stat().st_size > 0
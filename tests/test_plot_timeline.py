@@ -29,5 +29,9 @@ def test_plot_timeline():
     # Test the plot attributes
     plot = plot_timeline(data, 'time')
     assert plot.encoding.x.shorthand == 'hour', 'x_axis should be mapped to the x axis'
-    assert plot.encoding.y.shorthand == 'count()', 'y_axis should be mapped to the y axis'
+    assert plot.encoding.y.shorthand == 'count', 'y_axis should be mapped to the y axis'
     assert plot.mark == 'line', 'mark should be a line'
+
+    # the chart only holds the 24 hourly counts
+    assert len(plot.data) == 24
+    assert plot.data['count'].sum() == len(data)
@@ -0,0 +1,164 @@
+import requests
+import tweepy
+from pytweet.scheduler import RateLimiter, RetryPolicy
+from pytest import raises
+from tests.fake_twitter import api_error
+
+
+class FakeClock:
+    """A clock that only moves when sleep is called."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_rate_limiter():
+    """
+    Test that the calls are spread evenly and never exceed the limit of any window.
+    """
+    clock = FakeClock()
+    limiter = RateLimiter(calls=10, period=10, burst=2, clock=clock, sleep=clock.sleep)
+
+    times = []
+    for i in range(40):
+        limiter.acquire()
+        times.append(clock.now)
+
+    # the burst goes out right away, then one call every 1.25 seconds
+    assert times[:3] == [0.0, 0.0, 1.25]
+    assert all(abs((b - a) - 1.25) < 1e-9 for a, b in zip(times[2:], times[3:]))
+    for start in times:
+        assert sum(start <= t < start + 10 for t in times) <= 10
+
+    # an idle limiter allows a new burst, but no more
+    clock.now += 100
+    assert [limiter.acquire() for i in range(3)] == [0.0, 0.0, 1.25]
+
+
+def sliding_window_max(times, period):
+    """The largest number of calls made in any window of period seconds."""
+    return max(sum(start <= t < start + period for t in times) for start in times)
+
+
+def test_rate_limiter_window():
+    """
+    Test that no window sees more than calls calls, with the largest burst,
+    no burst, or the default one, even when the limiter starts full.
+    """
+    for calls, burst in [(10, 9), (10, 0), (10, None), (1, None), (900, 899)]:
+        clock = FakeClock()
+        limiter = RateLimiter(calls=calls, period=10, burst=burst, clock=clock, sleep=clock.sleep)
+        times = []
+        for i in range(3 * calls):
+            limiter.acquire()
+            times.append(clock.now)
+            # idle spells refill the burst part way through
+            if i % 7 == 6:
+                clock.now += 3
+        assert sliding_window_max(times, 10) <= calls
+
+
+def test_rate_limiter_error():
+    """
+    Test error cases and error messages thrown by RateLimiter.
+    """
+    with raises(TypeError) as e:
+        RateLimiter(calls=0)
+    assert str(e.value) == 'Invalid argument: calls must be a positive integer.'
+
+    with raises(TypeError) as e:
+        RateLimiter(period='15 minutes')
+    assert str(e.value) == 'Invalid argument: period must be a positive number.'
+
+    with raises(TypeError) as e:
+        RateLimiter(calls=10, burst=20)
+    assert str(e.value) == 'Invalid argument: burst must be an integer between 0 and calls - 1.'
+
+    # a full burst on top of the steady rate would allow 2 * calls in the first window
+    with raises(TypeError):
+        RateLimiter(calls=10, burst=10)
+
+
+def tweepy_request_error(cause):
+    """Raises cause and wraps it in a TweepError the way tweepy does when a request fails."""
+    try:
+        try:
+            raise cause
+        except Exception as e:
+            raise tweepy.TweepError(f'Failed to send request: {e}')
+    except tweepy.TweepError as error:
+        return error
+
+
+def test_retry_policy():
+    """
+    Test that transient errors are retried with a growing backoff, that rate-limit
+    errors wait for the window to reset, and that other errors are raised right away.
+    """
+    clock = FakeClock()
+    clock.now = 1000.0
+    policy = RetryPolicy(retries=3, backoff=2, max_backoff=5, clock=clock, sleep=clock.sleep, jitter=lambda: 1.0)
+
+    # full jitter waits up to backoff * 2 ** attempt, capped at max_backoff
+    assert [policy.delay(api_error(503), attempt) for attempt in range(4)] == [2, 4, 5, None]
+    assert policy.delay(ConnectionError(), 0) == 2
+    assert policy.delay(api_error(429, reset=1060), 0) == 61
+    assert policy.delay(api_error(429), 0) == 900
+    assert policy.delay(api_error(404), 0) is None
+    assert policy.delay(ValueError(), 0) is None
+
+    # tweepy wraps failed requests in a TweepError without a response,
+    # which is only retried when the request failed on the network
+    assert policy.delay(tweepy_request_error(requests.exceptions.ConnectionError('reset')), 0) == 2
+    assert policy.delay(tweepy_request_error(requests.exceptions.ReadTimeout('slow')), 0) == 2
+    assert policy.delay(tweepy_request_error(TypeError('Only unicode objects are escapable.')), 0) is None
+    assert policy.delay(tweepy.TweepError('Failed to send request'), 0) is None
+
+    errors = [api_error(500), api_error(429, reset=1100)]
+
+    def flaky():
+        if errors:
+            raise errors.pop(0)
+        return 'page'
+
+    assert policy.call(flaky) == 'page'
+    assert clock.now == 1000 + 2 + 99
+
+    def broken():
+        raise api_error(503)
+
+    with raises(Exception) as e:
+        policy.call(broken)
+    assert e.value.response.status_code == 503
+    with raises(Exception) as e:
+        RetryPolicy(retries=0, sleep=clock.sleep).call(broken)
+
+    # local failures, such as missing credentials, are raised on the first attempt
+    attempts = []
+
+    def no_credentials():
+        attempts.append(clock.now)
+        raise tweepy_request_error(TypeError('Only unicode objects are escapable.'))
+
+    with raises(tweepy.TweepError):
+        policy.call(no_credentials)
+    assert len(attempts) == 1
+
+
+def test_retry_policy_error():
+    """
+    Test error cases and error messages thrown by RetryPolicy.
+    """
+    with raises(TypeError) as e:
+        RetryPolicy(retries=-1)
+    assert str(e.value) == 'Invalid argument: retries must be a non-negative integer.'
+
+    with raises(TypeError) as e:
+        RetryPolicy(max_backoff='1 minute')
+    assert str(e.value) == 'Invalid argument: max_backoff must be a non-negative number.'
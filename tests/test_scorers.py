@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+from pytweet import pytweet
+from pytweet.metrics import Metrics
+from pytweet.pytweet import Scorer, register_scorer, sentiment_stream, tweet_sentiment_analysis
+from pytweet.sentiment_cache import SentimentCache
+from pytest import raises
+
+
+class LengthScorer(Scorer):
+    """A toy scorer computing the length of each tweet."""
+
+    name = 'length'
+    columns = ('length',)
+
+    def score(self, texts):
+        return np.array([[len(text)] for text in texts], dtype=float)
+
+
+class ExclamationScorer(Scorer):
+    """A toy scorer calling a tweet positive when it has more '!' than '?'."""
+
+    name = 'exclamation'
+    columns = ('neg', 'pos')
+
+    def score(self, texts):
+        return np.array([[text.count('?'), text.count('!')] for text in texts], dtype=float)
+
+
+def test_scorer_columns():
+    """
+    Test that only the scorers needed for the requested columns are run,
+    and that they give the same scores as the full analysis.
+    """
+    data = pd.read_csv("tests/brunomars_data.csv")[["time", "tweet"]]
+    result = tweet_sentiment_analysis(data)
+
+    with Metrics() as collected:
+        vader_only = tweet_sentiment_analysis(data, columns=['sentiment'])
+    assert 'sentiment.textblob' not in collected.timings
+    assert list(vader_only.columns) == ['time', 'tweet', 'sentiment']
+    pd.testing.assert_series_equal(vader_only['sentiment'], result['sentiment'])
+
+    textblob_only = tweet_sentiment_analysis(data, scorers=['textblob'])
+    assert list(textblob_only.columns) == ['time', 'tweet', 'polarity', 'subjectivity']
+    pd.testing.assert_frame_equal(textblob_only, result[textblob_only.columns])
+
+    # columns are returned in the order asked for
+    subset = tweet_sentiment_analysis(data, columns=['compound', 'polarity'])
+    pd.testing.assert_frame_equal(subset, result[['time', 'tweet', 'compound', 'polarity']])
+
+
+def test_register_scorer(monkeypatch):
+    """Test that custom scorers can be registered, selected, cached and run in worker processes."""
+    monkeypatch.setattr(pytweet, '_SCORERS', dict(pytweet._SCORERS))
+    register_scorer(LengthScorer())
+    data = pd.DataFrame({'tweet': ['so good!!', 'why?', 'ok', 'what?!', 'ok']})
+
+    result = tweet_sentiment_analysis(data, scorers=['vader', 'length'])
+    assert list(result.columns) == ['tweet', 'sentiment', 'neg', 'neu', 'pos', 'compound', 'length']
+    assert result['length'].tolist() == [9, 4, 2, 6, 2]
+    assert tweet_sentiment_analysis(data, columns=['length'])['length'].tolist() == [9, 4, 2, 6, 2]
+
+    # unregistered Scorer objects work too, and any scorer computing neg and pos gives a label
+    result = tweet_sentiment_analysis(data, scorers=[ExclamationScorer()])
+    assert result['sentiment'].tolist() == ['positive', 'negative', 'neutral', 'neutral', 'neutral']
+
+    # the cache keeps the scores of each set of scorers apart
+    cache = SentimentCache()
+    lengths = tweet_sentiment_analysis(data, scorers=['length'], cache=cache)
+    pd.testing.assert_frame_equal(tweet_sentiment_analysis(data, scorers=['length'], cache=cache), lengths)
+    pd.testing.assert_frame_equal(tweet_sentiment_analysis(data, scorers=[ExclamationScorer()], cache=cache),
+                                  result)
+
+    monkeypatch.setattr(pytweet, '_PARALLEL_MIN_ROWS', 0)
+    parallel = tweet_sentiment_analysis(data, chunk_size=2, n_jobs=2, scorers=['length'])
+    pd.testing.assert_frame_equal(parallel, lengths)
+
+    batches = list(sentiment_stream([data], batch_size=2, scorers=['length']))
+    assert pd.concat(batches)['length'].tolist() == [9, 4, 2, 6, 2]
+
+
+def test_scorer_error():
+    """Test error cases and error messages of scorer selection and registration."""
+    data = pd.DataFrame({'tweet': ['hi']})
+    with raises(ValueError) as e:
+        tweet_sentiment_analysis(data, scorers=['fastest'])
+    assert str(e.value) == "Invalid argument: unknown scorer 'fastest'."
+
+    with raises(ValueError) as e:
+        tweet_sentiment_analysis(data, columns=['happiness'])
+    assert str(e.value) == "Invalid argument: no scorer computes the column 'happiness'."
+
+    with raises(ValueError) as e:
+        tweet_sentiment_analysis(data, scorers=['textblob'], columns=['sentiment'])
+    assert str(e.value) == "Invalid argument: the scorers do not compute the columns ['sentiment']."
+
+    with raises(ValueError) as e:
+        tweet_sentiment_analysis(data, scorers=['vader', ExclamationScorer()])
+    assert str(e.value) == "Invalid argument: two of the scorers compute the same column."
+
+    with raises(TypeError) as e:
+        tweet_sentiment_analysis(data, columns='sentiment')
+    assert str(e.value) == "Invalid argument type: columns must be a list of column names."
+
+    with raises(TypeError) as e:
+        sentiment_stream([data], scorers='vader')
+    assert str(e.value) == "Invalid argument type: scorers must be a list of scorer names or Scorers."
+
+    with raises(TypeError) as e:
+        register_scorer(len)
+    assert str(e.value) == "Invalid argument type: scorer must be a Scorer."
+
+    class SentimentScorer(LengthScorer):
+        columns = ('sentiment',)
+
+    with raises(ValueError):
+        register_scorer(SentimentScorer())
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from pytweet.pytweet import tweet_sentiment_analysis
+from pytweet.sentiment_cache import SentimentCache
+from pytest import raises
+
+
+def test_tweet_sentiment_analysis_cache(tmp_path):
+    """
+    Test that cached scores give the same output, and that
+    repeated texts are served from the cache.
+    """
+    data = pd.read_csv("tests/brunomars_data.csv")[["time", "tweet"]]
+    expected = tweet_sentiment_analysis(data)
+    n_unique = data['tweet'].nunique()
+
+    cache = SentimentCache(path=tmp_path / 'scores.sqlite')
+    pd.testing.assert_frame_equal(tweet_sentiment_analysis(data, cache=cache), expected)
+    assert cache.stats['misses'] == n_unique and cache.stats['hits'] == 0
+
+    pd.testing.assert_frame_equal(tweet_sentiment_analysis(data, cache=cache), expected)
+    assert cache.stats['memory_hits'] == n_unique
+
+    # a new cache on the same file is served from disk
+    cache = SentimentCache(path=tmp_path / 'scores.sqlite')
+    pd.testing.assert_frame_equal(tweet_sentiment_analysis(data, cache=cache), expected)
+    assert cache.stats['disk_hits'] == n_unique and cache.stats['hit_rate'] == 1.0
+
+
+def test_sentiment_cache_missing_texts():
+    """
+    Test that missing tweets are rejected with or without a cache, instead
+    of being given the scores of another tweet.
+    """
+    data = pd.DataFrame({'tweet': ['I love it', np.nan, 'I hate it']})
+    for kwargs in [{}, {'cache': SentimentCache()}, {'dedup': True}]:
+        with raises(TypeError) as e:
+            tweet_sentiment_analysis(data, **kwargs)
+        assert str(e.value) == 'Invalid argument type: tweets must be strings, found 1 missing or non-string texts.'
+
+
+def test_sentiment_cache(tmp_path):
+    """
+    Test the keys, the eviction of both tiers and the statistics.
+    """
+    # surrounding whitespace and the Unicode form do not change the key, the analyzer version does
+    assert SentimentCache.key(' café ', 'v1') == SentimentCache.key('café', 'v1')
+    assert SentimentCache.key('cafe', 'v1') != SentimentCache.key('cafe', 'v2')
+
+    cache = SentimentCache(max_items=2, path=tmp_path / 'scores.sqlite', max_disk_items=3)
+    texts = ['a', 'b', 'c', 'd']
+    cache.store(texts, np.arange(8.0).reshape(4, 2), 'v1')
+
+    scores, missing = cache.lookup(['d', 'a', 'zzz'], 'v1', 2)
+    assert missing.tolist() == [False, True, True]
+    assert scores[0].tolist() == [6.0, 7.0]
+    assert np.isnan(scores[1:]).all()
+    stats = cache.stats
+    assert (stats['memory_hits'], stats['disk_hits'], stats['misses']) == (1, 0, 2)
+
+    # 'a' was evicted from both tiers, 'b' is only left on disk
+    scores, missing = cache.lookup(['b'], 'v1', 2)
+    assert scores[0].tolist() == [2.0, 3.0] and cache.stats['disk_hits'] == 1
+
+    cache.clear()
+    assert cache.lookup(['b', 'd'], 'v1', 2)[1].all()
+    cache.close()
+
+
+def test_sentiment_cache_row_count(tmp_path):
+    """
+    Test that the disk tier keeps count of its rows instead of counting
+    them on every store, including rows stored again and by earlier runs.
+    """
+    path = tmp_path / 'scores.sqlite'
+    cache = SentimentCache(path=path, max_disk_items=5)
+    cache.store(['a', 'b', 'c'], np.zeros((3, 1)), 'v1')
+    cache.close()
+
+    cache = SentimentCache(max_items=0, path=path, max_disk_items=5)
+    statements = []
+    cache._db.set_trace_callback(statements.append)
+    # 'c' is stored again and is not counted twice
+    cache.store(['c', 'd'], np.ones((2, 1)), 'v1')
+    assert cache.lookup(['a', 'b', 'c', 'd'], 'v1', 1)[1].tolist() == [False] * 4
+    cache.store(['e', 'f'], np.ones((2, 1)), 'v1')
+    assert not any('COUNT' in statement for statement in statements)
+
+    # the least recently used row was evicted, leaving 5
+    assert cache._db.execute('SELECT COUNT(*) FROM scores').fetchone()[0] == 5
+    assert cache.lookup(['a', 'b', 'c', 'd', 'e', 'f'], 'v1', 1)[1].sum() == 1
+    cache.close()
+
+
+def test_sentiment_cache_error():
+    """
+    Test error cases and error messages thrown by SentimentCache.
+    """
+    with raises(TypeError) as e:
+        SentimentCache(max_items=-1)
+    assert str(e.value) == 'Invalid argument: max_items must be a non-negative integer.'
+
+    with raises(TypeError) as e:
+        tweet_sentiment_analysis(pd.DataFrame({'tweet': ['hi']}), cache={})
+    assert str(e.value) == 'Invalid argument type: cache must be a SentimentCache.'
@@ -0,0 +1,56 @@
+import pandas as pd
+from pytweet.pytweet import sentiment_stream, tweet_sentiment_analysis
+from pytest import raises
+
+
+def test_sentiment_stream():
+    """
+    Test that a stream of batches is regrouped into micro-batches and
+    scored like tweet_sentiment_analysis would score the whole dataframe.
+    """
+    data = pd.read_csv("tests/brunomars_data.csv")[["time", "tweet"]]
+    expected = tweet_sentiment_analysis(data)
+    incoming = [data.iloc[start:start + 70] for start in range(0, len(data), 70)]
+
+    result = list(sentiment_stream(incoming, batch_size=120))
+    assert [len(batch) for batch in result] == [120] * (len(data) // 120) + [len(data) % 120]
+    pd.testing.assert_frame_equal(pd.concat(result), expected)
+
+    # incoming batches are kept as they are without a batch size
+    result = list(sentiment_stream(iter(incoming), batch_size=None))
+    assert [len(batch) for batch in result] == [len(batch) for batch in incoming]
+    pd.testing.assert_frame_equal(pd.concat(result), expected)
+
+    # the input batches are not modified
+    assert list(incoming[0].columns) == ["time", "tweet"]
+
+
+def test_sentiment_stream_is_lazy():
+    """
+    Test that batches are only read from the input as the output is consumed.
+    """
+    pulled = []
+
+    def batches():
+        for i in range(10):
+            pulled.append(i)
+            yield pd.DataFrame({'tweet': ['I love it', 'I hate it']})
+
+    stream = sentiment_stream(batches(), batch_size=3)
+    assert pulled == []
+    first = next(stream)
+    assert len(first) == 3 and pulled == [0, 1]
+    assert first['sentiment'].tolist() == ['positive', 'negative', 'positive']
+
+
+def test_sentiment_stream_error():
+    """
+    Test error cases and error messages thrown by sentiment_stream.
+    """
+    with raises(TypeError) as e:
+        sentiment_stream([], batch_size=0)
+    assert str(e.value) == 'Invalid argument: batch_size must be a positive integer or None.'
+
+    with raises(TypeError) as e:
+        list(sentiment_stream(['I love it']))
+    assert str(e.value) == 'Invalid argument type: batches must contain dataframes.'
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+from pytweet.pytweet import TopTermsSketch, WordFrequencyIndex, analyze_archive, hashtag_counts
+from pytweet.pytweet import plot_hashtags, tweet_sentiment_analysis, visualize_sentiment
+from pytweet.sketch import CountMinSketch, HeavyHitters
+from pytest import raises
+
+
+def zipf_items(n, n_distinct, seed=0):
+    """n items drawn from n_distinct strings with Zipf-like frequencies."""
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, n_distinct + 1)
+    return np.array([f'term{i}' for i in rng.choice(n_distinct, n, p=weights / weights.sum())], dtype=object)
+
+
+def test_count_min_sketch():
+    """Test that estimates are never below the true counts, and within the error bound."""
+    items = zipf_items(50000, 5000)
+    true = pd.Series(items).value_counts()
+    sketch = CountMinSketch(width=1024, depth=4)
+    for batch in np.array_split(items, 7):
+        sketch.add(batch)
+    assert sketch.total == len(items)
+
+    estimates = sketch.estimate(true.index.to_numpy())
+    assert (estimates >= true.to_numpy()).all()
+    # the bound holds for each item with probability 1 - delta
+    assert ((estimates - true.to_numpy()) <= sketch.epsilon * sketch.total).mean() >= 1 - sketch.delta
+    assert sketch.estimate(['notaterm'])[0] <= sketch.epsilon * sketch.total * 5
+
+    # merged shards equal one sketch of everything
+    left, right = CountMinSketch(1024, 4), CountMinSketch(1024, 4)
+    left.add(items[:20000])
+    right.add(items[20000:], np.ones(30000, dtype=np.int64))
+    np.testing.assert_array_equal((left + right).estimate(true.index.to_numpy()), estimates)
+    left += right
+    assert left.total == sketch.total
+
+    sized = CountMinSketch.from_error(0.001, 0.01)
+    assert sized.epsilon <= 0.001 and sized.delta <= 0.01
+    with raises(ValueError):
+        left.merge(CountMinSketch(1024, 4, seed=1))
+    with raises(ValueError):
+        sketch.add(['a', 'b'], [1, -1])
+    with raises(ValueError):
+        CountMinSketch.from_error(0, 0.01)
+    with raises(TypeError):
+        CountMinSketch(width=0)
+
+
+def test_heavy_hitters():
+    """Test that the top items of a skewed stream are found, with their counts."""
+    items = zipf_items(50000, 5000, seed=1)
+    true = pd.Series(items).value_counts()
+    hitters = HeavyHitters(k=50)
+    for batch in np.array_split(items, 10):
+        hitters.update(batch)
+    top = hitters.top(10)
+    assert list(top.index) == list(true.index[:10])
+    assert (top.to_numpy() >= true.to_numpy()[:10]).all()
+    assert (top.to_numpy() - true.to_numpy()[:10] <= hitters.sketch.epsilon * hitters.total).all()
+
+    # shards, merged
+    left = HeavyHitters(k=50).update(items[:25000])
+    right = HeavyHitters(k=50).update(items[25000:])
+    assert list((left + right).top(10).index) == list(true.index[:10])
+    with raises(ValueError):
+        left.merge(HeavyHitters(k=10))
+    with raises(TypeError):
+        HeavyHitters(k=0)
+
+
+def test_top_terms_sketch(tmp_path):
+    """
+    Test that a sketch updated in batches ranks hashtags and words as
+    counting every tweet exactly does, and plugs into the plotting functions.
+    """
+    sentiment = tweet_sentiment_analysis(pd.read_csv("tests/brunomars_data.csv"))
+    sketch = TopTermsSketch()
+    for start in range(0, len(sentiment), 100):
+        sketch.update(sentiment.iloc[start:start + 100])
+    assert sketch.sentiments == ['negative', 'neutral', 'positive']
+
+    # counts are exact at this size, but tied terms may come in any order
+    exact = hashtag_counts(sentiment, 'tweet')
+    approx = hashtag_counts(sketch, 'tweet')
+    assert approx['Count'].tolist() == exact['Count'].tolist()
+    all_hashtags = hashtag_counts(sentiment, 'tweet', top_n=None).set_index('Keyword')['Count']
+    assert (all_hashtags[approx['Keyword']].to_numpy() == approx['Count'].to_numpy()).all()
+
+    index = WordFrequencyIndex().update(sentiment)
+    for name in sketch.sentiments:
+        words = sketch.top(name, k=10)
+        assert words['frequency'].tolist() == index.top(name, k=10)['frequency'].tolist()
+        assert [index.counts(name)[word] for word in words.index] == words['frequency'].tolist()
+    assert len(sketch.top('angry')) == 0
+
+    # shards, merged, and the plotting functions
+    merged = TopTermsSketch().update(sentiment.iloc[:250]) + TopTermsSketch().update(sentiment.iloc[250:])
+    pd.testing.assert_frame_equal(merged.hashtag_counts(), sketch.hashtag_counts())
+    plot = visualize_sentiment(sketch)
+    assert plot.data.shape == visualize_sentiment(index).data.shape
+    assert plot_hashtags(sketch, 'tweet').data.equals(approx)
+
+    archive_sketch = TopTermsSketch()
+    top_words = analyze_archive("tests/brunomars_data.csv", tmp_path / 'scored.parquet',
+                                chunksize=97, word_index=archive_sketch)
+    assert top_words['frequency'].tolist() == sketch.top_words()['frequency'].tolist()
+
+    with raises(KeyError):
+        sketch.update(sentiment, text_col='text')
+    with raises(TypeError):
+        sketch.merge(index)
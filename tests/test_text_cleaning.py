@@ -0,0 +1,29 @@
+import pandas as pd
+from pytweet.pytweet import text_cleaning, TextCleaner
+from pytest import raises
+
+
+def test_text_cleaning():
+    """
+    Test that tweets are stripped of punctuation, digits and stopwords and stemmed,
+    and that a TextCleaner gives the same tokens as text_cleaning.
+    """
+    assert text_cleaning("I'm LOVING the 2 new SONGS!!! #SilkSonic") == ['im', 'love', 'new', 'song', 'silkson']
+    assert text_cleaning("Cant believe it’s finally out. Hope the world is body rollin right now✨🍹") == \
+        ['cant', 'believ', 'final', 'hope', 'world', 'bodi', 'rollin', 'right']
+
+    # characters used to be lowercased one at a time, so a final capital sigma stays 'σ'
+    assert text_cleaning("ΟΔΟΣ cont...") == ['οδοσ']
+
+    tweets = pd.read_csv("tests/brunomars_data.csv")['tweet']
+    cleaner = TextCleaner(stem_cache_size=0)
+    assert [cleaner(tweet) for tweet in tweets] == [text_cleaning(tweet) for tweet in tweets]
+
+
+def test_text_cleaning_error():
+    """
+    Test error cases and error messages thrown by TextCleaner.
+    """
+    with raises(TypeError) as e:
+        TextCleaner(stem_cache_size=-1)
+    assert str(e.value) == 'Invalid argument: stem_cache_size must be a non-negative integer or None.'
@@ -0,0 +1,30 @@
+import pandas as pd
+from pytweet.pytweet import timeline_counts
+from pytest import raises
+
+
+def test_timeline_counts():
+    """
+    Tests that tweets are counted per hour of day, using the given time column.
+    """
+    data = pd.DataFrame({'sent': pd.to_datetime(['2021-03-01 09:15', '2021-03-02 09:59',
+                                                 '2021-03-02 23:00', '2021-03-05 00:01'])})
+    result = timeline_counts(data, 'sent')
+    assert list(result.columns) == ['hour', 'count']
+    assert result['hour'].tolist() == list(range(24))
+    assert result.loc[[0, 9, 23], 'count'].tolist() == [1, 2, 1]
+    assert result['count'].sum() == 4
+
+    # times read from a csv as strings are parsed
+    data = pd.read_csv("tests/brunomars_data.csv")
+    assert timeline_counts(data, 'time')['count'].sum() == len(data)
+    assert list(data.columns) == ['Unnamed: 0', 'time', 'tweet']
+
+
+def test_timeline_counts_error():
+    """
+    Test error cases and error messages thrown by timeline_counts.
+    """
+    with raises(Exception) as e:
+        timeline_counts('', 'time')
+    assert str(e.value) == "The value of the argument 'df' must be type of dataframe."
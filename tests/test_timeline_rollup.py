@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from pytweet.pytweet import timeline_counts, tweet_sentiment_analysis
+from pytweet.rollup import TimelineRollup
+from pytest import raises
+
+
+def test_timeline_rollup(tmp_path):
+    """
+    Test that the buckets of a rollup built in pieces match grouping
+    all the tweets at once, in the rollup's time zone.
+    """
+    data = tweet_sentiment_analysis(pd.read_csv("tests/brunomars_data.csv")[["time", "tweet"]])
+    rollup = TimelineRollup(tz='America/Vancouver').update(data.iloc[:200]).update(data.iloc[200:])
+    assert len(rollup) == len(data)
+
+    local = pd.to_datetime(data['time'], utc=True).dt.tz_convert('America/Vancouver')
+    for resolution, freq in [('minute', 'min'), ('hour', 'H'), ('day', 'D'), ('week', None)]:
+        if resolution == 'week':
+            starts = local.dt.tz_localize(None).dt.to_period('W-SUN').dt.start_time
+        else:
+            starts = local.dt.tz_localize(None).dt.floor(freq)
+        expected = data.groupby(starts.to_numpy()).agg(count=('tweet', 'size'), compound=('compound', 'mean'))
+        buckets = rollup.buckets(resolution)
+        np.testing.assert_array_equal(buckets.index.tz_localize(None), expected.index)
+        np.testing.assert_array_equal(buckets['count'], expected['count'])
+        np.testing.assert_allclose(buckets['compound'], expected['compound'])
+    assert (rollup.buckets('week')[['negative', 'neutral', 'positive']].sum(axis=1)
+            == rollup.buckets('week')['count']).all()
+
+    # totals over a range, with bounds in the rollup's time zone or another one
+    in_2020 = (local >= pd.Timestamp('2020-01-01', tz='America/Vancouver')) & \
+        (local < pd.Timestamp('2021-01-01', tz='America/Vancouver'))
+    totals = rollup.totals('2020-01-01', '2021-01-01')
+    assert totals['count'] == in_2020.sum()
+    assert totals['positive'] == (data['sentiment'][in_2020] == 'positive').sum()
+    assert np.isclose(totals['polarity'], data['polarity'][in_2020].mean())
+    assert rollup.totals(pd.Timestamp('2020-01-01 08:00', tz='UTC'), '2021-01-01', 'day')['count'] == in_2020.sum()
+    assert rollup.totals()['count'] == len(data)
+    assert len(rollup.buckets('day', '2020-01-01', '2021-01-01')) == local[in_2020].dt.date.nunique()
+
+    # merging, saving and hour of day counts
+    merged = TimelineRollup(tz='America/Vancouver').update(data.iloc[:100]) + \
+        TimelineRollup(tz='America/Vancouver').update(data.iloc[100:])
+    pd.testing.assert_frame_equal(merged.buckets('minute'), rollup.buckets('minute'))
+    rollup.save(tmp_path / 'rollup.npz')
+    loaded = TimelineRollup.load(tmp_path / 'rollup.npz')
+    pd.testing.assert_frame_equal(loaded.buckets('hour'), rollup.buckets('hour'))
+    pd.testing.assert_frame_equal(timeline_counts(TimelineRollup().update(data), 'time'),
+                                  timeline_counts(data, 'time'))
+
+
+def test_timeline_rollup_errors():
+    """Test the errors raised by TimelineRollup."""
+    data = pd.DataFrame({'time': ['2021-03-06 04:39:46'], 'tweet': ['hi'], 'compound': [0.5]})
+    rollup = TimelineRollup().update(data[['time', 'tweet']])
+    assert rollup.buckets('day')['count'].tolist() == [1]
+    assert np.isnan(rollup.buckets('day')['compound'].iloc[0])
+
+    with raises(KeyError):
+        rollup.update(data)
+    with raises(KeyError):
+        rollup.update(data.rename(columns={'time': 'date'}))
+    with raises(ValueError):
+        rollup.buckets('month')
+    with raises(ValueError):
+        rollup.merge(TimelineRollup(tz='Europe/Paris'))
+    with raises(Exception):
+        TimelineRollup(tz='Not/AZone')
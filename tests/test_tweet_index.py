@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+from pytweet.pytweet import tweet_sentiment_analysis
+from pytweet.search import TweetIndex, _decode_varints, _encode_varints
+from pytweet.store import TweetStore
+from pytest import raises
+
+
+def matching(tweets, pattern):
+    """The rows whose lowercased text matches a regex, found by scanning them all."""
+    return np.flatnonzero(tweets['tweet'].str.lower().str.contains(pattern).to_numpy())
+
+
+def test_varints():
+    """Test that varints round-trip, using as few bytes as possible."""
+    values = np.array([0, 1, 127, 128, 16383, 16384, 2 ** 35, 2 ** 63 - 1], dtype=np.uint64)
+    data, n_bytes = _encode_varints(values)
+    assert n_bytes.tolist() == [1, 1, 1, 2, 2, 3, 6, 9]
+    assert len(data) == n_bytes.sum()
+    np.testing.assert_array_equal(_decode_varints(data), values)
+
+
+def test_tweet_index(tmp_path):
+    """Test that queries return the same rows as scanning the tweets."""
+    tweets = pd.read_csv("tests/brunomars_data.csv")
+    index = TweetIndex.build(tweets)
+    assert len(index) == len(tweets)
+
+    np.testing.assert_array_equal(index.search(words='Love'), matching(tweets, r'\blove\b'))
+    np.testing.assert_array_equal(index.search(hashtags='#24KMagicWorldTour'),
+                                  matching(tweets, r'#24kmagicworldtour\b'))
+    np.testing.assert_array_equal(index.search(words=['thank', 'you']),
+                                  np.intersect1d(matching(tweets, r'\bthank\b'), matching(tweets, r'\byou\b')))
+    np.testing.assert_array_equal(index.search(words=['thank', 'love'], hashtags='24kmagic', mode='or'),
+                                  matching(tweets, r'\bthank\b|\blove\b|#24kmagic\b'))
+    assert len(index.search(words='notawordinthesetweets')) == 0
+    np.testing.assert_array_equal(index.search(), np.arange(len(tweets)))
+
+    # time ranges, alone or with words
+    times = pd.to_datetime(tweets['time'], utc=True)
+    in_2020 = np.flatnonzero((times >= pd.Timestamp('2020-01-01', tz='UTC'))
+                             & (times < pd.Timestamp('2021-01-01', tz='UTC')))
+    np.testing.assert_array_equal(index.search(start='2020-01-01', end='2021-01-01'), in_2020)
+    np.testing.assert_array_equal(index.search(words='love', start='2020-01-01', end='2021-01-01'),
+                                  np.intersect1d(in_2020, matching(tweets, r'\blove\b')))
+
+    # selections go straight into the analysis functions
+    selected = index.select(tweets, words='love')
+    pd.testing.assert_frame_equal(selected, tweets.iloc[matching(tweets, r'\blove\b')])
+    assert len(tweet_sentiment_analysis(selected)) == len(selected)
+
+    index.save(tmp_path / 'index.npz')
+    loaded = TweetIndex.load(tmp_path / 'index.npz')
+    np.testing.assert_array_equal(loaded.search(hashtags='24kmagic', start='2017-01-01'),
+                                  index.search(hashtags='24kmagic', start='2017-01-01'))
+
+    with raises(ValueError):
+        index.search(words='love', mode='xor')
+    with raises(ValueError):
+        index.select(tweets.iloc[1:], words='love')
+    with raises(KeyError):
+        TweetIndex.build(tweets.drop(columns='time'))
+
+
+def test_store_index(tmp_path):
+    """Test that a store keeps an index of each handle, rebuilt once tweets are appended."""
+    tweets = pd.read_csv("tests/brunomars_data.csv")
+    tweets['id'] = np.arange(len(tweets), 0, -1)
+    store = TweetStore(tmp_path)
+    store.append('@BrunoMars', tweets.iloc[100:])
+
+    index = store.index('@BrunoMars')
+    assert (tmp_path / 'brunomars.index.npz').exists()
+    assert len(index) == len(tweets) - 100
+    assert store.index('brunomars').source == index.source
+
+    store.append('@BrunoMars', tweets.iloc[:100])
+    loaded = store.load('@BrunoMars')
+    index = store.index('@BrunoMars')
+    assert len(index) == len(tweets)
+    pd.testing.assert_frame_equal(index.select(loaded, words='love'),
+                                  loaded.iloc[matching(loaded, r'\blove\b')])
@@ -1,4 +1,5 @@
 import pandas as pd
+from pytweet import pytweet
 from pytweet.pytweet import tweet_sentiment_analysis
 from pytest import raises
 
@@ -23,6 +24,28 @@ def test_tweet_sentiment_analysis():
     # make sure the output is not empty.
     assert len(result) > 0
 
+    # make sure the chunk size does not change the scores
+    pd.testing.assert_frame_equal(tweet_sentiment_analysis(data, chunk_size=7), result)
+
+    # make sure a tweet is labelled by its VADER scores
+    assert result.loc[result['pos'] > result['neg'], 'sentiment'].eq('positive').all()
+    assert result.loc[result['pos'] == result['neg'], 'sentiment'].eq('neutral').all()
+
+
+def test_tweet_sentiment_analysis_parallel(monkeypatch):
+    """
+    Test that scoring in a process pool gives the same output as
+    the serial path, with the rows in their original order.
+    """
+    data = pd.read_csv("tests/brunomars_data.csv")
+    data = data[["time", "tweet"]].sample(frac=1, random_state=2021)
+    expected = tweet_sentiment_analysis(data)
+
+    # force the pool on the small test dataset
+    monkeypatch.setattr(pytweet, '_PARALLEL_MIN_ROWS', 0)
+    result = tweet_sentiment_analysis(data, chunk_size=50, n_jobs=2)
+    pd.testing.assert_frame_equal(result, expected)
+
 
 def test_tweet_sentiment_analysis_error():
     """
@@ -33,3 +56,13 @@ def test_tweet_sentiment_analysis_error():
     with raises(TypeError) as e:
         tweet_sentiment_analysis('@ShawnMendes')
     assert str(e.value) == 'Invalid argument type: input must be a dataframe.'
+
+    # test invalid chunk_size
+    with raises(TypeError) as e:
+        tweet_sentiment_analysis(pd.DataFrame({'tweet': ['hi']}), chunk_size=0)
+    assert str(e.value) == 'Invalid argument: chunk_size must be a positive integer.'
+
+    # test invalid n_jobs
+    with raises(TypeError) as e:
+        tweet_sentiment_analysis(pd.DataFrame({'tweet': ['hi']}), n_jobs=0)
+    assert str(e.value) == 'Invalid argument: n_jobs must be a positive integer or -1.'
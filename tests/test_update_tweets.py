@@ -0,0 +1,86 @@
+import os
+import pandas as pd
+from pytweet.pytweet import get_tweets, update_tweets
+from pytweet.store import TweetStore
+from pytest import raises
+from tests.fake_twitter import FakeAPI, make_timeline
+
+
+def test_update_tweets(tmp_path):
+    """
+    Test that refreshes only download the tweets posted since the last one
+    and append them to the stored timeline.
+    """
+    timeline = make_timeline(450)
+    api = FakeAPI({'@pytweetGod': timeline[50:]})
+
+    # the first call downloads the whole timeline
+    result = update_tweets('@pytweetGod', tmp_path, verbose=False, api=api)
+    pd.testing.assert_frame_equal(result, get_tweets('@pytweetGod', verbose=False, api=api))
+    assert len(result) == 400
+
+    # nothing new: one call, nothing downloaded
+    api.calls.clear()
+    result = update_tweets('@pytweetGod', str(tmp_path), verbose=False, api=api)
+    assert len(result) == 400
+    assert len(api.calls) == 1 and api.calls[0]['since_id'] == timeline[50].id
+
+    # new tweets are appended on top of the stored ones
+    api.timelines['@pytweetGod'] = timeline
+    api.calls.clear()
+    result = update_tweets('@pytweetGod', TweetStore(tmp_path), verbose=False, api=api)
+    assert len(api.calls) == 2
+    pd.testing.assert_frame_equal(result, get_tweets('@pytweetGod', verbose=False, api=api))
+
+    # the cursor is kept per handle
+    store = TweetStore(tmp_path)
+    assert store.since_id('@PYTWEETGOD') == timeline[0].id
+    assert store.since_id('@someoneElse') is None
+
+
+def test_update_tweets_replies(tmp_path):
+    """Test that timelines with and without replies are stored and refreshed apart."""
+    # the newest tweet is a reply
+    timeline = make_timeline(301, replies_every=10)
+    api = FakeAPI({'@pytweetGod': timeline})
+    without = update_tweets('@pytweetGod', tmp_path, verbose=False, api=api)
+    with_replies = update_tweets('@pytweetGod', tmp_path, include_replies=True, verbose=False, api=api)
+    pd.testing.assert_frame_equal(with_replies, get_tweets('@pytweetGod', include_replies=True, verbose=False, api=api))
+    assert len(with_replies) == 301 and len(without) == 270
+
+    # each setting keeps its own cursor, and refreshing one leaves the other as it was
+    store = TweetStore(tmp_path)
+    assert store.since_id('@pytweetGod', include_replies=True) == timeline[0].id
+    assert store.since_id('@pytweetGod') == timeline[1].id
+    pd.testing.assert_frame_equal(update_tweets('@pytweetGod', tmp_path, verbose=False, api=api), without)
+
+
+def test_store_compaction(tmp_path):
+    """Test that part files are merged once a handle has more than max_parts of them."""
+    timeline = make_timeline(100)
+    tweets = pd.DataFrame({'id': [t.id for t in timeline], 'time': [t.created_at for t in timeline],
+                           'tweet': [t.text for t in timeline]})
+    store = TweetStore(tmp_path, max_parts=3)
+    for start in range(90, -10, -10):
+        store.append('@pytweetGod', tweets.iloc[start:start + 10])
+        assert len(os.listdir(tmp_path / 'pytweetgod')) <= 3
+    pd.testing.assert_frame_equal(store.load('@pytweetGod'), tweets)
+    assert store.since_id('@pytweetGod') == timeline[0].id
+
+
+def test_update_tweets_error(tmp_path):
+    """
+    Test error cases and error messages thrown by update_tweets.
+    """
+    api = FakeAPI({})
+    with raises(TypeError) as e:
+        update_tweets(123, tmp_path, api=api)
+    assert str(e.value) == 'Invalid argument type: handle must be a string.'
+
+    with raises(TypeError) as e:
+        update_tweets('@pytweetGod', 42, api=api)
+    assert str(e.value) == 'Invalid argument type: directory must be a path.'
+
+    with raises(TypeError) as e:
+        TweetStore(tmp_path, max_parts=0)
+    assert str(e.value) == 'Invalid argument: max_parts must be a positive integer.'
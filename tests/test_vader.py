@@ -0,0 +1,85 @@
+import random
+from importlib import metadata
+
+import nltk
+import numpy as np
+import pandas as pd
+from pytweet.pytweet import CompiledVaderScorer, _vader_analyzer, tweet_sentiment_analysis
+from pytweet.vader import CompiledVader
+from pytest import raises
+
+
+def nltk_scores(texts):
+    """The scores of NLTK's analyzer, in the order CompiledVader returns them."""
+    vader = _vader_analyzer()
+    return np.array([[score['neg'], score['neu'], score['pos'], score['compound']]
+                     for score in map(vader.polarity_scores, texts)]).reshape(-1, 4)
+
+
+def fuzzed_texts(n_texts, seed=0):
+    """
+    Random tweets made of lexicon words, boosters, negations and the words
+    VADER has rules for, in various cases and with punctuation.
+    """
+    vader = _vader_analyzer()
+    words = list(vader.lexicon)[::20] + list(vader.constants.BOOSTER_DICT) + sorted(vader.constants.NEGATE)[::3]
+    words += ['but', 'BUT', 'least', 'at', 'very', 'never', 'so', 'this', 'kind', 'of', 'sort', 'just', 'enough',
+              'the', 'bomb', 'yeah', 'right', 'kiss', 'death', 'GOOD', 'Good', 'good!', '!good', 'good!!', '"great"',
+              'great,', ',great', "don't", "isn't", ':)', ':(', 'a', '!', '??', '...', 'x.', 'LOVE', 'REALLY']
+    rng = random.Random(seed)
+    endings = ['', '!', '!!!!!', '??', '????']
+    return [' '.join(rng.choice(words) for _ in range(rng.randint(0, 15))) + rng.choice(endings)
+            for _ in range(n_texts)]
+
+
+def test_parity_reference_corpus():
+    """Test that the compiled analyzer gives exactly NLTK's scores on real tweets."""
+    texts = pd.read_csv("tests/brunomars_data.csv")['tweet'].tolist()
+    compiled = CompiledVader(_vader_analyzer())
+    np.testing.assert_array_equal(compiled.polarity_scores(texts), nltk_scores(texts))
+
+
+def test_parity_rules():
+    """Test that the compiled analyzer applies each of VADER's rules as NLTK does."""
+    texts = ['', ' ', 'a', '!!!', 'good', 'GOOD', 'GOOD movie', 'not good', "isn't good", 'never so good',
+             'never this good at all', 'so very good', 'VERY good movie', 'kind of good', 'it was sort of bad',
+             'least good', 'the least good', 'at least good', 'very least good', 'good but bad',
+             'bad BUT good but bad', 'good, bad.', '"good"', '!?!good', 'good!!!!!!', 'bad???', 'bad??',
+             'good good good', 'the bomb', 'it is the shit', 'yeah right', 'kiss of death', ':) :( :D', 'not not bad',
+             "don't kind of care"]
+    texts += fuzzed_texts(5000)
+    compiled = CompiledVader(_vader_analyzer())
+    np.testing.assert_array_equal(compiled.polarity_scores(texts), nltk_scores(texts))
+
+    # and one tweet at a time, or with a table starting over every batch
+    one_by_one = np.concatenate([compiled.polarity_scores([text]) for text in texts[:200]])
+    np.testing.assert_array_equal(one_by_one, nltk_scores(texts[:200]))
+    small = CompiledVader(_vader_analyzer(), max_tokens=10)
+    for start in range(0, 1000, 100):
+        np.testing.assert_array_equal(small.polarity_scores(texts[start:start + 100]),
+                                      nltk_scores(texts[start:start + 100]))
+
+
+def test_compiled_vader_scorer():
+    """Test that the 'compiled_vader' scorer gives the same analysis as 'vader'."""
+    data = pd.read_csv("tests/brunomars_data.csv")[["time", "tweet"]]
+    expected = tweet_sentiment_analysis(data, scorers=['vader'])
+    result = tweet_sentiment_analysis(data, scorers=['compiled_vader'])
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_compiled_vader_errors(monkeypatch):
+    """Test the arguments of CompiledVader, and the NLTK versions it supports."""
+    with raises(TypeError):
+        CompiledVader(_vader_analyzer(), max_tokens=0)
+    assert CompiledVader(_vader_analyzer()).polarity_scores([]).shape == (0, 4)
+
+    # the cache version of the scorer names the NLTK release
+    assert CompiledVaderScorer().version == f"compiled-nltk-vader-{metadata.version('nltk')}"
+
+    # NLTK 3.5 did not weigh 'But' as 'but'
+    monkeypatch.setattr(nltk, '__version__', '3.5')
+    with raises(ImportError) as e:
+        CompiledVader(_vader_analyzer())
+    assert str(e.value) == ("CompiledVader reproduces the VADER of NLTK 3.6 or newer, not 3.5. "
+                            "Upgrade nltk or use the 'vader' scorer.")
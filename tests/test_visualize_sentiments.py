@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
-from pytweet.pytweet import tweet_sentiment_analysis, visualize_sentiment
+from pytweet.pytweet import tweet_sentiment_analysis, visualize_sentiment, text_cleaning
+from pytweet.pytweet import _sentiment_word_counts, _tweet_rank
 from pytest import raises
 
 
@@ -43,3 +45,31 @@ def test_visualize_sentiments():
     # concatonated bar chart check
     separate_plot = visualize_sentiment(sentiment, "Separate")
     assert str(type(separate_plot)) == "<class 'altair.vegalite.v4.api.HConcatChart'>"
+
+
+def test_tweet_rank():
+    """
+    Tests that the word counts taken from the sparse matrix match a
+    count over the cleaned tweets, and that the top words are ranked.
+    """
+    data = pd.DataFrame({'tweet': ['love love the show', 'the show was bad', 'love it', 'new show'],
+                         'sentiment': ['positive', 'negative', 'positive', 'neutral']})
+    terms, counts = _sentiment_word_counts(data['tweet'], data['sentiment'])
+    assert sorted(counts) == ['negative', 'neutral', 'positive']
+    for sentiment, sentiment_counts in counts.items():
+        expected = pd.Series([word for tweet in data.loc[data['sentiment'] == sentiment, 'tweet']
+                              for word in text_cleaning(tweet)]).value_counts()
+        assert dict(zip(terms[sentiment_counts > 0], sentiment_counts[sentiment_counts > 0])) == expected.to_dict()
+
+    # the top word is left out, unused words are never ranked
+    ranked = _tweet_rank(terms, counts['positive'])
+    assert ranked.index.tolist() == ['show']
+    assert ranked['frequency'].tolist() == [1]
+    assert _tweet_rank(terms, counts['positive'], start=0).index.tolist() == ['love', 'show']
+
+    # words tied at the cut-off are picked in vocabulary order, not partition order
+    terms = np.array([f'word{i:03d}' for i in range(200)], dtype=object)
+    tied = np.ones(200, dtype=np.int64)
+    tied[[150, 7]] = [5, 3]
+    assert _tweet_rank(terms, tied, start=0, stop=5).index.tolist() == \
+        ['word150', 'word007', 'word000', 'word001', 'word002']
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from pytweet.pytweet import TopTermsSketch, WordFrequencyIndex, tweet_sentiment_analysis, visualize_sentiment
+from pytweet.pytweet import _sentiment_word_counts, _tweet_rank
+from pytest import raises
+
+
+def test_word_frequency_index(tmp_path):
+    """
+    Test that an index updated in pieces, merged and reloaded ranks
+    words the same as counting every tweet at once.
+    """
+    sentiment = tweet_sentiment_analysis(pd.read_csv("tests/brunomars_data.csv"))
+    terms, counts = _sentiment_word_counts(sentiment['tweet'], sentiment['sentiment'])
+
+    # two shards, one of them updated twice
+    left = WordFrequencyIndex().update(sentiment.iloc[:100]).update(sentiment.iloc[100:250])
+    right = WordFrequencyIndex().update(sentiment.iloc[250:])
+    index = left + right
+    assert index.sentiments == ['negative', 'neutral', 'positive']
+    for name, sentiment_counts in counts.items():
+        expected = _tweet_rank(terms, sentiment_counts, start=0, stop=25)
+        pd.testing.assert_frame_equal(index.top(name, k=25), expected)
+
+    # merging in place and reloading keep the counts
+    left += right
+    assert left.counts('positive') == index.counts('positive')
+    index.save(tmp_path / 'words.json')
+    loaded = WordFrequencyIndex.load(tmp_path / 'words.json')
+    pd.testing.assert_frame_equal(loaded.top_words(), index.top_words())
+
+    # queries see updates
+    index.top('negative')
+    index.update(pd.DataFrame({'tweet': ['zebra zebra', 'zebra'] * 20, 'sentiment': 'negative'}))
+    assert index.top('negative', k=1).index.tolist() == ['zebra']
+    assert index.top('negative', k=1)['frequency'].tolist() == [60]
+
+    # visualize_sentiment renders straight from the index
+    plot = visualize_sentiment(index, "Separate")
+    assert len(plot.hconcat) == 3
+    assert visualize_sentiment(loaded).to_dict() == visualize_sentiment(sentiment).to_dict()
+
+
+def test_word_frequency_index_incremental_ranking():
+    """
+    Test that rankings kept up to date between updates match sorting all
+    the counts, ties in alphabetical order, after each update.
+    """
+    rng = np.random.default_rng(0)
+    words = np.array([f'word{i:04d}' for i in range(2000)], dtype=object)
+    index = WordFrequencyIndex()
+    for i in range(30):
+        batch = rng.choice(len(words), 200)
+        index._add('positive', zip(words[batch], rng.integers(1, 4, 200).tolist()))
+        counts = index.counts('positive')
+        expected = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[3:28]
+        ranked = index.top('positive', k=25, skip=3)
+        assert list(zip(ranked.index, ranked['frequency'])) == expected
+    assert len(index.top('positive', k=5000)) == len(index.counts('positive'))
+    assert len(index.top('negative')) == 0
+
+
+def test_word_frequency_index_missing_texts():
+    """Test that missing tweets have no words, rather than those of another tweet."""
+    data = pd.DataFrame({'tweet': ['love this song', np.nan, 'hate this song', None],
+                         'sentiment': ['positive', 'positive', 'negative', 'negative']})
+    index = WordFrequencyIndex().update(data)
+    assert index.counts('positive') == {'love': 1, 'song': 1}
+    assert index.counts('negative') == {'hate': 1, 'song': 1}
+    sketch = TopTermsSketch().update(data)
+    assert sketch.top('positive', k=5)['frequency'].to_dict() == {'love': 1, 'song': 1}
+    assert sketch.top('negative', k=5)['frequency'].to_dict() == {'hate': 1, 'song': 1}
+
+
+def test_word_frequency_index_error():
+    """
+    Test error cases and error messages thrown by WordFrequencyIndex.
+    """
+    with raises(TypeError) as e:
+        WordFrequencyIndex().update('tweets')
+    assert str(e.value) == 'Invalid argument type: sentiment_df must be a dataframe.'
+
+    with raises(TypeError) as e:
+        WordFrequencyIndex().merge({})
+    assert str(e.value) == 'Invalid argument type: other must be a WordFrequencyIndex.'